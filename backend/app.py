@@ -1,79 +1,173 @@
-from flask import Flask, render_template, url_for, redirect, session
-from flask_sqlalchemy import SQLAlchemy
-from flask_pymongo import PyMongo
+from flask import Flask, render_template, url_for, redirect, session, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import threading
 
 # -----------------------------
 # Load environment variables
 # -----------------------------
 load_dotenv()
 
-# -----------------------------
-# Initialize Flask App
-# -----------------------------
-app = Flask(__name__, template_folder="templates", static_folder="static")
-CORS(app)
-
-# Load config from config.py
 from config import Config
-app.config.from_object(Config)
-
-# -----------------------------
-# Initialize PostgreSQL
-# -----------------------------
 from models.postgres_models import db
-db.init_app(app)
+from models.mongo_models import mongo, ensure_indexes
+from utils.db_pools import init_pools, mongo_client_options, pool_stats
+from utils.query_stats import init_query_stats
+from utils.metrics import init_metrics, mongo_listeners
+from utils.cache import cache
+from utils import analytics_refresh, report_jobs, employee_import, personnel_loader, email_outbox, change_feed
 
-# -----------------------------
-# Initialize MongoDB
-# -----------------------------
-app.config["MONGO_URI"] = Config.MONGO_URI
-mongo = PyMongo(app)
-# Make mongo accessible app-wide
-app.config["MONGO"] = mongo
 
 # -----------------------------
-# Register Blueprints
-# -----------------------------
-from routes.employee_routes import employee_bp
-from routes.mongo_routes import mongo_bp
-from routes.analytics_routes import analytics_bp
-from routes.mongo_analytics_routes import mongo_analytics_bp
-from routes.auth_routes import auth_bp
-
-app.register_blueprint(employee_bp, url_prefix="/employees")
-app.register_blueprint(mongo_bp, url_prefix="/personnel")
-app.register_blueprint(analytics_bp, url_prefix="/analytics")
-app.register_blueprint(mongo_analytics_bp, url_prefix="/mongo-analytics")
-app.register_blueprint(auth_bp, url_prefix="/auth")
+# App factory
+# -----------------------------
+# create_app() only wires things up: it opens no database connection and
+# starts no thread, so gunicorn can build the app once in the master
+# (--preload) and fork the workers from it. Connections are made lazily in
+# each worker; threads are started by start_background_services(), which
+# gunicorn.conf.py calls in post_worker_init. Tables are created by the
+# db_init scripts and `flask create-tables`, not on every boot.
+def create_app(config_object=Config):
+    app = Flask(__name__, template_folder="templates", static_folder="static")
+    CORS(app)
+    app.config.from_object(config_object)
 
-# -----------------------------
-# Import decorator for login
-# -----------------------------
-from utils.decorator import login_required
+    # -----------------------------
+    # Initialize PostgreSQL
+    # -----------------------------
+    init_pools(app)
+    db.init_app(app)
+
+    # Per-request query counting / N+1 detection
+    init_query_stats(app)
+
+    # Prometheus metrics at /metrics (request, DB and PDF timings)
+    init_metrics(app)
+
+    # -----------------------------
+    # Initialize shared result cache
+    # -----------------------------
+    cache.init_app(app)
+
+    # -----------------------------
+    # Initialize MongoDB (connects on first use, see mongo_client_options)
+    # -----------------------------
+    mongo.init_app(app, **mongo_client_options(app.config, extra_listeners=mongo_listeners(app)))
+    # Make mongo accessible app-wide
+    app.config["MONGO"] = mongo
+
+    # -----------------------------
+    # Register Blueprints
+    # -----------------------------
+    from routes.employee_routes import employee_bp
+    from routes.mongo_routes import mongo_bp
+    from routes.analytics_routes import analytics_bp
+    from routes.mongo_analytics_routes import mongo_analytics_bp
+    from routes.auth_routes import auth_bp
+    from routes.report_routes import report_bp
+
+    app.register_blueprint(employee_bp, url_prefix="/employees")
+    app.register_blueprint(mongo_bp, url_prefix="/personnel")
+    app.register_blueprint(analytics_bp, url_prefix="/analytics")
+    app.register_blueprint(mongo_analytics_bp, url_prefix="/mongo-analytics")
+    app.register_blueprint(auth_bp, url_prefix="/auth")
+    app.register_blueprint(report_bp, url_prefix="/reports")
+
+    # -----------------------------
+    # CLI: schema, indexes, refresh, workers, bulk loaders
+    # -----------------------------
+    register_cli(app)
+    analytics_refresh.register_cli(app)
+    report_jobs.register_cli(app)
+    employee_import.register_cli(app)
+    personnel_loader.register_cli(app)
+    email_outbox.register_cli(app)
+
+    # -----------------------------
+    # Home Page (requires login)
+    # -----------------------------
+    @app.route("/")
+    def home():
+        # If user is logged in → main page
+        if session.get("user_id"):
+            return render_template("index.html")
+        # If not logged in → landing page
+        return redirect(url_for("auth.auth_home"))
+
+    # Live connection pool statistics for this worker
+    @app.route("/pool-stats")
+    def pool_stats_view():
+        return jsonify(pool_stats())
+
+    # This worker's change feed listener
+    @app.route("/change-feed-stats")
+    def change_feed_stats_view():
+        return jsonify(change_feed.change_feed_stats())
+
+    # Under gunicorn the services are already running (post_worker_init);
+    # this covers `flask run` and `python app.py`.
+    @app.before_request
+    def _ensure_background_services():
+        if not app.extensions.get("background_services"):
+            start_background_services(app)
+
+    return app
+
+
+def register_cli(app):
+    """`flask create-tables` and `flask ensure-mongo-indexes`."""
+    import click
+
+    @app.cli.command("create-tables")
+    def create_tables_command():
+        # Tables the db_init scripts don't cover (e.g. audit_log); existing ones are left alone
+        db.create_all()
+        click.echo("Tables created.")
+
+    @app.cli.command("ensure-mongo-indexes")
+    def ensure_mongo_indexes_command():
+        for collection_name, names in ensure_indexes(mongo.db).items():
+            click.echo(f"{collection_name}: {', '.join(names) or 'FAILED (see log)'}")
 
-# -----------------------------
-# Home Page (requires login)
-# -----------------------------
-@app.route("/")
-def home():
-    # If user is logged in → main page
-    if session.get("user_id"):
-        return render_template("index.html")
-    # If not logged in → landing page
-    return redirect(url_for("auth.auth_home"))
 
 # -----------------------------
-# Optional: Create tables on first run
+# Per-worker background services
 # -----------------------------
-with app.app_context():
-    db.create_all()
+def start_background_services(app):
+    """Start this process's threads (once): index bootstrap, change feed
+    listener, matview refresher, report workers and email senders. Call after
+    the fork, never in a --preload master."""
+    if app.extensions.get("background_services"):
+        return
+    app.extensions["background_services"] = True
+
+    # Apply the Mongo index registry (idempotent; also `flask ensure-mongo-indexes`).
+    # In its own thread so an unreachable Mongo never holds up serving.
+    if app.config["MONGO_ENSURE_INDEXES_ON_STARTUP"]:
+        threading.Thread(target=_bootstrap_mongo_indexes, args=(app,),
+                         name="mongo-index-bootstrap", daemon=True).start()
+
+    change_feed.start_listener(app)
+    analytics_refresh.start_refresher(app)
+    report_jobs.start_report_workers(app)
+    email_outbox.start_email_senders(app)
+
+
+def _bootstrap_mongo_indexes(app):
+    try:
+        ensure_indexes(mongo.db)
+    except Exception as e:
+        app.logger.error(f"Mongo index bootstrap skipped: {e}")
+
+
+# `gunicorn app:app` / `flask --app app ...`
+app = create_app()
 
 # -----------------------------
 # Run the Flask App
 # -----------------------------
 if __name__ == "__main__":
+    start_background_services(app)
     port = int(os.environ.get("PORT", 5000))
     app.run(debug=True, host="0.0.0.0", port=port)
@@ -13,5 +13,183 @@ class Config:
     )
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pools (see utils/db_pools.py and GET /pool-stats). Each gunicorn
+    # worker has its own pools: Postgres needs up to
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 30000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+
+    # Create the Mongo indexes in models/mongo_models.MONGO_INDEXES at startup
+    MONGO_ENSURE_INDEXES_ON_STARTUP = os.getenv("MONGO_ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
     ENV = os.getenv("FLASK_ENV", "development")
     SECRET_KEY = os.getenv("SECRET_KEY", "default-secret-key")
+
+    # Employee list pagination
+    EMPLOYEE_PAGE_SIZE = int(os.getenv("EMPLOYEE_PAGE_SIZE", 25))
+    EMPLOYEE_MAX_PAGE_SIZE = int(os.getenv("EMPLOYEE_MAX_PAGE_SIZE", 200))
+
+    # Per-request SQL instrumentation (see utils/query_stats.py)
+    QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "true").lower() == "true"
+    QUERY_NPLUS1_THRESHOLD = int(os.getenv("QUERY_NPLUS1_THRESHOLD", 3))
+
+    # Prometheus metrics at /metrics (see utils/metrics.py); aggregated across
+    # gunicorn workers through PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Result cache shared by all gunicorn workers (see utils/cache.py)
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "FileSystemCache")
+    CACHE_DIR = os.getenv("CACHE_DIR", "/tmp/hrms_cache")
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", 300))
+    CACHE_THRESHOLD = int(os.getenv("CACHE_THRESHOLD", 500))
+    ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", 600))
+
+    # "concurrent" runs the analytics queries in parallel on pooled connections,
+    # "sequential" runs them one after another on the request session
+    ANALYTICS_QUERY_MODE = os.getenv("ANALYTICS_QUERY_MODE", "concurrent")
+    ANALYTICS_MAX_PARALLEL = int(os.getenv("ANALYTICS_MAX_PARALLEL", 5))
+
+    # Materialized analytics views (db_init/analytics_matviews.sql).
+    # Refresh runs once writes have been quiet for DEBOUNCE seconds, at most
+    # MAX_DELAY seconds after the first pending change, and at least every
+    # MAX_AGE seconds regardless (experienced_employees depends on today's date).
+    ANALYTICS_USE_MATVIEWS = os.getenv("ANALYTICS_USE_MATVIEWS", "true").lower() == "true"
+    ANALYTICS_REFRESH_INTERVAL = int(os.getenv("ANALYTICS_REFRESH_INTERVAL", 15))
+    ANALYTICS_REFRESH_DEBOUNCE = int(os.getenv("ANALYTICS_REFRESH_DEBOUNCE", 30))
+    ANALYTICS_REFRESH_MAX_DELAY = int(os.getenv("ANALYTICS_REFRESH_MAX_DELAY", 300))
+    ANALYTICS_REFRESH_MAX_AGE = int(os.getenv("ANALYTICS_REFRESH_MAX_AGE", 86400))
+
+    # Background PDF report jobs (utils/report_jobs.py). Each web process runs
+    # REPORT_WORKER_THREADS worker threads; REPORT_MAX_CONCURRENT caps renders
+    # across all processes so report bursts cannot starve interactive traffic.
+    REPORT_WORKER_THREADS = int(os.getenv("REPORT_WORKER_THREADS", 1))
+    REPORT_MAX_CONCURRENT = int(os.getenv("REPORT_MAX_CONCURRENT", 2))
+    REPORT_MAX_QUEUED = int(os.getenv("REPORT_MAX_QUEUED", 50))
+    REPORT_RESULT_TTL = int(os.getenv("REPORT_RESULT_TTL", 3600))
+    REPORT_JOB_TIMEOUT = int(os.getenv("REPORT_JOB_TIMEOUT", 600))
+    REPORT_MAX_ATTEMPTS = int(os.getenv("REPORT_MAX_ATTEMPTS", 2))
+    REPORT_POLL_INTERVAL = float(os.getenv("REPORT_POLL_INTERVAL", 1))
+    REPORT_SWEEP_INTERVAL = int(os.getenv("REPORT_SWEEP_INTERVAL", 60))
+
+    # Content-addressed cache of rendered report PDFs (see utils/pdf_cache.py),
+    # kept on local disk and evicted least-recently-used beyond MAX_BYTES
+    PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() == "true"
+    PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "/tmp/hrms_pdf_cache")
+    PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+    # Streaming CSV / NDJSON exports: rows fetched per server-side cursor batch
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+    # Large row-based PDF reports (utils/pdf_chunked.py): above THRESHOLD rows
+    # the report is rendered in chunks of CHUNK_ROWS on CHUNK_WORKERS parallel
+    # wkhtmltopdf processes and merged
+    PDF_CHUNK_THRESHOLD = int(os.getenv("PDF_CHUNK_THRESHOLD", 2000))
+    PDF_CHUNK_ROWS = int(os.getenv("PDF_CHUNK_ROWS", 500))
+    PDF_CHUNK_WORKERS = int(os.getenv("PDF_CHUNK_WORKERS", min(4, os.cpu_count() or 1)))
+
+    # Bulk personnel loader (utils/personnel_loader.py): documents per unordered bulk upsert
+    PERSONNEL_LOAD_BATCH_SIZE = int(os.getenv("PERSONNEL_LOAD_BATCH_SIZE", 1000))
+
+    # OTP store shared by all workers (utils/otp_store.py): "postgres" uses the
+    # otp_codes table, "sqlite" a local file for single-host deployments
+    OTP_STORE = os.getenv("OTP_STORE", "postgres")
+    OTP_SQLITE_PATH = os.getenv("OTP_SQLITE_PATH", "/tmp/hrms_otp.sqlite3")
+    OTP_EXPIRY_MINUTES = int(os.getenv("OTP_EXPIRY_MINUTES", 5))
+    OTP_MAX_ENTRIES = int(os.getenv("OTP_MAX_ENTRIES", 10000))
+    OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", 5))
+
+    # Outgoing email (utils/email_outbox.py): requests only enqueue, each web
+    # process runs EMAIL_SENDER_THREADS sender threads. EMAIL_TRANSPORT is
+    # "brevo", "log", "stub" or "package.module:ClassName".
+    EMAIL_TRANSPORT = os.getenv("EMAIL_TRANSPORT", "brevo")
+    EMAIL_SENDER_THREADS = int(os.getenv("EMAIL_SENDER_THREADS", 1))
+    EMAIL_SEND_BATCH = int(os.getenv("EMAIL_SEND_BATCH", 20))
+    EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 6))
+    EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", 2))
+    EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", 300))
+    # A transport call gives up after EMAIL_REQUEST_TIMEOUT seconds; a message
+    # still 'sending' after EMAIL_SEND_TIMEOUT is presumed lost and retried
+    # (never sooner than a whole batch of timed-out requests, see sweep_outbox).
+    EMAIL_REQUEST_TIMEOUT = float(os.getenv("EMAIL_REQUEST_TIMEOUT", 15))
+    EMAIL_SEND_TIMEOUT = int(os.getenv("EMAIL_SEND_TIMEOUT", 600))
+    EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", 1))
+    EMAIL_SWEEP_INTERVAL = int(os.getenv("EMAIL_SWEEP_INTERVAL", 60))
+    EMAIL_OUTBOX_RETENTION = int(os.getenv("EMAIL_OUTBOX_RETENTION", 7 * 86400))
+
+    # Password hashing (utils/passwords.py): werkzeug method and cost. At most
+    # MAX_PENDING hashes run at once on the host (slot files in SLOT_DIR,
+    # shared by all workers; roughly the cores to spend on hashing); others get
+    # a 503 after WAIT seconds, during which their sync worker is blocked, so
+    # keep it short. HASH_WORKERS child processes per web process only help
+    # gthread/gevent workers; sync workers hash inline (0).
+    # Hashes made with other parameters are upgraded on the next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", 16))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 0))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 2))
+    PASSWORD_HASH_WAIT = float(os.getenv("PASSWORD_HASH_WAIT", 0.5))
+    PASSWORD_HASH_SLOT_DIR = os.getenv("PASSWORD_HASH_SLOT_DIR", "/tmp/hrms_hash_slots")
+
+    # Per-worker cache of User records (utils/session_manager.py). Writes from
+    # any worker or client evict entries through the change feed, so the TTL
+    # only bounds staleness while the feed is down.
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 300))
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))
+
+    # Employee 360 view (utils/employee_360.py): Postgres emp_id N is Mongo
+    # employee_id MONGO_EMPLOYEE_ID_FORMAT % N. The *_FIELDS lists (comma
+    # separated; Mongo paths may be dotted) are what a page loads by default
+    # and the most a request can ask for.
+    MONGO_EMPLOYEE_ID_FORMAT = os.getenv("MONGO_EMPLOYEE_ID_FORMAT", "E%03d")
+    EMPLOYEE_360_SQL_FIELDS = os.getenv(
+        "EMPLOYEE_360_SQL_FIELDS",
+        "first_name,last_name,gender,email,phone,hire_date,department,designation,performance_rating"
+    )
+    EMPLOYEE_360_MONGO_FIELDS = os.getenv(
+        "EMPLOYEE_360_MONGO_FIELDS",
+        "blood_group,residence.city,residence.state,emergency_contact.name,emergency_contact.phone,"
+        "family.marital_status,family.no_of_dependents"
+    )
+    EMPLOYEE_360_CACHE_TTL = int(os.getenv("EMPLOYEE_360_CACHE_TTL", 600))
+
+    # Postgres change feed (utils/change_feed.py, db_init/change_feed.sql):
+    # each web process LISTENs on its own connection and invalidates caches
+    # when employee, professional_info or accounts change, however they changed
+    CHANGE_FEED_ENABLED = os.getenv("CHANGE_FEED_ENABLED", "true").lower() == "true"
+    CHANGE_FEED_POLL_INTERVAL = float(os.getenv("CHANGE_FEED_POLL_INTERVAL", 5))
+    CHANGE_FEED_RECONNECT_SECONDS = float(os.getenv("CHANGE_FEED_RECONNECT_SECONDS", 5))
+
+    # Personnel analytics (routes/mongo_analytics_routes.py), shared by all
+    # workers; personnel writes through the app invalidate them, the TTL
+    # bounds staleness after writes made elsewhere
+    MONGO_ANALYTICS_CACHE_TTL = int(os.getenv("MONGO_ANALYTICS_CACHE_TTL", 60))
+
+    # Live analytics dashboards (utils/live_analytics.py). Each worker loads
+    # a dashboard's stats once for all its viewers: on change feed events (or
+    # every INTERVAL s) for Postgres, every MONGO_INTERVAL s for Mongo. An open
+    # stream occupies a sync worker, so at most MAX_STREAMS are open on the
+    # host (slot files in SLOT_DIR, shared by the workers); keep it well below
+    # the worker count, or run gthread/gevent workers to allow more. Streams
+    # end after STREAM_SECONDS, which must stay below gunicorn's worker timeout
+    # (30 s by default), and the browser reconnects after RETRY_MS
+    # (BUSY_RETRY_MS when it was turned away).
+    LIVE_ANALYTICS_INTERVAL = float(os.getenv("LIVE_ANALYTICS_INTERVAL", 30))
+    LIVE_ANALYTICS_MONGO_INTERVAL = float(os.getenv("LIVE_ANALYTICS_MONGO_INTERVAL", 10))
+    LIVE_ANALYTICS_MAX_STREAMS = int(os.getenv("LIVE_ANALYTICS_MAX_STREAMS", 2))
+    LIVE_ANALYTICS_SLOT_DIR = os.getenv("LIVE_ANALYTICS_SLOT_DIR", "/tmp/hrms_live_slots")
+    LIVE_ANALYTICS_STREAM_SECONDS = float(os.getenv("LIVE_ANALYTICS_STREAM_SECONDS", 25))
+    LIVE_ANALYTICS_HEARTBEAT = float(os.getenv("LIVE_ANALYTICS_HEARTBEAT", 15))
+    LIVE_ANALYTICS_RETRY_MS = int(os.getenv("LIVE_ANALYTICS_RETRY_MS", 2000))
+    LIVE_ANALYTICS_BUSY_RETRY_MS = int(os.getenv("LIVE_ANALYTICS_BUSY_RETRY_MS", 30000))
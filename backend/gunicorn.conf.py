@@ -0,0 +1,32 @@
+# -----------------------------
+# Gunicorn settings, picked up automatically from the working directory
+# -----------------------------
+import os
+import shutil
+
+# Every worker writes its Prometheus samples here; /metrics aggregates them
+# (utils/metrics.py). Set before any worker imports prometheus_client.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/hrms_metrics")
+
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be added to this one's
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+# Import and build the app once in the master, then fork: workers share the
+# loaded code and boot faster. app.create_app() opens no connections and
+# starts no threads, so nothing is shared across the fork.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def post_worker_init(worker):
+    # Per-worker threads (change feed listener, report workers, email senders,
+    # matview refresher)
+    from app import start_background_services
+    start_background_services(worker.wsgi)
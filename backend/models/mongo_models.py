@@ -1,5 +1,61 @@
 # models/mongo_models.py
+import logging
+import threading
+from cachetools import TTLCache, cached
 from flask import current_app
+from flask_pymongo import PyMongo
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Bound to the app in create_app() (mongo.init_app), like models.postgres_models.db
+mongo = PyMongo()
+
+# -----------------------------
+# Index registry
+# -----------------------------
+# Declarative list of the indexes each collection needs. ensure_indexes() applies
+# it idempotently (at startup, or via `flask ensure-mongo-indexes`).
+MONGO_INDEXES = {
+    "employees_info": [
+        IndexModel([("employee_id", ASCENDING)], name="ux_employee_id", unique=True),
+        IndexModel([("blood_group", ASCENDING)], name="ix_blood_group"),
+        IndexModel([("residence.city", ASCENDING)], name="ix_residence_city"),
+        IndexModel([("residence.state", ASCENDING)], name="ix_residence_state"),
+        IndexModel([("gender", ASCENDING)], name="ix_gender"),
+        # Personnel search (download_personnel_report)
+        IndexModel(
+            [("name", TEXT), ("employee_id", TEXT), ("aadhaar", TEXT), ("pan", TEXT),
+             ("contact.email", TEXT), ("contact.phone", TEXT)],
+            name="tx_personnel_search",
+            weights={"name": 10, "employee_id": 10, "contact.email": 5},
+            default_language="none"
+        ),
+    ],
+    "qualifications": [
+        IndexModel([("employee_id", ASCENDING)], name="ix_employee_id"),
+    ],
+}
+
+
+def ensure_indexes(db, registry=None):
+    """
+    Create every index in the registry that does not exist yet.
+    Returns {collection: [index names]} for the indexes now in place; a failure
+    on one collection (e.g. duplicate employee_id values blocking the unique
+    index) is logged and does not stop the others.
+    """
+    registry = registry or MONGO_INDEXES
+    created = {}
+    for collection_name, indexes in registry.items():
+        try:
+            created[collection_name] = db[collection_name].create_indexes(indexes)
+        except OperationFailure as e:
+            logger.error(f"Could not create indexes on {collection_name}: {e}")
+            created[collection_name] = []
+    return created
+
 
 def get_mongo():
     return current_app.config['MONGO']
@@ -9,6 +65,13 @@ def get_personnel_collection():
     mongo = get_mongo()
     return mongo.db.employees_info
 
+# Collection names change rarely; don't ask the server on every call.
+_collection_names_cache = TTLCache(maxsize=8, ttl=60)
+
+@cached(_collection_names_cache, key=lambda db: db.name, lock=threading.Lock())
+def _collection_names(db):
+    return frozenset(db.list_collection_names())
+
 def get_qualification_collection():
     """
     Return a dedicated 'qualifications' collection if it exists.
@@ -17,7 +80,10 @@ def get_qualification_collection():
     """
     mongo = get_mongo()
     db = mongo.db
-    # list_collection_names() is cheap enough here
-    if 'qualifications' in db.list_collection_names():
+    if 'qualifications' in _collection_names(db):
         return db.qualifications
     return None
+
+def clear_collection_cache():
+    """Forget cached collection metadata (call after creating a collection)."""
+    _collection_names_cache.clear()
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import deferred
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -56,3 +57,66 @@ class AuditLog(db.Model):
     old_data = db.Column(db.JSON)
     new_data = db.Column(db.JSON)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ReportJob(db.Model):
+    """A queued PDF report (see utils/report_jobs.py)."""
+    __tablename__ = 'report_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)
+    params = db.Column(db.JSON)
+    status = db.Column(db.String(10), nullable=False, default="queued")  # queued, running, done, failed
+    error = db.Column(db.Text)
+    filename = db.Column(db.String(200))
+    result = deferred(db.Column(db.LargeBinary))
+    result_size = db.Column(db.Integer)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("idx_report_jobs_status_created", "status", "created_at"),
+        db.Index("idx_report_jobs_expires", "expires_at"),
+    )
+
+
+class OtpCode(db.Model):
+    """A pending password-reset OTP (see utils/otp_store.py)."""
+    __tablename__ = 'otp_codes'
+
+    email = db.Column(db.String(100), primary_key=True)
+    otp_hash = db.Column(db.String(64), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("idx_otp_codes_expires", "expires_at"),
+    )
+
+
+class EmailOutbox(db.Model):
+    """An outgoing email waiting for the background sender (see utils/email_outbox.py)."""
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(100), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    text_content = db.Column(db.Text)  # cleared once delivered or given up on
+    template = db.Column(db.String(50))  # body built at send time instead (see email_template)
+    status = db.Column(db.String(10), nullable=False, default="queued")  # queued, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("idx_email_outbox_status_next", "status", "next_attempt_at"),
+        db.Index("idx_email_outbox_created", "created_at"),
+    )
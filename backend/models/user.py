@@ -1,5 +1,5 @@
 from models.postgres_models import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.passwords import hash_password, verify_password
 from datetime import datetime
 
 class User(db.Model):
@@ -25,10 +25,14 @@ class User(db.Model):
 
     # ---------- Password handling ----------
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Check the password, upgrading an outdated hash in place (caller commits)."""
+        ok, new_hash = verify_password(self.password_hash, password)
+        if new_hash:
+            self.password_hash = new_hash
+        return ok
 
     # ---------- Role checks ----------
     def is_editor(self):
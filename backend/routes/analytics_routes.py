@@ -1,22 +1,39 @@
-from flask import Blueprint, render_template, request, make_response
+from flask import Blueprint, render_template, request, jsonify, current_app, get_template_attribute
 from models.postgres_models import db
+from utils.cache import cached_result, cache_stats, generation, ANALYTICS_CACHE_NAMESPACE
 from sqlalchemy import text
+from utils.query_stats import query_budget, current_query_stats, counting_into
+from utils.analytics_refresh import get_refresh_state
+from utils.pdf import render_pdf, pdf_file_response, PdfRenderError, WkhtmltopdfMissing
+from utils.pdf_cache import cached_report
+from utils.report_jobs import report_builder
+from utils.change_feed import change_handler
+from utils.live_analytics import LiveFeed, event_stream
 from datetime import datetime
-import pdfkit
-import shutil  # ✅ for auto-detecting wkhtmltopdf path
-import pytz  # ✅ for timezone support
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 analytics_bp = Blueprint("analytics", __name__, url_prefix="/analytics")
 
 
 # ------------------------------
-# Helper function to collect all analytics data
+# Cached analytics (invalidated by employee/professional writes)
 # ------------------------------
-def _collect_stats():
-    stats = {}
+def get_stats():
+    return cached_result(
+        ANALYTICS_CACHE_NAMESPACE,
+        "collect_stats",
+        _collect_stats,
+        timeout=current_app.config["ANALYTICS_CACHE_TTL"]
+    )
 
+
+# ------------------------------
+# Analytics queries (independent of each other, run in this order)
+# ------------------------------
+ANALYTICS_QUERIES = [
     # 📊 Salary Comparison
-    stats["salary_comparison"] = db.session.execute(text("""
+    ("salary_comparison", """
         SELECT 
             e.emp_id,
             e.first_name || ' ' || e.last_name AS full_name,
@@ -29,30 +46,22 @@ def _collect_stats():
         FROM employee e
         JOIN professional_info p ON e.emp_id = p.emp_id
         ORDER BY e.hire_date
-    """)).fetchall()
+    """),
 
     # 🏆 Top earners
-    stats["top_earners"] = db.session.execute(
-        text("SELECT * FROM top_earners_per_department")
-    ).fetchall()
+    ("top_earners", "SELECT * FROM top_earners_per_department"),
 
     # ⚠️ Low performers
-    stats["low_performers"] = db.session.execute(
-        text("SELECT * FROM low_performers")
-    ).fetchall()
+    ("low_performers", "SELECT * FROM low_performers"),
 
     # 🚀 Promotion candidates
-    stats["promotion_candidates"] = db.session.execute(
-        text("SELECT * FROM promotion_candidates")
-    ).fetchall()
+    ("promotion_candidates", "SELECT * FROM promotion_candidates"),
 
     # 🎯 Experienced employees
-    stats["experienced_employees"] = db.session.execute(
-        text("SELECT * FROM experienced_employees")
-    ).fetchall()
+    ("experienced_employees", "SELECT * FROM experienced_employees"),
 
     # 📌 Salary grades
-    stats["salary_grades"] = db.session.execute(text("""
+    ("salary_grades", """
         SELECT emp_id, department, current_salary,
         CASE 
             WHEN current_salary > 70000 THEN 'High'
@@ -60,25 +69,25 @@ def _collect_stats():
             ELSE 'Low'
         END AS grade
         FROM professional_info
-    """)).fetchall()
+    """),
 
     # 🥇 Salary rank
-    stats["salary_ranks"] = db.session.execute(text("""
+    ("salary_ranks", """
         SELECT emp_id, current_salary,
         RANK() OVER (ORDER BY current_salary DESC) AS salary_rank
         FROM professional_info
-    """)).fetchall()
+    """),
 
     # 📈 Running totals & averages
-    stats["running_salary"] = db.session.execute(text("""
+    ("running_salary", """
         SELECT emp_id, current_salary,
         SUM(current_salary) OVER (ORDER BY emp_id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS running_sum,
         AVG(current_salary) OVER (ORDER BY emp_id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS running_avg
         FROM professional_info
-    """)).fetchall()
+    """),
 
     # 🏢 Departments with salary above average
-    stats["departments_above_avg"] = db.session.execute(text("""
+    ("departments_above_avg", """
         WITH dept_avg AS (
             SELECT department, AVG(current_salary) AS dept_avg_salary
             FROM professional_info
@@ -90,8 +99,85 @@ def _collect_stats():
         SELECT d.*
         FROM dept_avg d, overall_avg o
         WHERE d.dept_avg_salary > o.overall_salary
-    """)).fetchall()
+    """),
+]
+
+
+# Sections served from the materialized views in db_init/analytics_matviews.sql
+# when ANALYTICS_USE_MATVIEWS is on (refreshed by utils/analytics_refresh.py)
+MATERIALIZED_QUERIES = {
+    "top_earners": "SELECT * FROM mv_top_earners_per_department",
+    "low_performers": "SELECT * FROM mv_low_performers",
+    "promotion_candidates": "SELECT * FROM mv_promotion_candidates",
+    "experienced_employees": "SELECT * FROM mv_experienced_employees",
+    "salary_grades": "SELECT * FROM mv_salary_grades",
+    "salary_ranks": "SELECT * FROM mv_salary_ranks",
+    "running_salary": "SELECT * FROM mv_running_salary ORDER BY emp_id",
+}
+
+
+def _analytics_queries():
+    if not current_app.config["ANALYTICS_USE_MATVIEWS"]:
+        return ANALYTICS_QUERIES
+    return [(name, MATERIALIZED_QUERIES.get(name, sql)) for name, sql in ANALYTICS_QUERIES]
+
+
+def _run_query_on_pool(engine, sql, query_stats=None):
+    """
+    Run one analytics query on its own pooled connection and time it,
+    counting it into the calling request's `query_stats`.
+    """
+    start = time.perf_counter()
+    with counting_into(query_stats), engine.connect() as conn:
+        rows = conn.execute(text(sql)).fetchall()
+    return rows, time.perf_counter() - start
 
+
+def _collect_stats_timed():
+    """
+    Run every analytics query and return (stats, timings).
+
+    In "concurrent" mode (the default) the queries run in parallel on separate
+    pooled connections, so wall-clock latency is roughly that of the slowest
+    query rather than the sum of all of them. "sequential" runs them one by one
+    on the request's session. `timings` maps each section to its duration in
+    milliseconds plus "_wall" and "_mode" entries.
+    """
+    mode = current_app.config["ANALYTICS_QUERY_MODE"]
+    queries = _analytics_queries()
+    stats, timings = {}, {}
+    wall_start = time.perf_counter()
+
+    if mode == "concurrent":
+        engine = db.engine
+        # Pool threads have no request context; count their queries for it
+        query_stats = current_query_stats()
+        workers = min(current_app.config["ANALYTICS_MAX_PARALLEL"], len(queries))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                name: pool.submit(_run_query_on_pool, engine, sql, query_stats)
+                for name, sql in queries
+            }
+            for name, _ in queries:
+                stats[name], elapsed = futures[name].result()
+                timings[name] = round(elapsed * 1000, 2)
+    else:
+        for name, sql in queries:
+            start = time.perf_counter()
+            stats[name] = db.session.execute(text(sql)).fetchall()
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    timings["_wall"] = round((time.perf_counter() - wall_start) * 1000, 2)
+    timings["_mode"] = mode
+    return stats, timings
+
+
+# ------------------------------
+# Helper function to collect all analytics data
+# ------------------------------
+def _collect_stats():
+    stats, timings = _collect_stats_timed()
+    current_app.logger.info(f"Analytics queries: {timings}")
     return stats
 
 
@@ -99,18 +185,75 @@ def _collect_stats():
 # Main page
 # ------------------------------
 @analytics_bp.route("/")
+@query_budget(10)
 def stats_home():
-    stats = _collect_stats()
-    return render_template("stats.html", stats=stats)
+    stats = get_stats()
+    freshness = get_refresh_state() if current_app.config["ANALYTICS_USE_MATVIEWS"] else None
+    return render_template("stats.html", stats=stats, freshness=freshness)
 
 
-@analytics_bp.route("/download", methods=["POST"])
-def download_report():
-    company_name = request.form.get("company_name", "Unknown Company")
-    company_details = request.form.get("company_details", "")
-    stats = _collect_stats()
+# ------------------------------
+# Live updates (Server-Sent Events) for the page above
+# ------------------------------
+def _render_section(section, rows):
+    return get_template_attribute("_stats_sections.html", "analytics_section")(section, rows)
+
+
+live_stats_feed = LiveFeed("analytics", get_stats, _render_section, "LIVE_ANALYTICS_INTERVAL")
+
+
+@change_handler
+def wake_live_stats(changes):
+    """Reload on employee/professional writes and on materialized view refreshes."""
+    if any(c["table"] in ("employee", "professional_info", "analytics_matviews") for c in changes):
+        live_stats_feed.notify_changed()
+
+
+@analytics_bp.route("/live")
+@query_budget(0)
+def live_stats():
+    return event_stream(live_stats_feed, request.headers.get("Last-Event-ID"))
+
+
+# How stale the materialized analytics are
+@analytics_bp.route("/freshness")
+@query_budget(1)
+def analytics_freshness():
+    if not current_app.config["ANALYTICS_USE_MATVIEWS"]:
+        return jsonify({"materialized": False})
+    state = get_refresh_state() or {}
+    return jsonify({
+        "materialized": True,
+        "refreshed_at": state.get("refreshed_at").isoformat() if state.get("refreshed_at") else None,
+        "pending_changes_since": state.get("dirty_since").isoformat() if state.get("dirty_since") else None,
+        "age_seconds": float(state["age_seconds"]) if state.get("age_seconds") is not None else None,
+    })
+
+
+# Per-query timing breakdown (always runs the queries, bypassing the cache)
+@analytics_bp.route("/timings")
+@query_budget(9)
+def analytics_timings():
+    _, timings = _collect_stats_timed()
+    return jsonify(timings)
+
+
+@analytics_bp.route("/cache-stats")
+@query_budget(0)
+def analytics_cache_stats():
+    return jsonify(cache_stats(ANALYTICS_CACHE_NAMESPACE))
+
+
+# ------------------------------
+# Analytics report (shared by the inline download and the report job queue)
+# ------------------------------
+@report_builder("analytics")
+def build_analytics_report(params):
+    company_name = params.get("company_name", "Unknown Company")
+    company_details = params.get("company_details", "")
 
     # ✅ Use India Standard Time
+    import pytz  # ✅ for timezone support (loaded on first report)
     ist = pytz.timezone("Asia/Kolkata")
     now_ist = datetime.now(ist)
 
@@ -119,30 +262,39 @@ def download_report():
     current_time = now_ist.strftime("%H:%M:%S")
 
     # Render HTML for PDF
-    html = render_template(
+    def render():
+        html = render_template(
+            "stats_report.html",
+            stats=get_stats(),
+            company_name=company_name,
+            company_details=company_details,
+            report_year=current_year,
+            generated_on=current_date,
+            generated_time=current_time
+        )
+        return render_pdf(html)
+
+    # The analytics namespace is invalidated whenever the figures can change
+    # (writes, matview refreshes), so its generation is the data version.
+    # The date is part of the key because the report prints it.
+    pdf = cached_report(
         "stats_report.html",
-        stats=stats,
-        company_name=company_name,
-        company_details=company_details,
-        report_year=current_year,
-        generated_on=current_date,
-        generated_time=current_time
+        {"company_name": company_name, "company_details": company_details, "report_year": current_year,
+         "generated_on": current_date},
+        generation(ANALYTICS_CACHE_NAMESPACE),
+        render
     )
+    return pdf, f"HRMS_Report_{current_year}.pdf"
 
-    # ✅ Auto-detect wkhtmltopdf path
-    wkhtmltopdf_path = shutil.which("wkhtmltopdf")
-    if not wkhtmltopdf_path:
-        return "wkhtmltopdf not found in container", 500
-
-    config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path)
 
+@analytics_bp.route("/download", methods=["POST"])
+@query_budget(9)
+def download_report():
     try:
-        pdf = pdfkit.from_string(html, False, configuration=config)
-    except Exception as e:
+        pdf, filename = build_analytics_report(request.form)
+    except WkhtmltopdfMissing as e:
+        return str(e), 500
+    except PdfRenderError as e:
         return f"Failed to generate PDF: {e}", 500
 
-    response = make_response(pdf)
-    response.headers["Content-Type"] = "application/pdf"
-    filename = f"HRMS_Report_{current_year}.pdf"
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    return response
\ No newline at end of file
+    return pdf_file_response(pdf, filename)
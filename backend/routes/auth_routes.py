@@ -1,9 +1,12 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 from models.user import User
 from models.postgres_models import db
 from utils.decorator import login_required
+from utils.query_stats import query_budget
 from utils.security import initiate_email_otp_flow, verify_stored_otp
+from utils.email_outbox import outbox_stats
+from utils.passwords import HashingBusy
+from utils.session_manager import current_user, remember_user, forget_user, user_cache_stats
 import logging
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
@@ -14,6 +17,7 @@ ALLOWED_ROLES = ["user", "viewer", "editor"]
 # Landing page BEFORE login
 # -------------------------
 @auth_bp.route("/")
+@query_budget(0)
 def auth_home():
     # Redirect logged-in users to main page
     if session.get("user_id"):
@@ -24,6 +28,7 @@ def auth_home():
 # Sign Up
 # -------------------------
 @auth_bp.route("/signup", methods=["GET", "POST"])
+@query_budget(2)
 def signup():
     if session.get("user_id"):
         return redirect(url_for("home"))
@@ -61,13 +66,15 @@ def signup():
             state=request.form.get("state"),
             zip_code=request.form.get("zip_code")
         )
-        user.password_hash = generate_password_hash(password)
-
         try:
+            user.set_password(password)
             db.session.add(user)
             db.session.commit()
             flash("Account created successfully! Please log in.", "success")
             return redirect(url_for("auth.signin"))
+        except HashingBusy:
+            flash("The server is busy. Please try again in a moment.", "danger")
+            return render_template("signup.html"), 503
         except Exception as e:
             db.session.rollback()
             logging.error(f"Signup Error: {e}")
@@ -79,6 +86,7 @@ def signup():
 # Sign In
 # -------------------------
 @auth_bp.route("/signin", methods=["GET", "POST"])
+@query_budget(2)
 def signin():
     if session.get("user_id"):
         return redirect(url_for("home"))
@@ -92,9 +100,22 @@ def signin():
             (User.email == username_or_email)
         ).first()
 
-        if user and check_password_hash(user.password_hash, password):
+        try:
+            valid = user is not None and user.check_password(password)
+        except HashingBusy:
+            flash("The server is busy. Please try again in a moment.", "danger")
+            return render_template("signin.html"), 503
+
+        if valid:
             session["user_id"] = user.id
             session["role"] = user.role
+            if db.session.is_modified(user):
+                # check_password upgraded a hash made with older parameters
+                try:
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Password rehash error: {e}")
             flash("Logged in successfully!", "success")
             return redirect(url_for("home"))
         else:
@@ -106,6 +127,7 @@ def signin():
 # Forgot Password
 # -------------------------
 @auth_bp.route("/forgot-password", methods=["GET", "POST"])
+@query_budget(5)
 def forgot_password():
     if request.method == "POST":
         email = request.form["email_or_phone"].strip()
@@ -127,10 +149,19 @@ def forgot_password():
 
     return render_template("forget_password.html")
 
+# -------------------------
+# Email outbox depth / delivery latency
+# -------------------------
+@auth_bp.route("/email-outbox/stats")
+@query_budget(1)
+def email_outbox_stats():
+    return jsonify(outbox_stats())
+
 # -------------------------
 # Verify OTP
 # -------------------------
 @auth_bp.route("/verify-otp", methods=["GET", "POST"])
+@query_budget(2)
 def verify_otp():
     if request.method == "POST":
         email = session.get("reset_email")
@@ -150,6 +181,7 @@ def verify_otp():
 # Reset Password
 # -------------------------
 @auth_bp.route("/reset-password", methods=["GET", "POST"])
+@query_budget(2)
 def reset_password():
     if request.method == "POST":
         if not session.get("otp_verified"):
@@ -171,13 +203,17 @@ def reset_password():
             return redirect(url_for("auth.forgot_password"))
 
         try:
-            user.password_hash = generate_password_hash(new_password)
+            user.set_password(new_password)
             db.session.commit()
+            forget_user(user_id)
             session.pop("reset_user_id", None)
             session.pop("reset_email", None)
             session.pop("otp_verified", None)
             flash("Password updated successfully! Please login.", "success")
             return redirect(url_for("auth.signin"))
+        except HashingBusy:
+            flash("The server is busy. Please try again in a moment.", "danger")
+            return render_template("reset_password.html"), 503
         except Exception as e:
             db.session.rollback()
             logging.error(f"Reset Password Error: {e}")
@@ -189,38 +225,47 @@ def reset_password():
 # Profile
 # -------------------------
 @auth_bp.route("/profile", methods=["GET", "POST"])
+@query_budget(2)
 @login_required
 def profile():
+    if request.method == "GET":
+        return render_template("profile.html", user=current_user())
+
     user = User.query.get(session["user_id"])
-    if request.method == "POST":
-        try:
-            user.first_name = request.form.get("first_name")
-            user.last_name = request.form.get("last_name")
-            user.job_title = request.form.get("job_title")
-            user.work_phone = request.form.get("work_phone")
-            user.company_name = request.form.get("company_name")
-            user.country = request.form.get("country")
-            user.address = request.form.get("address")
-            user.city = request.form.get("city")
-            user.state = request.form.get("state")
-            user.zip_code = request.form.get("zip_code")
-            db.session.commit()
-            flash("Profile updated successfully.", "success")
-        except Exception as e:
-            db.session.rollback()
-            logging.error(f"Profile Update Error: {e}")
-            flash("Failed to update profile. Try again.", "danger")
+    try:
+        user.first_name = request.form.get("first_name")
+        user.last_name = request.form.get("last_name")
+        user.job_title = request.form.get("job_title")
+        user.work_phone = request.form.get("work_phone")
+        user.company_name = request.form.get("company_name")
+        user.country = request.form.get("country")
+        user.address = request.form.get("address")
+        user.city = request.form.get("city")
+        user.state = request.form.get("state")
+        user.zip_code = request.form.get("zip_code")
+        # Keep the new values before commit expires them (saves a reload)
+        updated = remember_user(user)
+        db.session.commit()
+        user = updated
+        flash("Profile updated successfully.", "success")
+    except Exception as e:
+        db.session.rollback()
+        forget_user(session["user_id"])
+        logging.error(f"Profile Update Error: {e}")
+        flash("Failed to update profile. Try again.", "danger")
 
     return render_template("profile.html", user=user)
 
 # Delete user account
 @auth_bp.route("/delete-account", methods=["POST"])
+@query_budget(2)
 @login_required
 def delete_account():
     user = User.query.get(session["user_id"])
     try:
         db.session.delete(user)
         db.session.commit()
+        forget_user(user.id)
         session.clear()
         flash("Your account has been deleted.", "info")
         return redirect(url_for("auth.auth_home"))
@@ -230,10 +275,17 @@ def delete_account():
         flash("Failed to delete account. Try again.", "danger")
         return redirect(url_for("auth.profile"))
 
+# This worker's User cache counters (see utils/session_manager.py)
+@auth_bp.route("/user-cache/stats")
+@query_budget(0)
+def user_cache_stats_view():
+    return jsonify(user_cache_stats())
+
 # -------------------------
 # Logout
 # -------------------------
 @auth_bp.route("/logout")
+@query_budget(0)
 @login_required
 def logout():
     session.clear()
@@ -1,34 +1,261 @@
-from flask import Blueprint, request, render_template, redirect, url_for, flash
+from flask import Blueprint, request, render_template, redirect, url_for, flash, current_app, jsonify, abort
 from models.postgres_models import db, Employee, ProfessionalInfo
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager
+from utils.pagination import keyset_paginate, clamp_page_size
+from utils.employee_search import search_filter, search_rank
+from utils.query_stats import query_budget
+from utils.cache import invalidate, ANALYTICS_CACHE_NAMESPACE, EMPLOYEE_360_CACHE_NAMESPACE
+from utils.pdf import pdf_file_response, PdfRenderError, WkhtmltopdfMissing
+from utils.pdf_cache import cached_report
+from utils.pdf_chunked import render_rows_pdf
+from utils.analytics_refresh import get_refresh_state
+from utils.report_jobs import report_builder
+from utils.export import export_response, EXPORT_MIMETYPES
+from utils.employee_import import import_employees, ImportFailed
+from utils.employee_360 import (
+    employee_360_page, sql_projection, mongo_projection, field_value, ProjectionError
+)
+import io
 from datetime import datetime
-import pdfkit
-import shutil
 
 employee_bp = Blueprint("employee", __name__, url_prefix="/employees")
 
 
 # Employee home menu
 @employee_bp.route("/home")
+@query_budget(0)
 def employee_home():
     return render_template("employee_home.html")
 
 
-# Original list (unchanged for safety)
+# Sortable columns for the list page (all NOT NULL so keyset cursors are total).
+# "relevance" is also accepted when searching.
+SORT_COLUMNS = {
+    "emp_id": Employee.emp_id,
+    "first_name": Employee.first_name,
+    "last_name": Employee.last_name,
+}
+
+
+def _apply_filters(query, filters):
+    """Apply search/filter parameters to a query joined to professional_info."""
+    search_query = filters.get("q")
+    if search_query:
+        query = query.filter(search_filter(search_query))
+    if filters.get("gender"):
+        query = query.filter(Employee.gender == filters["gender"])
+    if filters.get("department"):
+        query = query.filter(ProfessionalInfo.department == filters["department"])
+    return query
+
+
+def _filtered_employee_query(filters):
+    """Build the employee query for the given search/filter parameters."""
+    # Load professional info from the same join so the Professional tab
+    # does not issue one extra SELECT per employee.
+    query = Employee.query.outerjoin(Employee.professional).options(contains_eager(Employee.professional))
+    return _apply_filters(query, filters)
+
+
+def search_employees_query(search_query):
+    """All employees matching a search, best matches first (used by exports)."""
+    query = _filtered_employee_query({"q": search_query})
+    if search_query:
+        return query.order_by(search_rank(search_query).desc(), Employee.emp_id)
+    return query.order_by(Employee.emp_id)
+
+
+def _paginated_employees():
+    """
+    Read list parameters from the query string and return (page, filters).
+    When searching, results default to relevance order and each item's rank
+    is available in page.ranks (emp_id -> score).
+    """
+    search_query = request.args.get("q", "").strip()
+    filters = {
+        "q": search_query,
+        "gender": request.args.get("gender", "").strip(),
+        "department": request.args.get("department", "").strip(),
+        "sort": request.args.get("sort", "relevance" if search_query else "emp_id"),
+        "dir": request.args.get("dir", "desc" if search_query and not request.args.get("sort") else "asc"),
+    }
+    if filters["sort"] not in SORT_COLUMNS and not (filters["sort"] == "relevance" and search_query):
+        filters["sort"] = "emp_id"
+    if filters["dir"] not in ("asc", "desc"):
+        filters["dir"] = "asc"
+
+    per_page = clamp_page_size(
+        request.args.get("per_page", type=int),
+        current_app.config["EMPLOYEE_PAGE_SIZE"],
+        current_app.config["EMPLOYEE_MAX_PAGE_SIZE"]
+    )
+    filters["per_page"] = per_page
+
+    query = _filtered_employee_query(filters)
+    if filters["sort"] == "relevance":
+        rank = search_rank(search_query)
+        page = keyset_paginate(
+            query.add_columns(rank.label("search_rank")),
+            sort_column=rank,
+            sort_attr=lambda row: row.search_rank,
+            key_column=Employee.emp_id,
+            key_attr=lambda row: row.Employee.emp_id,
+            per_page=per_page,
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+            descending=filters["dir"] == "desc"
+        )
+        page.ranks = {row.Employee.emp_id: row.search_rank for row in page.items}
+        page.items = [row.Employee for row in page.items]
+    else:
+        page = keyset_paginate(
+            query,
+            sort_column=SORT_COLUMNS[filters["sort"]],
+            sort_attr=filters["sort"],
+            key_column=Employee.emp_id,
+            key_attr="emp_id",
+            per_page=per_page,
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+            descending=filters["dir"] == "desc"
+        )
+        page.ranks = {}
+    return page, filters
+
+
+# Employee list: keyset-paginated, filtered and sorted on the server
 @employee_bp.route("/")
+@query_budget(1)
 def list_employees():
-    employees = Employee.query.all()
-    return render_template("employee_list.html", employees=employees)
+    page, filters = _paginated_employees()
+    return render_template(
+        "employee_list.html",
+        employees=page.items,
+        page=page,
+        filters=filters,
+        list_endpoint="employee.list_employees"
+    )
 
 
-# NEW: Tabbed View for General + Professional Info
+# Tabbed View for General + Professional Info (same paginated query)
 @employee_bp.route("/tabbed")
+@query_budget(1)
 def list_employees_tabbed():
-    employees = Employee.query.outerjoin(ProfessionalInfo).all()
-    return render_template("employee_tabbed.html", employees=employees)
+    page, filters = _paginated_employees()
+    return render_template(
+        "employee_list.html",
+        employees=page.items,
+        page=page,
+        filters=filters,
+        list_endpoint="employee.list_employees_tabbed"
+    )
+
+
+# JSON search API: ranked, keyset-paginated (same query as the list page)
+@employee_bp.route("/search")
+@query_budget(1)
+def search_employees():
+    page, filters = _paginated_employees()
+    return jsonify({
+        "query": filters["q"],
+        "results": [
+            {
+                "emp_id": emp.emp_id,
+                "full_name": emp.full_name,
+                "email": emp.email,
+                "phone": emp.phone,
+                "department": emp.professional.department if emp.professional else None,
+                "designation": emp.professional.designation if emp.professional else None,
+                "rank": page.ranks.get(emp.emp_id),
+            }
+            for emp in page.items
+        ],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+        "per_page": page.per_page,
+    })
+
+
+def _employee_360_request():
+    """
+    Read 360 parameters from the query string and return (page, filters).
+    ?fields= and ?personnel_fields= narrow the configured projections.
+    Raises ProjectionError for fields outside them.
+    """
+    filters = {
+        "q": request.args.get("q", "").strip(),
+        "gender": request.args.get("gender", "").strip(),
+        "department": request.args.get("department", "").strip(),
+        "per_page": clamp_page_size(
+            request.args.get("per_page", type=int),
+            current_app.config["EMPLOYEE_PAGE_SIZE"],
+            current_app.config["EMPLOYEE_MAX_PAGE_SIZE"]
+        ),
+    }
+    sql_fields = sql_projection(request.args.get("fields"))
+    mongo_fields = mongo_projection(request.args.get("personnel_fields"))
+    query = _apply_filters(Employee.query.outerjoin(Employee.professional), filters)
+    page = employee_360_page(
+        query, filters, filters["per_page"],
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+        sql_fields=sql_fields,
+        mongo_fields=mongo_fields
+    )
+    return page, filters
+
+
+# Employee 360: general + professional info joined with the Mongo personnel
+# record, one SQL and one Mongo query per page (cached)
+@employee_bp.route("/360")
+@query_budget(1)
+def employee_360():
+    try:
+        page, filters = _employee_360_request()
+    except ProjectionError as e:
+        abort(400, description=str(e))
+    return render_template("employee_360.html", page=page, filters=filters, field_value=field_value)
+
+
+@employee_bp.route("/360/api")
+@query_budget(1)
+def employee_360_api():
+    try:
+        page, filters = _employee_360_request()
+    except ProjectionError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "results": page["items"],
+        "next_cursor": page["next_cursor"],
+        "prev_cursor": page["prev_cursor"],
+        "per_page": page["per_page"],
+        "fields": page["sql_fields"],
+        "personnel_fields": page["mongo_fields"],
+    })
+
+
+# One employee's combined profile
+@employee_bp.route("/<int:emp_id>/360")
+@query_budget(1)
+def employee_360_profile(emp_id):
+    try:
+        page = employee_360_page(
+            Employee.query.outerjoin(Employee.professional).filter(Employee.emp_id == emp_id),
+            {"emp_id": emp_id}, 1,
+            sql_fields=sql_projection(request.args.get("fields")),
+            mongo_fields=mongo_projection(request.args.get("personnel_fields"))
+        )
+    except ProjectionError as e:
+        return jsonify({"error": str(e)}), 400
+    if not page["items"]:
+        return jsonify({"error": f"Employee {emp_id} not found."}), 404
+    return jsonify(page["items"][0])
 
 
 # Add basic general info
 @employee_bp.route("/new", methods=["GET", "POST"])
+@query_budget(1)
 def add_employee():
     if request.method == "POST":
         new_emp = Employee(
@@ -42,6 +269,8 @@ def add_employee():
         )
         db.session.add(new_emp)
         db.session.commit()
+        invalidate(ANALYTICS_CACHE_NAMESPACE)
+        invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
         flash("Employee general info added successfully.")
         return redirect(url_for("employee.list_employees"))
     return render_template("employee_form.html")
@@ -49,6 +278,7 @@ def add_employee():
 
 # Add professional info
 @employee_bp.route("/professional", methods=["GET", "POST"])
+@query_budget(2)
 def add_professional_info():
     if request.method == "POST":
         emp_id = int(request.form["emp_id"])
@@ -68,6 +298,8 @@ def add_professional_info():
         )
         db.session.add(prof)
         db.session.commit()
+        invalidate(ANALYTICS_CACHE_NAMESPACE)
+        invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
         flash("Professional info added successfully.")
         return redirect(url_for("employee.list_employees"))
 
@@ -75,8 +307,31 @@ def add_professional_info():
     return render_template("professional_form.html", emp_id=emp_id)
 
 
+# Bulk import employees (+ professional info) from an uploaded CSV
+# (see utils/employee_import.py for the columns; also `flask import-employees`)
+@employee_bp.route("/import", methods=["POST"])
+@query_budget(6)
+def import_employees_csv():
+    upload = request.files.get("file")
+    if not upload:
+        return jsonify({"error": "Upload a CSV file in the 'file' field."}), 400
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+    try:
+        result = import_employees(
+            stream,
+            dry_run=request.form.get("dry_run") in ("1", "true", "on"),
+            strict=request.form.get("strict") in ("1", "true", "on")
+        )
+    except ImportFailed as e:
+        return jsonify({"error": str(e), **(e.result or {})}), 422
+    except UnicodeDecodeError:
+        return jsonify({"error": "CSV must be UTF-8 encoded."}), 400
+    return jsonify(result), 200
+
+
 # Edit general info
 @employee_bp.route("/edit/<int:emp_id>", methods=["GET", "POST"])
+@query_budget(2)
 def edit_employee(emp_id):
     emp = Employee.query.get_or_404(emp_id)
     if request.method == "POST":
@@ -88,6 +343,8 @@ def edit_employee(emp_id):
         emp.phone = request.form["phone"]
         emp.hire_date = datetime.strptime(request.form["hire_date"], "%Y-%m-%d")
         db.session.commit()
+        invalidate(ANALYTICS_CACHE_NAMESPACE)
+        invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
         flash("Employee general info updated.")
         return redirect(url_for("employee.list_employees"))
     return render_template("employee_form.html", employee=emp)
@@ -95,6 +352,7 @@ def edit_employee(emp_id):
 
 # Edit professional info
 @employee_bp.route("/edit/professional/<int:emp_id>", methods=["GET", "POST"])
+@query_budget(2)
 def edit_professional(emp_id):
     prof = ProfessionalInfo.query.filter_by(emp_id=emp_id).first()
     if not prof:
@@ -110,6 +368,8 @@ def edit_professional(emp_id):
         prof.skills = [s.strip() for s in request.form["skills"].split(",") if s.strip()]
         prof.performance_rating = float(request.form["performance_rating"])
         db.session.commit()
+        invalidate(ANALYTICS_CACHE_NAMESPACE)
+        invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
         flash("Professional info updated.")
         return redirect(url_for("employee.list_employees"))
 
@@ -118,52 +378,98 @@ def edit_professional(emp_id):
 
 # Delete employee + professional info
 @employee_bp.route("/delete/<int:emp_id>", methods=["POST"])
+@query_budget(4)
 def delete_employee(emp_id):
     emp = Employee.query.get_or_404(emp_id)
     db.session.delete(emp)
     db.session.commit()
+    invalidate(ANALYTICS_CACHE_NAMESPACE)
+    invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
     flash("Employee and related professional info deleted.")
     return redirect(url_for("employee.list_employees"))
 
 
-# PDF download feature for employee list (with search)
-@employee_bp.route("/download", methods=["POST"])
-def download_employee_report():
-    search_query = request.form.get("search", "").strip()
-    company_name = request.form.get("company_name", "").strip() or "Unknown Company"
-    company_details = request.form.get("company_details", "").strip() or ""
-    if search_query:
-        employees = Employee.query.filter(
-            (Employee.first_name.ilike(f"%{search_query}%")) |
-            (Employee.last_name.ilike(f"%{search_query}%")) |
-            (Employee.email.ilike(f"%{search_query}%")) |
-            (Employee.phone.ilike(f"%{search_query}%"))
-        ).all()
+# Flat column set for CSV / NDJSON exports (employee + professional info)
+EXPORT_COLUMNS = [
+    Employee.emp_id, Employee.first_name, Employee.last_name, Employee.dob,
+    Employee.gender, Employee.email, Employee.phone, Employee.hire_date,
+    ProfessionalInfo.designation, ProfessionalInfo.department,
+    ProfessionalInfo.current_salary, ProfessionalInfo.previous_salary,
+    ProfessionalInfo.last_increment, ProfessionalInfo.skills,
+    ProfessionalInfo.performance_rating,
+]
+
+
+# Streaming export of the filtered employee list (CSV or NDJSON).
+# No @query_budget: the query runs while the body streams, after the
+# budget has been checked and the X-DB-* headers written.
+@employee_bp.route("/export/<fmt>")
+def export_employees(fmt):
+    if fmt not in EXPORT_MIMETYPES:
+        abort(404)
+    filters = {
+        "q": request.args.get("q", "").strip(),
+        "gender": request.args.get("gender", "").strip(),
+        "department": request.args.get("department", "").strip(),
+    }
+    stmt = _apply_filters(
+        select(*EXPORT_COLUMNS).select_from(Employee).outerjoin(Employee.professional),
+        filters
+    )
+    if filters["q"]:
+        stmt = stmt.order_by(search_rank(filters["q"]).desc(), Employee.emp_id)
     else:
-        employees = Employee.query.all()
+        stmt = stmt.order_by(Employee.emp_id)
+    # yield_per streams through a server-side cursor, EXPORT_BATCH_SIZE rows at a time
+    stmt = stmt.execution_options(yield_per=current_app.config["EXPORT_BATCH_SIZE"])
+
+    def open_rows():
+        return db.session.execute(stmt).mappings()
+
+    fields = [c.key for c in EXPORT_COLUMNS]
+    return export_response(fmt, fields, open_rows, f"employees_{datetime.now().strftime('%Y%m%d')}")
+
+
+# Employee report (shared by the inline download and the report job queue)
+@report_builder("employee")
+def build_employee_report(params):
+    search_query = params.get("search", "").strip()
+    company_name = params.get("company_name", "").strip() or "Unknown Company"
+    company_details = params.get("company_details", "").strip() or ""
+    generated_on = datetime.now().strftime("%Y-%m-%d")
 
-    html = render_template(
+    def render():
+        employees = search_employees_query(search_query).all()
+        return render_rows_pdf("employee_report.html", "employees", employees, {
+            "company_name": company_name,
+            "company_details": company_details,
+            "generated_on": generated_on,
+            "generated_time": datetime.now().strftime("%H:%M:%S")
+        })
+
+    # change_count grows with every write to employee / professional_info
+    # (trg_analytics_dirty), so a cached PDF is reused only over unchanged
+    # data; the date is part of the key because the report prints it
+    state = get_refresh_state()
+    pdf = cached_report(
         "employee_report.html",
-        employees=employees,
-        company_name=company_name,
-        company_details=company_details,
-        generated_on=datetime.now().strftime("%Y-%m-%d"),
-        generated_time=datetime.now().strftime("%H:%M:%S")
+        {"search": search_query, "company_name": company_name, "company_details": company_details,
+         "generated_on": generated_on},
+        state["change_count"] if state else None,
+        render
     )
+    filename = f"Employee_Report_{datetime.now().strftime('%Y%m%d')}.pdf"
+    return pdf, filename
 
-    wkhtmltopdf_path = shutil.which("wkhtmltopdf")
-    if not wkhtmltopdf_path:
-        return "wkhtmltopdf not found in container", 500
-    config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path)
 
+# PDF download feature for employee list (with search)
+@employee_bp.route("/download", methods=["POST"])
+@query_budget(2)
+def download_employee_report():
     try:
-        pdf = pdfkit.from_string(html, False, configuration=config)
-    except Exception as e:
+        pdf, filename = build_employee_report(request.form)
+    except WkhtmltopdfMissing as e:
+        return str(e), 500
+    except PdfRenderError as e:
         return f"Failed to generate PDF: {e}", 500
-
-    from flask import make_response
-    response = make_response(pdf)
-    response.headers["Content-Type"] = "application/pdf"
-    filename = f"Employee_Report_{datetime.now().strftime('%Y%m%d')}.pdf"
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    return response
+    return pdf_file_response(pdf, filename)
@@ -1,9 +1,17 @@
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for
+from flask import Blueprint, request, jsonify, render_template, redirect, url_for, abort, current_app
 from bson.objectid import ObjectId
-from app import mongo
-import pdfkit
-import shutil
-from flask import make_response
+from pymongo.errors import DuplicateKeyError
+from models.mongo_models import mongo, clear_collection_cache
+from utils.pdf import pdf_file_response, PdfRenderError, WkhtmltopdfMissing
+from utils.pdf_cache import cached_report
+from utils.pdf_chunked import render_rows_pdf
+from utils.report_jobs import report_builder
+from utils.export import export_response, EXPORT_MIMETYPES
+from utils.personnel_loader import load_personnel, load_id_for
+from utils.cache import invalidate, generation, EMPLOYEE_360_CACHE_NAMESPACE, MONGO_ANALYTICS_CACHE_NAMESPACE
+import io
+import re
+import json
 from datetime import datetime
 
 mongo_bp = Blueprint('mongo', __name__, url_prefix='/personnel')
@@ -60,7 +68,12 @@ def add_personnel():
                     "age": int(dep_age)
                 })
 
-        mongo.db.employees_info.insert_one(data)
+        try:
+            mongo.db.employees_info.insert_one(data)
+        except DuplicateKeyError:
+            return "Employee ID already exists", 409
+        invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
+        invalidate(MONGO_ANALYTICS_CACHE_NAMESPACE)
         return redirect(url_for('mongo.list_personnel'))
 
     return render_template('personnel_form.html', action="Add", data={})
@@ -117,7 +130,12 @@ def update_personnel(id):
                     "age": int(dep_age)
                 })
 
-        mongo.db.employees_info.update_one({"_id": obj_id}, {"$set": updated})
+        try:
+            mongo.db.employees_info.update_one({"_id": obj_id}, {"$set": updated})
+        except DuplicateKeyError:
+            return "Employee ID already exists", 409
+        invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
+        invalidate(MONGO_ANALYTICS_CACHE_NAMESPACE)
         return redirect(url_for('mongo.list_personnel'))
 
     return render_template('personnel_form.html', action="Update", data=existing)
@@ -128,6 +146,8 @@ def delete_personnel(id):
         mongo.db.employees_info.delete_one({"_id": ObjectId(id)})
     except Exception:
         return "Invalid ID", 400
+    invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
+    invalidate(MONGO_ANALYTICS_CACHE_NAMESPACE)
     return redirect(url_for('mongo.list_personnel'))
 
 @mongo_bp.route('/<id>', methods=['GET'])
@@ -176,50 +196,125 @@ def add_qualification():
             "experiences": experiences
         }
         mongo.db.qualifications.insert_one(data)
+        clear_collection_cache()
+        invalidate(MONGO_ANALYTICS_CACHE_NAMESPACE)
         return redirect(url_for('mongo.list_personnel'))
 
     return render_template("qualification.html")
 
 
-# PDF download feature for personnel info (with search)
-@mongo_bp.route('/download', methods=['POST'])
-def download_personnel_report():
-    search_query = request.form.get("search", "").strip()
-    company_name = request.form.get("company_name", "").strip() or "Unknown Company"
-    company_details = request.form.get("company_details", "").strip() or ""
-    query = {}
-    if search_query:
-        query["$or"] = [
-            {"name": {"$regex": search_query, "$options": "i"}},
-            {"employee_id": {"$regex": search_query, "$options": "i"}},
-            {"aadhaar": {"$regex": search_query, "$options": "i"}},
-            {"pan": {"$regex": search_query, "$options": "i"}},
-            {"contact.email": {"$regex": search_query, "$options": "i"}},
-            {"contact.phone": {"$regex": search_query, "$options": "i"}}
-        ]
-    personnel = list(mongo.db.employees_info.find(query))
-
-    html = render_template(
+def search_personnel(search_query):
+    """
+    Find personnel matching a search string using the tx_personnel_search text
+    index (plus an anchored employee_id prefix match, which the unique
+    employee_id index serves), ranked by relevance.
+    """
+    if not search_query:
+        return mongo.db.employees_info.find()
+    query = {"$or": [
+        {"$text": {"$search": search_query}},
+        {"employee_id": {"$regex": f"^{re.escape(search_query.upper())}"}}
+    ]}
+    return mongo.db.employees_info.find(
+        query, {"score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"})])
+
+
+# Bulk load personnel from an uploaded JSON array / NDJSON file. Re-uploading
+# the same file resumes an interrupted load (see utils/personnel_loader.py).
+@mongo_bp.route('/import', methods=['POST'])
+def import_personnel():
+    upload = request.files.get("file")
+    if not upload:
+        return jsonify({"error": "Upload a JSON or NDJSON file in the 'file' field."}), 400
+    load_id = load_id_for(upload.stream)
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig")
+    try:
+        result = load_personnel(
+            mongo.db, stream, load_id,
+            batch_size=request.form.get("batch_size", type=int) or current_app.config["PERSONNEL_LOAD_BATCH_SIZE"],
+            restart=request.form.get("restart") in ("1", "true", "on")
+        )
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return jsonify({"error": f"Could not parse file: {e}", "load_id": load_id}), 400
+    finally:
+        # Batches written before a parse error are visible too
+        invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
+        invalidate(MONGO_ANALYTICS_CACHE_NAMESPACE)
+    return jsonify(result), 200
+
+
+# Flat column set for CSV exports (NDJSON exports carry the whole document)
+PERSONNEL_EXPORT_FIELDS = [
+    "employee_id", "name", "aadhaar", "pan", "dob", "gender", "blood_group",
+    "residence.address", "residence.city", "residence.state", "residence.zip",
+    "contact.phone", "contact.email",
+    "emergency_contact.name", "emergency_contact.phone",
+    "family.marital_status", "family.no_of_dependents", "family.dependents",
+]
+
+
+# Streaming export of personnel (CSV or NDJSON), optionally filtered by search
+@mongo_bp.route('/export/<fmt>')
+def export_personnel(fmt):
+    if fmt not in EXPORT_MIMETYPES:
+        abort(404)
+    search_query = request.args.get("search", "").strip()
+    batch_size = current_app.config["EXPORT_BATCH_SIZE"]
+
+    def open_rows():
+        # Batched cursor: documents are fetched EXPORT_BATCH_SIZE at a time
+        cursor = search_personnel(search_query).batch_size(batch_size)
+        try:
+            for doc in cursor:
+                doc.pop("score", None)
+                yield doc
+        finally:
+            cursor.close()
+
+    fields = PERSONNEL_EXPORT_FIELDS if fmt == "csv" else None
+    return export_response(fmt, fields, open_rows, f"personnel_{datetime.now().strftime('%Y%m%d')}")
+
+
+# Personnel report (shared by the inline download and the report job queue)
+@report_builder("personnel")
+def build_personnel_report(params):
+    search_query = params.get("search", "").strip()
+    company_name = params.get("company_name", "").strip() or "Unknown Company"
+    company_details = params.get("company_details", "").strip() or ""
+    generated_on = datetime.now().strftime("%Y-%m-%d")
+
+    def render():
+        personnel = list(search_personnel(search_query))
+        return render_rows_pdf("personnel_report.html", "personnel", personnel, {
+            "company_name": company_name,
+            "company_details": company_details,
+            "generated_on": generated_on,
+            "generated_time": datetime.now().strftime("%H:%M:%S")
+        })
+
+    # Every personnel write invalidates the personnel analytics namespace, so
+    # its generation versions the data without reading it. The date is part
+    # of the key because the report prints it.
+    pdf = cached_report(
         "personnel_report.html",
-        personnel=personnel,
-        company_name=company_name,
-        company_details=company_details,
-        generated_on=datetime.now().strftime("%Y-%m-%d"),
-        generated_time=datetime.now().strftime("%H:%M:%S")
+        {"search": search_query, "company_name": company_name, "company_details": company_details,
+         "generated_on": generated_on},
+        generation(MONGO_ANALYTICS_CACHE_NAMESPACE),
+        render
     )
+    filename = f"Personnel_Report_{datetime.now().strftime('%Y%m%d')}.pdf"
+    return pdf, filename
 
-    wkhtmltopdf_path = shutil.which("wkhtmltopdf")
-    if not wkhtmltopdf_path:
-        return "wkhtmltopdf not found in container", 500
-    config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path)
 
+# PDF download feature for personnel info (with search)
+@mongo_bp.route('/download', methods=['POST'])
+def download_personnel_report():
     try:
-        pdf = pdfkit.from_string(html, False, configuration=config)
-    except Exception as e:
+        pdf, filename = build_personnel_report(request.form)
+    except WkhtmltopdfMissing as e:
+        return str(e), 500
+    except PdfRenderError as e:
         return f"Failed to generate PDF: {e}", 500
 
-    response = make_response(pdf)
-    response.headers["Content-Type"] = "application/pdf"
-    filename = f"Personnel_Report_{datetime.now().strftime('%Y%m%d')}.pdf"
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    return response
+    return pdf_file_response(pdf, filename)
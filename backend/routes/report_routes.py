@@ -0,0 +1,81 @@
+from flask import Blueprint, request, render_template, redirect, url_for, jsonify, current_app, abort
+from utils.report_jobs import enqueue_report, get_job, QueueFull, REPORT_BUILDERS
+from utils.pdf import pdf_response
+from utils.pdf_cache import pdf_cache_stats
+from utils.query_stats import query_budget
+
+report_bp = Blueprint("reports", __name__, url_prefix="/reports")
+
+
+def _wants_json():
+    return request.args.get("format") == "json" or (
+        request.accept_mimetypes.best == "application/json"
+    )
+
+
+def _job_json(job):
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "error": job.error,
+        "filename": job.filename,
+        "size": job.result_size,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "expires_at": job.expires_at.isoformat() if job.expires_at else None,
+        "status_url": url_for("reports.job_status", job_id=job.id),
+        "download_url": url_for("reports.download_job", job_id=job.id) if job.status == "done" else None,
+    }
+
+
+# Queue a report: returns 202 + job id (JSON) or redirects to the status page
+@report_bp.route("/<kind>", methods=["POST"])
+@query_budget(2)
+def create_report(kind):
+    if kind not in REPORT_BUILDERS:
+        abort(404)
+    params = {k: v for k, v in request.form.items()}
+    try:
+        job_id = enqueue_report(kind, params, current_app.config)
+    except QueueFull:
+        if _wants_json():
+            return jsonify({"error": "Report queue is full, try again shortly."}), 503
+        return "Report queue is full, try again shortly.", 503
+
+    if _wants_json():
+        return jsonify(_job_json(get_job(job_id))), 202
+    return redirect(url_for("reports.job_status", job_id=job_id), code=303)
+
+
+# Job status (JSON for polling, HTML page for browsers)
+@report_bp.route("/jobs/<job_id>")
+@query_budget(1)
+def job_status(job_id):
+    job = get_job(job_id)
+    if not job:
+        if _wants_json():
+            return jsonify({"error": "Job not found or expired"}), 404
+        abort(404)
+    if _wants_json():
+        return jsonify(_job_json(job))
+    return render_template("report_status.html", job=job)
+
+
+# Download a finished report
+@report_bp.route("/jobs/<job_id>/download")
+@query_budget(2)
+def download_job(job_id):
+    job = get_job(job_id)
+    if not job:
+        abort(404)
+    if job.status != "done":
+        return jsonify(_job_json(job)), 409
+    return pdf_response(job.result, job.filename)
+
+
+# Rendered-PDF cache counters and disk usage
+@report_bp.route("/cache-stats")
+@query_budget(0)
+def report_cache_stats():
+    return jsonify(pdf_cache_stats())
@@ -0,0 +1,111 @@
+"""
+Fixtures for the route tests.
+
+The tests run against a real Postgres database named by TEST_DATABASE_URI,
+initialised with the db_init scripts (`make test` creates and loads one);
+without it every test that needs the app is skipped. Mongo is never touched and no background
+service is started.
+"""
+import os
+import uuid
+import tempfile
+import pytest
+
+TEST_DATABASE_URI = os.getenv("TEST_DATABASE_URI")
+
+if TEST_DATABASE_URI:
+    # Config reads the environment at import time, so set it before importing the app
+    _scratch = tempfile.mkdtemp(prefix="hrms_tests_")
+    os.environ.update({
+        "SQLALCHEMY_DATABASE_URI": TEST_DATABASE_URI,
+        "CACHE_DIR": os.path.join(_scratch, "cache"),
+        "PDF_CACHE_DIR": os.path.join(_scratch, "pdf_cache"),
+        "PASSWORD_HASH_SLOT_DIR": os.path.join(_scratch, "hash_slots"),
+        "LIVE_ANALYTICS_SLOT_DIR": os.path.join(_scratch, "live_slots"),
+        "EMAIL_TRANSPORT": "log",
+        "CHANGE_FEED_ENABLED": "false",
+        "REPORT_WORKER_THREADS": "0",
+        "EMAIL_SENDER_THREADS": "0",
+        "METRICS_ENABLED": "false",
+        "MONGO_ENSURE_INDEXES_ON_STARTUP": "false",
+    })
+
+
+def pytest_collection_modifyitems(config, items):
+    if TEST_DATABASE_URI:
+        return
+    skip = pytest.mark.skip(reason="TEST_DATABASE_URI is not set (see `make test`)")
+    for item in items:
+        if "app" in getattr(item, "fixturenames", ()):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import create_app
+    from models.postgres_models import db
+
+    app = create_app()
+    app.config["TESTING"] = True
+    # The tests drive the app directly; no listener, refresher or worker threads
+    app.extensions["background_services"] = True
+    with app.app_context():
+        # Tables the db_init scripts don't cover (accounts, audit_log)
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def account(app):
+    """A signed-up user: yields (username, email, password) and removes it afterwards."""
+    from models.postgres_models import db
+    from models.user import User
+
+    suffix = uuid.uuid4().hex[:8]
+    username, email, password = f"budget_{suffix}", f"budget_{suffix}@example.com", "Secret123!"
+    with app.app_context():
+        user = User(username=username, email=email, role="editor")
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+    yield username, email, password
+    with app.app_context():
+        User.query.filter_by(username=username).delete()
+        db.session.commit()
+
+
+@pytest.fixture
+def signed_in(client, account):
+    username, _, password = account
+    client.post("/auth/signin", data={"username_or_email": username, "password": password})
+    return client
+
+
+@pytest.fixture
+def employee_id(app):
+    """An employee with professional info, deleted afterwards."""
+    from models.postgres_models import db, Employee, ProfessionalInfo
+
+    with app.app_context():
+        emp = Employee(first_name="Budget", last_name="Tester", gender="Female",
+                       email="budget.tester@example.com", phone="5550100")
+        db.session.add(emp)
+        db.session.flush()
+        db.session.add(ProfessionalInfo(
+            emp_id=emp.emp_id, designation="Analyst", department="Finance",
+            current_salary=50000, previous_salary=45000, last_increment=5000,
+            skills=["SQL"], performance_rating=4.0
+        ))
+        db.session.commit()
+        emp_id = emp.emp_id
+    yield emp_id
+    with app.app_context():
+        emp = db.session.get(Employee, emp_id)
+        if emp is not None:
+            db.session.delete(emp)
+            db.session.commit()
@@ -0,0 +1,71 @@
+import io
+from datetime import date
+from decimal import Decimal
+import pytest
+from utils.employee_import import validate_row, parse_csv, ImportFailed
+
+
+def test_validate_row_normalises_values():
+    row, errors = validate_row({
+        "emp_id": "12", "first_name": " Asha ", "last_name": "Rao", "gender": "female",
+        "dob": "1990-04-01", "email": "asha@example.com", "current_salary": "50000.50",
+        "skills": "SQL; Python, ", "performance_rating": "4.5",
+    })
+    assert errors == []
+    assert row["emp_id"] == 12
+    assert row["first_name"] == "Asha"
+    assert row["gender"] == "Female"
+    assert row["dob"] == date(1990, 4, 1)
+    assert row["current_salary"] == Decimal("50000.50")
+    assert row["skills"] == ["SQL", "Python"]
+    assert row["performance_rating"] == 4.5
+    assert row["has_professional"] is True
+
+
+def test_validate_row_blank_cells_stay_empty():
+    # Blank cells must not become values that overwrite stored data on update
+    row, errors = validate_row({"first_name": "Asha", "last_name": "Rao", "hire_date": "", "skills": ""})
+    assert errors == []
+    assert row["emp_id"] is None
+    assert row["hire_date"] is None
+    assert row["skills"] is None
+    assert row["has_professional"] is False
+
+
+def test_validate_row_reports_every_problem():
+    row, errors = validate_row({
+        "emp_id": "-3", "first_name": "", "last_name": "Rao", "gender": "robot",
+        "email": "not-an-address", "dob": "31/12/1990", "current_salary": "lots",
+        "performance_rating": "good",
+    })
+    assert len(errors) == 7
+    assert any("emp_id" in e for e in errors)
+    assert any("first_name" in e for e in errors)
+    assert any("gender" in e for e in errors)
+
+
+def test_parse_csv_counts_valid_rows_and_reports_errors():
+    stream = io.StringIO(
+        "emp_id,first_name,last_name,department\n"
+        "1,Asha,Rao,Finance\n"
+        "2,,Mehta,Finance\n"
+        "1,Ravi,Kumar,\n"
+        ",Neha,Shah,\n"
+    )
+    buf, valid, errors, error_count = parse_csv(stream)
+    assert valid == 2
+    assert error_count == 2
+    assert [e["line"] for e in errors] == [3, 4]
+    assert "duplicate emp_id (also on line 2)" in errors[1]["errors"]
+    lines = buf.getvalue().splitlines()
+    assert len(lines) == 2
+    assert lines[0].startswith("2,1,Asha,Rao")
+
+
+@pytest.mark.parametrize("header, message", [
+    ("emp_id,last_name\n", "missing required column"),
+    ("first_name,last_name,salary\n", "unknown column"),
+])
+def test_parse_csv_rejects_bad_headers(header, message):
+    with pytest.raises(ImportFailed, match=message):
+        parse_csv(io.StringIO(header))
@@ -0,0 +1,87 @@
+from flask import Flask
+import pytest
+from utils.live_analytics import LiveFeed, _acquire_slot
+
+
+class Source:
+    """Data for a feed plus a log of which sections were rendered."""
+
+    def __init__(self, data):
+        self.data = data
+        self.rendered = []
+
+    def load(self):
+        return dict(self.data)
+
+    def render(self, section, value):
+        self.rendered.append(section)
+        return f"<p>{section}={value}</p>"
+
+
+@pytest.fixture
+def source():
+    return Source({"a": 1, "b": 2})
+
+
+@pytest.fixture
+def feed(source):
+    return LiveFeed("test", source.load, source.render, "LIVE_TEST_INTERVAL")
+
+
+def test_publish_renders_only_changed_sections(feed, source):
+    feed._publish(source.load())
+    assert feed.changes_since(None) == (1, {"a": "<p>a=1</p>", "b": "<p>b=2</p>"})
+
+    source.data["b"] = 3
+    source.rendered.clear()
+    feed._publish(source.load())
+    assert source.rendered == ["b"]
+    assert feed.changes_since(1) == (2, {"b": "<p>b=3</p>"})
+
+
+def test_unchanged_data_does_not_move_the_version(feed, source):
+    feed._publish(source.load())
+    feed._publish(source.load())
+    assert feed.version == 1
+
+
+def test_resume_version(feed, source):
+    feed._publish(source.load())
+    assert feed.resume_version(feed.event_id(1)) == 1
+    # Another worker's id, a version from the future or garbage: send everything
+    assert feed.resume_version("other:1") is None
+    assert feed.resume_version(feed.event_id(5)) is None
+    assert feed.resume_version("nonsense") is None
+    assert feed.resume_version(None) is None
+
+
+def test_wait_times_out_without_changes(feed):
+    assert feed.wait(feed.version, 0.01) is False
+
+
+def test_thread_loads_for_subscribers_and_reloads_when_notified(feed, source):
+    app = Flask(__name__)
+    app.config["LIVE_TEST_INTERVAL"] = 60
+    feed.subscribe(app)
+    try:
+        assert feed.wait(0, 5)
+        source.data["a"] = 10
+        feed.notify_changed()
+        assert feed.wait(1, 5)
+        assert feed.changes_since(1)[1] == {"a": "<p>a=10</p>"}
+    finally:
+        feed.unsubscribe()
+    # Nobody watching: sections are dropped so the next viewer gets a fresh load
+    assert feed.changes_since(None)[1] == {}
+
+
+def test_stream_slots_are_capped(tmp_path):
+    config = {"LIVE_ANALYTICS_SLOT_DIR": str(tmp_path), "LIVE_ANALYTICS_MAX_STREAMS": 2}
+    first, second = _acquire_slot(config), _acquire_slot(config)
+    assert first is not None and second is not None
+    assert _acquire_slot(config) is None
+    first.close()
+    third = _acquire_slot(config)
+    assert third is not None
+    second.close()
+    third.close()
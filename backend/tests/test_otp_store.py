@@ -0,0 +1,63 @@
+import time
+import pytest
+from utils.otp_store import SqliteOtpStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SqliteOtpStore(str(tmp_path / "otp.sqlite3"), ttl_seconds=60, max_entries=5, max_attempts=3)
+
+
+def _count(store):
+    return store._conn().execute("SELECT count(*) FROM otp_codes").fetchone()[0]
+
+
+def test_code_is_consumed_on_success(store):
+    store.put("Asha@Example.com", "123456")
+    assert store.verify("asha@example.com", "123456") == (True, "OTP verified.")
+    assert store.verify("asha@example.com", "123456") == (False, "No OTP found or expired.")
+
+
+def test_only_hashes_are_stored(store):
+    store.put("asha@example.com", "123456")
+    (otp_hash,) = store._conn().execute("SELECT otp_hash FROM otp_codes").fetchone()
+    assert "123456" not in otp_hash
+
+
+def test_new_code_replaces_the_old_one(store):
+    store.put("asha@example.com", "111111")
+    store.put("asha@example.com", "222222")
+    assert store.verify("asha@example.com", "111111")[0] is False
+    assert store.verify("asha@example.com", "222222")[0] is True
+
+
+def test_too_many_wrong_codes_discard_the_code(store):
+    store.put("asha@example.com", "123456")
+    assert store.verify("asha@example.com", "000000") == (False, "Invalid OTP.")
+    assert store.verify("asha@example.com", "000000") == (False, "Invalid OTP.")
+    assert store.verify("asha@example.com", "000000")[1].startswith("Too many attempts")
+    assert store.verify("asha@example.com", "123456") == (False, "No OTP found or expired.")
+
+
+def test_expired_code_is_rejected(store):
+    store.ttl_seconds = -1
+    store.put("asha@example.com", "123456")
+    assert store.verify("asha@example.com", "123456") == (False, "OTP expired.")
+
+
+def test_writes_sweep_expired_codes(store):
+    store.ttl_seconds = -1
+    store.put("old@example.com", "123456")
+    store.ttl_seconds = 60
+    store.put("new@example.com", "123456")
+    assert _count(store) == 1
+
+
+def test_store_is_trimmed_to_max_entries_oldest_first(store):
+    store.trim_every = 4
+    for i in range(12):
+        store.put(f"user{i}@example.com", "123456")
+        time.sleep(0.001)  # distinct expiry times
+    assert _count(store) == 5
+    assert store.verify("user0@example.com", "123456")[0] is False
+    assert store.verify("user11@example.com", "123456")[0] is True
@@ -0,0 +1,20 @@
+from datetime import date
+from models.postgres_models import Employee
+from utils.pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    columns = (Employee.hire_date, Employee.emp_id)
+    assert decode_cursor(encode_cursor((date(2020, 1, 2), 7)), columns) == (date(2020, 1, 2), 7)
+
+
+def test_cursor_for_another_sort_is_ignored():
+    # An emp_id cursor replayed with sort=first_name used to reach the database
+    assert decode_cursor(encode_cursor((5, 5)), (Employee.first_name, Employee.emp_id)) is None
+    assert decode_cursor(encode_cursor(("Ann", 5)), (Employee.emp_id, Employee.emp_id)) is None
+
+
+def test_cursor_with_bad_values_is_ignored():
+    assert decode_cursor(encode_cursor(("not-a-date", 5)), (Employee.hire_date, Employee.emp_id)) is None
+    assert decode_cursor(encode_cursor((True, 5)), (Employee.emp_id, Employee.emp_id)) is None
+    assert decode_cursor("%%%", (Employee.emp_id, Employee.emp_id)) is None
@@ -0,0 +1,43 @@
+import os
+import time
+from utils.pdf_cache import PdfCache
+
+
+def _age(cache, key, seconds):
+    path = cache._path(key)
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_store_and_open(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=1000)
+    assert cache.open("a") is None
+    cache.store("a", b"%PDF-a")
+    with cache.open("a") as f:
+        assert f.read() == b"%PDF-a"
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=250)
+    for i, key in enumerate(("a", "b")):
+        cache.store(key, b"x" * 100)
+        _age(cache, key, 100 - i)
+    # Reading "a" makes "b" the least recently used entry
+    cache.open("a").close()
+    cache.store("c", b"x" * 100)
+    assert cache.open("b") is None
+    assert cache.open("a") is not None
+    assert cache.open("c") is not None
+    assert cache.usage()["bytes"] == 200
+
+
+def test_evict_counts_removed_entries(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=10_000)
+    for i in range(4):
+        cache.store(str(i), b"x" * 100)
+        _age(cache, str(i), 100 - i)
+    cache.max_bytes = 150
+    assert cache.evict() == 3
+    assert cache.usage()["entries"] == 1
+    assert cache.open("3") is not None
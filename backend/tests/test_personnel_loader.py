@@ -0,0 +1,135 @@
+import io
+import json
+from types import SimpleNamespace
+import pytest
+import utils.personnel_loader as personnel_loader
+from utils.personnel_loader import iter_documents, shape_personnel, load_personnel
+
+
+# -----------------------------
+# Streaming parse
+# -----------------------------
+@pytest.mark.parametrize("text", [
+    '[{"employee_id": "1"}, {"employee_id": "2"},\n {"employee_id": "3"}]',
+    '{"employee_id": "1"}\n{"employee_id": "2"}\n\n{"employee_id": "3"}\n',
+])
+def test_iter_documents_reads_arrays_and_ndjson(text):
+    assert [d["employee_id"] for d in iter_documents(io.StringIO(text))] == ["1", "2", "3"]
+
+
+def test_iter_documents_spans_read_chunks(monkeypatch):
+    monkeypatch.setattr(personnel_loader, "_READ_SIZE", 7)
+    docs = [{"employee_id": str(i), "name": "x" * i} for i in range(20)]
+    assert list(iter_documents(io.StringIO(json.dumps(docs)))) == docs
+
+
+def test_iter_documents_raises_on_truncated_input():
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_documents(io.StringIO('[{"employee_id": "1"}, {"employee_id": ')))
+
+
+# -----------------------------
+# Shaping / validation
+# -----------------------------
+def test_shape_personnel_matches_the_form_document():
+    doc, errors = shape_personnel({
+        "_id": "ignored", "employee_id": 7, "name": " Asha ", "gender": "female",
+        "residence": {"city": "Pune"}, "extra": 1,
+        "family": {"no_of_dependents": "2", "dependents": [
+            {"name": "Ira", "relation": "Daughter", "age": "4"},
+            {"name": "Incomplete", "relation": "", "age": "9"},
+        ]},
+    })
+    assert errors == []
+    assert "_id" not in doc
+    assert doc["employee_id"] == "7"
+    assert doc["name"] == "Asha"
+    assert doc["gender"] == "Female"
+    assert doc["residence"] == {"address": None, "city": "Pune", "state": None, "zip": None}
+    assert doc["family"]["no_of_dependents"] == 2
+    assert doc["family"]["dependents"] == [{"name": "Ira", "relation": "Daughter", "age": 4}]
+    assert doc["extra"] == 1
+
+
+def test_shape_personnel_reports_errors():
+    assert shape_personnel(["not", "a", "dict"]) == (None, ["document is not an object"])
+    _doc, errors = shape_personnel({"family": {
+        "no_of_dependents": "many",
+        "dependents": [{"name": "A", "relation": "Son", "age": "-1"}] * 6,
+    }})
+    assert "employee_id is required" in errors
+    assert "family.no_of_dependents must be an integer" in errors
+    assert "family.dependents has more than 5 entries" in errors
+    assert "family.dependents[1].age must not be negative" in errors
+
+
+# -----------------------------
+# Checkpoints
+# -----------------------------
+class FakeCollection:
+    """The few collection methods load_personnel uses, over a dict."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    def replace_one(self, query, doc, upsert=False):
+        self.docs[query["_id"]] = dict(doc, _id=query["_id"])
+
+    def update_one(self, query, update):
+        self.docs[query["_id"]].update(update["$set"])
+
+    def bulk_write(self, requests, ordered=True):
+        upserted = modified = 0
+        for request in requests:
+            key = request._filter["employee_id"]
+            if key in self.docs:
+                modified += 1
+            else:
+                upserted += 1
+            self.docs[key] = request._doc["$set"]
+        return SimpleNamespace(bulk_api_result={"nUpserted": upserted, "nModified": modified, "nMatched": modified})
+
+
+class FakeDb(dict):
+    def __getitem__(self, name):
+        return self.setdefault(name, FakeCollection())
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+def _ndjson(count):
+    return "\n".join(json.dumps({"employee_id": str(i)}) for i in range(count))
+
+
+def test_load_resumes_from_checkpoint():
+    db = FakeDb()
+    db.loader_checkpoints.replace_one({"_id": "load-1"}, {"status": "running", "consumed": 3, "upserted": 3})
+    summary = load_personnel(db, io.StringIO(_ndjson(5)), "load-1", batch_size=2)
+    assert summary["resumed_from"] == 3
+    assert summary["consumed"] == 5
+    assert summary["upserted"] == 5
+    # Documents before the checkpoint were skipped, not written again
+    assert sorted(db.employees_info.docs) == ["3", "4"]
+    assert db.loader_checkpoints.docs["load-1"]["status"] == "done"
+
+
+def test_finished_load_is_not_repeated():
+    db = FakeDb()
+    load_personnel(db, io.StringIO(_ndjson(2)), "load-2")
+    db.employees_info.docs.clear()
+    summary = load_personnel(db, io.StringIO(_ndjson(2)), "load-2")
+    assert summary["status"] == "already_loaded"
+    assert db.employees_info.docs == {}
+    assert load_personnel(db, io.StringIO(_ndjson(2)), "load-2", restart=True)["upserted"] == 2
+
+
+def test_invalid_documents_are_counted_not_written():
+    db = FakeDb()
+    summary = load_personnel(db, io.StringIO('{"employee_id": "1"}\n{"name": "no id"}\n'), "load-3")
+    assert summary["invalid"] == 1
+    assert summary["errors"] == [{"index": 1, "employee_id": None, "errors": ["employee_id is required"]}]
+    assert list(db.employees_info.docs) == ["1"]
@@ -0,0 +1,156 @@
+"""
+Every route below must stay within the @query_budget declared on its view
+(X-DB-Query-Count <= X-DB-Query-Budget); see utils/query_stats.py.
+"""
+import pytest
+from utils.pagination import encode_cursor
+from utils.query_stats import assert_query_budget
+
+
+# -----------------------------
+# Employees
+# -----------------------------
+@pytest.mark.parametrize("path", [
+    "/employees/home",
+    "/employees/",
+    "/employees/?sort=first_name&dir=desc",
+    "/employees/?gender=Female&department=Finance",
+    "/employees/?q=budget",
+    "/employees/tabbed",
+    "/employees/search?q=budget",
+    "/employees/new",
+])
+def test_employee_pages_within_budget(client, employee_id, path):
+    assert_query_budget(client, "GET", path)
+
+
+def test_employee_next_page_within_budget(client, employee_id):
+    response = assert_query_budget(client, "GET", "/employees/?per_page=1")
+    assert response.status_code == 200
+    assert_query_budget(client, "GET", f"/employees/?per_page=1&after={encode_cursor((1, 1))}")
+
+
+def test_employee_list_ignores_cursor_for_another_sort(client, employee_id):
+    response = assert_query_budget(client, "GET", f"/employees/?sort=first_name&after={encode_cursor((1, 1))}")
+    assert response.status_code == 200
+
+
+def test_employee_edit_pages_within_budget(client, employee_id):
+    assert_query_budget(client, "GET", f"/employees/edit/{employee_id}")
+    assert_query_budget(client, "GET", f"/employees/edit/professional/{employee_id}")
+
+
+def test_employee_writes_within_budget(client, employee_id):
+    response = assert_query_budget(client, "POST", f"/employees/edit/{employee_id}", data={
+        "first_name": "Budget", "last_name": "Tester", "dob": "1990-01-01", "gender": "Female",
+        "email": "budget.tester@example.com", "phone": "5550100", "hire_date": "2020-01-01",
+    })
+    assert response.status_code == 302
+    response = assert_query_budget(client, "POST", f"/employees/edit/professional/{employee_id}", data={
+        "designation": "Analyst", "department": "Finance", "current_salary": "52000",
+        "previous_salary": "50000", "last_increment": "2000", "skills": "SQL, Python",
+        "performance_rating": "4.2",
+    })
+    assert response.status_code == 302
+    response = assert_query_budget(client, "POST", f"/employees/delete/{employee_id}")
+    assert response.status_code == 302
+
+
+# -----------------------------
+# Analytics
+# -----------------------------
+def test_analytics_queries_counted_in_concurrent_mode(app, client):
+    # The queries run on pool threads; they must still show up in the count
+    from routes.analytics_routes import _analytics_queries
+
+    app.config["ANALYTICS_QUERY_MODE"] = "concurrent"
+    response = assert_query_budget(client, "GET", "/analytics/timings")
+    with app.app_context():
+        expected = len(_analytics_queries())
+    assert int(response.headers["X-DB-Query-Count"]) == expected
+
+
+@pytest.mark.parametrize("mode", ["concurrent", "sequential"])
+def test_analytics_page_within_budget(app, client, mode):
+    from utils.cache import invalidate, ANALYTICS_CACHE_NAMESPACE
+
+    app.config["ANALYTICS_QUERY_MODE"] = mode
+    with app.app_context():
+        invalidate(ANALYTICS_CACHE_NAMESPACE)
+    response = assert_query_budget(client, "GET", "/analytics/")
+    assert response.status_code == 200
+    # Served from the shared cache the second time
+    cached = assert_query_budget(client, "GET", "/analytics/")
+    assert int(cached.headers["X-DB-Query-Count"]) < int(response.headers["X-DB-Query-Count"])
+
+
+@pytest.mark.parametrize("path", [
+    "/analytics/freshness",
+    "/analytics/cache-stats",
+])
+def test_analytics_endpoints_within_budget(client, path):
+    assert_query_budget(client, "GET", path)
+
+
+# -----------------------------
+# Auth
+# -----------------------------
+@pytest.mark.parametrize("path", [
+    "/auth/",
+    "/auth/signin",
+    "/auth/signup",
+    "/auth/forgot-password",
+    "/auth/email-outbox/stats",
+])
+def test_auth_pages_within_budget(client, path):
+    assert_query_budget(client, "GET", path)
+
+
+def test_signup_within_budget(app, client):
+    from models.postgres_models import db
+    from models.user import User
+
+    form = {
+        "username": "budget_signup", "email": "budget_signup@example.com",
+        "password": "Secret123!", "confirm_password": "Secret123!",
+    }
+    try:
+        response = assert_query_budget(client, "POST", "/auth/signup", data=form)
+        assert response.status_code == 302
+    finally:
+        with app.app_context():
+            User.query.filter_by(username="budget_signup").delete()
+            db.session.commit()
+
+
+def test_signin_within_budget(client, account):
+    username, _, password = account
+    response = assert_query_budget(client, "POST", "/auth/signin",
+                                   data={"username_or_email": username, "password": password})
+    assert response.status_code == 302
+    client.get("/auth/logout")
+    assert_query_budget(client, "POST", "/auth/signin",
+                        data={"username_or_email": username, "password": "wrong"})
+
+
+def test_signed_in_pages_within_budget(signed_in):
+    assert_query_budget(signed_in, "GET", "/auth/profile")
+    assert_query_budget(signed_in, "POST", "/auth/profile", data={"first_name": "Budget", "city": "Pune"})
+    assert_query_budget(signed_in, "GET", "/auth/user-cache/stats")
+    assert_query_budget(signed_in, "GET", "/auth/logout")
+
+
+def test_password_reset_within_budget(app, client, account):
+    from utils.security import store_otp
+
+    _, email, _ = account
+    response = assert_query_budget(client, "POST", "/auth/forgot-password", data={"email_or_phone": email})
+    assert response.status_code == 302
+    with app.app_context():
+        # No sender runs here, so the OTP is only generated at send time; store one the test knows
+        store_otp(email, "123456")
+    response = assert_query_budget(client, "POST", "/auth/verify-otp", data={"otp": "123456"})
+    assert response.status_code == 302
+    response = assert_query_budget(client, "POST", "/auth/reset-password",
+                                   data={"password": "Secret456!", "confirm_password": "Secret456!"})
+    assert response.status_code == 302
@@ -0,0 +1,135 @@
+import threading
+import logging
+from datetime import timedelta
+from sqlalchemy import text
+from models.postgres_models import db
+from utils.cache import invalidate, ANALYTICS_CACHE_NAMESPACE
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_try_advisory_lock so only one worker refreshes at a time
+REFRESH_LOCK_KEY = 728401
+
+_refresher_started = False
+
+
+# -----------------------------
+# Staleness
+# -----------------------------
+# Pending writes are the rows trg_analytics_dirty appended to
+# analytics_changes since the last refresh consumed them
+# (db_init/analytics_matviews.sql). change_count counts every write ever
+# recorded, so it moves exactly when committed data changes.
+_STATE_QUERY = text("""
+    SELECT s.refreshed_at,
+           c.dirty_since,
+           c.changed_at,
+           s.applied_changes + c.pending AS change_count,
+           NOW() AS now,
+           EXTRACT(EPOCH FROM (NOW() - s.refreshed_at)) AS age_seconds
+    FROM analytics_refresh_state s
+    CROSS JOIN (
+        SELECT min(changed_at) AS dirty_since, max(changed_at) AS changed_at, count(*) AS pending
+        FROM analytics_changes
+    ) c
+    WHERE s.id = 1
+""")
+
+
+def get_refresh_state():
+    """
+    Return how fresh the analytics materialized views are: refreshed_at,
+    dirty_since and changed_at (first and last pending write, None when up
+    to date), change_count and age_seconds.
+    """
+    row = db.session.execute(_STATE_QUERY).mappings().first()
+    return dict(row) if row else None
+
+
+def _is_due(state, debounce, max_delay, max_age):
+    now = state["now"]
+    if state["refreshed_at"] is None or now - state["refreshed_at"] >= timedelta(seconds=max_age):
+        return True
+    if state["dirty_since"] is None:
+        return False
+    # Debounce: wait for a quiet period after the last change, but never let
+    # a continuous stream of writes postpone the refresh past max_delay.
+    quiet_for = now - state["changed_at"]
+    dirty_for = now - state["dirty_since"]
+    return quiet_for >= timedelta(seconds=debounce) or dirty_for >= timedelta(seconds=max_delay)
+
+
+# -----------------------------
+# Refresh
+# -----------------------------
+def refresh_if_due(config, force=False):
+    """
+    Refresh the analytics materialized views if changes are pending (debounced)
+    or the data is older than the configured max age. Returns True if a
+    refresh ran. Safe to call from every worker: a Postgres advisory lock
+    makes sure only one of them refreshes at a time.
+    """
+    with db.engine.connect() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": REFRESH_LOCK_KEY}).scalar():
+            return False
+        try:
+            state = conn.execute(_STATE_QUERY).mappings().first()
+            conn.commit()
+            if state is None:
+                return False
+            if not force and not _is_due(
+                state,
+                config["ANALYTICS_REFRESH_DEBOUNCE"],
+                config["ANALYTICS_REFRESH_MAX_DELAY"],
+                config["ANALYTICS_REFRESH_MAX_AGE"]
+            ):
+                return False
+
+            conn.execute(text("SELECT refresh_analytics_matviews()"))
+            conn.commit()
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REFRESH_LOCK_KEY})
+            conn.commit()
+
+    invalidate(ANALYTICS_CACHE_NAMESPACE)
+    logger.info("Refreshed analytics materialized views")
+    return True
+
+
+def _refresh_loop(app, stop_event):
+    interval = app.config["ANALYTICS_REFRESH_INTERVAL"]
+    while not stop_event.wait(interval):
+        with app.app_context():
+            try:
+                refresh_if_due(app.config)
+            except Exception as e:
+                logger.error(f"Analytics refresh failed: {e}")
+
+
+def start_refresher(app):
+    """Start the background refresh thread for this worker (once)."""
+    global _refresher_started
+    if _refresher_started or not app.config.get("ANALYTICS_USE_MATVIEWS"):
+        return None
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=_refresh_loop,
+        args=(app, stop_event),
+        name="analytics-matview-refresher",
+        daemon=True
+    )
+    thread.start()
+    _refresher_started = True
+    return stop_event
+
+
+def register_cli(app):
+    """`flask refresh-analytics [--force]` for cron jobs and deploy scripts."""
+    import click
+
+    @app.cli.command("refresh-analytics")
+    @click.option("--force", is_flag=True, help="Refresh even if nothing changed.")
+    def refresh_analytics_command(force):
+        ran = refresh_if_due(app.config, force=force)
+        click.echo("Analytics views refreshed." if ran else "Analytics views already fresh (or refresh in progress).")
@@ -0,0 +1,102 @@
+import time
+import secrets
+import logging
+from flask_caching import Cache
+
+logger = logging.getLogger(__name__)
+
+# Shared result cache. With the default FileSystemCache backend every gunicorn
+# worker on the host reads and writes the same directory, so a result computed
+# (or invalidated) by one worker is seen by all of them.
+cache = Cache()
+
+# Namespace for the Postgres analytics computed by analytics_routes._collect_stats()
+ANALYTICS_CACHE_NAMESPACE = "analytics"
+
+# Namespace for the combined Postgres + Mongo pages of utils/employee_360.py
+EMPLOYEE_360_CACHE_NAMESPACE = "employee_360"
+
+# Namespace for the personnel analytics of utils/mongo_stats.py (invalidated by personnel writes)
+MONGO_ANALYTICS_CACHE_NAMESPACE = "mongo_analytics"
+
+
+# -----------------------------
+# Namespaced, write-invalidated results
+# -----------------------------
+# Each namespace has a generation token stored in the cache. Keys embed the
+# token, so invalidating a namespace is a single write: older entries simply
+# stop being addressed and age out through their TTL.
+
+def _generation_key(namespace):
+    return f"gen:{namespace}"
+
+
+def _counter_key(namespace, kind):
+    return f"stats:{namespace}:{kind}"
+
+
+def _generation(namespace):
+    gen = cache.get(_generation_key(namespace))
+    if gen is None:
+        gen = secrets.token_hex(4)
+        cache.set(_generation_key(namespace), gen, timeout=0)
+    return gen
+
+
+def generation(namespace):
+    """
+    The namespace's current generation token. It changes on every
+    invalidate(), so it doubles as a cheap data version for other caches.
+    """
+    return _generation(namespace)
+
+
+def count_event(namespace, kind):
+    """Increment a shared counter (hits, misses, ...) reported by cache_stats()."""
+    try:
+        cache.cache.inc(_counter_key(namespace, kind))
+    except Exception:  # counters are best-effort, never fail a request over them
+        logger.debug(f"Could not update cache counter {namespace}:{kind}")
+
+
+def read_counter(namespace, kind):
+    return cache.get(_counter_key(namespace, kind)) or 0
+
+
+def cached_result(namespace, name, loader, timeout=None):
+    """
+    Return the cached value for `name` in `namespace`, calling `loader()` and
+    storing its result on a miss.
+    """
+    key = f"{namespace}:{_generation(namespace)}:{name}"
+    value = cache.get(key)
+    if value is not None:
+        count_event(namespace, "hits")
+        return value
+
+    count_event(namespace, "misses")
+    value = loader()
+    cache.set(key, value, timeout=timeout)
+    return value
+
+
+def invalidate(namespace):
+    """Drop every cached result in `namespace` (across all workers)."""
+    cache.set(_generation_key(namespace), secrets.token_hex(4), timeout=0)
+    cache.set(_counter_key(namespace, "invalidated_at"), time.time(), timeout=0)
+    count_event(namespace, "invalidations")
+
+
+def cache_stats(namespace):
+    """Hit/miss/invalidation counters for a namespace."""
+    hits = read_counter(namespace, "hits")
+    misses = read_counter(namespace, "misses")
+    lookups = hits + misses
+    return {
+        "namespace": namespace,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0,
+        "invalidations": read_counter(namespace, "invalidations"),
+        "invalidated_at": cache.get(_counter_key(namespace, "invalidated_at")),
+    }
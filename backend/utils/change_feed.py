@@ -0,0 +1,173 @@
+"""
+Postgres change feed (LISTEN hr_changes, see db_init/change_feed.sql).
+
+Triggers on employee, professional_info and accounts send one notification
+per committed statement, whoever ran it: these routes, psql,
+promote_employee(), upsert_professional_info(), a bulk import. Each web
+process runs one listener thread on its own connection (outside the pool)
+and hands every batch of changes to the registered handlers, which drop
+whatever they cached from those rows.
+
+A handler is a function taking a list of changes, each a dict
+{"table", "op", "ids"}; ids is None when the whole table may have changed
+(TRUNCATE, very large statements, or a reconnect after which notifications
+may have been missed). Handlers run in an app context on the listener
+thread and must be quick.
+
+refresh_analytics_matviews() (db_init/analytics_matviews.sql) also notifies,
+with table "analytics_matviews" and op "REFRESH".
+"""
+import json
+import time
+import select
+import logging
+import threading
+from models.postgres_models import db
+from utils.cache import invalidate, ANALYTICS_CACHE_NAMESPACE, EMPLOYEE_360_CACHE_NAMESPACE
+from utils.session_manager import forget_users
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "hr_changes"
+WATCHED_TABLES = ("employee", "professional_info", "accounts")
+
+CHANGE_HANDLERS = []
+
+_stats = {
+    "connected": False, "connected_at": None, "reconnects": 0,
+    "notifications": 0, "batches": 0, "handler_errors": 0, "last_change_at": None,
+}
+
+
+def change_handler(fn):
+    """Register fn(changes) to be called with each batch of changes."""
+    CHANGE_HANDLERS.append(fn)
+    return fn
+
+
+def _parse(payload):
+    try:
+        change = json.loads(payload)
+    except ValueError:
+        logger.warning(f"Ignoring malformed {CHANNEL} payload: {payload[:200]}")
+        return None
+    if not isinstance(change, dict) or "table" not in change:
+        return None
+    change.setdefault("op", None)
+    change.setdefault("ids", None)
+    return change
+
+
+def dispatch(app, changes):
+    """Run every handler on a batch of changes; one failing handler doesn't stop the others."""
+    _stats["batches"] += 1
+    _stats["last_change_at"] = time.time()
+    with app.app_context():
+        for handler in CHANGE_HANDLERS:
+            try:
+                handler(changes)
+            except Exception as e:
+                _stats["handler_errors"] += 1
+                logger.error(f"Change handler {handler.__name__} failed: {e}")
+
+
+def everything_changed():
+    """The batch handlers get after a reconnect: notifications may have been lost."""
+    return [{"table": table, "op": None, "ids": None} for table in WATCHED_TABLES]
+
+
+# -----------------------------
+# Default handlers
+# -----------------------------
+@change_handler
+def invalidate_employee_caches(changes):
+    """Precomputed analytics and employee 360 pages, shared by all workers."""
+    tables = {c["table"] for c in changes}
+    if tables & {"employee", "professional_info"}:
+        invalidate(ANALYTICS_CACHE_NAMESPACE)
+        invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
+    elif "analytics_matviews" in tables:
+        # A refresh changes what the materialized analytics queries return
+        invalidate(ANALYTICS_CACHE_NAMESPACE)
+
+
+@change_handler
+def forget_changed_users(changes):
+    """This worker's User cache (utils/session_manager.py)."""
+    for change in changes:
+        if change["table"] == "accounts" and change["op"] != "INSERT":
+            forget_users(change["ids"])
+
+
+# -----------------------------
+# Listener thread
+# -----------------------------
+def _connect(app):
+    import psycopg2
+
+    with app.app_context():
+        url = db.engine.url.set(drivername="postgresql")
+    conn = psycopg2.connect(url.render_as_string(hide_password=False))
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"LISTEN {CHANNEL}")
+    return conn
+
+
+def _listen_loop(app, stop_event):
+    poll = app.config["CHANGE_FEED_POLL_INTERVAL"]
+    retry = app.config["CHANGE_FEED_RECONNECT_SECONDS"]
+    conn = None
+    while not stop_event.is_set():
+        try:
+            if conn is None:
+                conn = _connect(app)
+                reconnected = _stats["connected_at"] is not None
+                _stats.update(connected=True, connected_at=time.time())
+                if reconnected:
+                    _stats["reconnects"] += 1
+                    dispatch(app, everything_changed())
+
+            if not select.select([conn], [], [], poll)[0]:
+                continue
+            conn.poll()
+            changes = [c for c in (_parse(n.payload) for n in conn.notifies) if c]
+            _stats["notifications"] += len(conn.notifies)
+            conn.notifies.clear()
+            if changes:
+                dispatch(app, changes)
+        except Exception as e:
+            logger.error(f"Change feed listener error: {e}")
+            _stats["connected"] = False
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+            stop_event.wait(retry)
+    if conn is not None:
+        conn.close()
+
+
+_listener_stop = None
+
+
+def start_listener(app):
+    """Start this process's change feed listener thread (once)."""
+    global _listener_stop
+    if _listener_stop is not None or not app.config["CHANGE_FEED_ENABLED"]:
+        return _listener_stop
+    _listener_stop = threading.Event()
+    threading.Thread(
+        target=_listen_loop,
+        args=(app, _listener_stop),
+        name="change-feed-listener",
+        daemon=True
+    ).start()
+    return _listener_stop
+
+
+def change_feed_stats():
+    """This worker's listener state and counters."""
+    return {**_stats, "handlers": [h.__name__ for h in CHANGE_HANDLERS]}
@@ -0,0 +1,224 @@
+"""
+Connection pool settings and live statistics for Postgres and Mongo.
+
+Pool sizes, overflow, recycle/pre-ping and the Mongo pool/timeouts come from
+Config (DB_POOL_* / MONGO_* settings). init_pools(app) must run before
+db.init_app(app): it installs a QueuePool that times how long checkouts wait
+and makes sure a forked child never reuses its parent's connections.
+mongo_client_options() gives the MongoClient settings for PyMongo(app, ...),
+including a listener for pool events.
+
+pool_stats() reports this process's view: checked-out / idle / overflow
+connections and checkout wait times for SQLAlchemy, and open / in-use
+connections, checkout waits and failures for each Mongo server.
+"""
+import os
+import time
+import threading
+from collections import defaultdict
+from sqlalchemy.pool import QueuePool
+from pymongo import monitoring
+
+
+class _WaitStats:
+    """Checkout wait times (seconds) and failures, thread-safe."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # A fresh lock too: after fork another thread may have held the old one
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.failures = 0
+
+    def record(self, wait, failed=False):
+        with self._lock:
+            if failed:
+                self.failures += 1
+                return
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "wait_avg_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.max_wait * 1000, 3),
+                "failures": self.failures,
+            }
+
+
+# -----------------------------
+# SQLAlchemy
+# -----------------------------
+_sql_waits = _WaitStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            _sql_waits.record(time.perf_counter() - start, failed=True)
+            raise
+        _sql_waits.record(time.perf_counter() - start)
+        return conn
+
+
+def _sqlalchemy_stats(engines):
+    stats = {}
+    for bind, engine in engines.items():
+        pool = engine.pool
+        entry = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+                timeout=pool.timeout(),
+            )
+        stats[bind or "default"] = entry
+    stats["waits"] = _sql_waits.as_dict()
+    return stats
+
+
+# -----------------------------
+# Mongo
+# -----------------------------
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Per-server connection counts and checkout waits from PyMongo pool events."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._lock = threading.Lock()
+        self.servers = defaultdict(lambda: {
+            "open": 0, "in_use": 0, "created": 0, "closed": 0, "pool_clears": 0, "waits": _WaitStats()
+        })
+
+    def _server(self, event):
+        return self.servers[f"{event.address[0]}:{event.address[1]}"]
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._server(event)["pool_clears"] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            server = self._server(event)
+            server["open"] += 1
+            server["created"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            server = self._server(event)
+            server["open"] -= 1
+            server["closed"] += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            waits = self._server(event)["waits"]
+        waits.record(event.duration, failed=True)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            server = self._server(event)
+            server["in_use"] += 1
+            waits = server["waits"]
+        waits.record(event.duration)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._server(event)["in_use"] -= 1
+
+    def as_dict(self):
+        with self._lock:
+            servers = {name: dict(s) for name, s in self.servers.items()}
+        for s in servers.values():
+            s["waits"] = s["waits"].as_dict()
+        return servers
+
+
+mongo_pool_listener = MongoPoolListener()
+
+
+def mongo_client_options(config, extra_listeners=()):
+    """Keyword arguments for PyMongo(app, ...) / MongoClient."""
+    return {
+        "maxPoolSize": config["MONGO_MAX_POOL_SIZE"],
+        "minPoolSize": config["MONGO_MIN_POOL_SIZE"],
+        "maxIdleTimeMS": config["MONGO_MAX_IDLE_TIME_MS"],
+        "waitQueueTimeoutMS": config["MONGO_WAIT_QUEUE_TIMEOUT_MS"],
+        "connectTimeoutMS": config["MONGO_CONNECT_TIMEOUT_MS"],
+        "socketTimeoutMS": config["MONGO_SOCKET_TIMEOUT_MS"],
+        "serverSelectionTimeoutMS": config["MONGO_SERVER_SELECTION_TIMEOUT_MS"],
+        # No monitor threads or sockets until first use, so a client created in
+        # a gunicorn --preload master is never shared with the forked workers
+        "connect": False,
+        "event_listeners": [mongo_pool_listener, *extra_listeners],
+    }
+
+
+# -----------------------------
+# App wiring
+# -----------------------------
+_fork_hook_apps = []
+
+
+def _reset_after_fork():
+    # The child must not share sockets with its parent. dispose(close=False)
+    # drops the inherited connections without closing the parent's.
+    _sql_waits.reset()
+    mongo_pool_listener.reset()
+    for app in _fork_hook_apps:
+        with app.app_context():
+            from models.postgres_models import db
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+    # PyMongo (>= 4.3) resets its own pools in a forked child; only our counts start over
+
+
+def init_pools(app):
+    """Install the timed pool class and the after-fork reset. Call before db.init_app(app)."""
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    options.setdefault("poolclass", TimedQueuePool)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+    if not _fork_hook_apps:
+        os.register_at_fork(after_in_child=_reset_after_fork)
+    _fork_hook_apps.append(app)
+
+
+def pool_stats():
+    """Live pool statistics for this worker process."""
+    from models.postgres_models import db
+    return {
+        "pid": os.getpid(),
+        "postgres": _sqlalchemy_stats(db.engines),
+        "mongo": mongo_pool_listener.as_dict(),
+    }
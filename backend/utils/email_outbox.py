@@ -0,0 +1,336 @@
+"""
+Email outbox: requests enqueue messages, background senders deliver them.
+
+Messages are rows in email_outbox (db_init/email_outbox.sql), so any worker
+can pick up mail queued by any other. Sender threads claim due messages with
+FOR UPDATE SKIP LOCKED, hand them to the configured transport and retry
+failures with exponential backoff up to EMAIL_MAX_ATTEMPTS. The message body
+is cleared once delivered.
+
+Messages carrying a secret (OTP codes) are queued with a template name
+instead of a body: the registered @email_template builds the body in the
+sender at send time, so the secret is never written to the outbox.
+
+Transports are pluggable (EMAIL_TRANSPORT): "brevo" (default, one pooled API
+client per process), "log" (writes to the log, for development), "stub"
+(keeps messages in memory, for tests) or "package.module:ClassName".
+"""
+import os
+import random
+import logging
+import threading
+import importlib
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from models.postgres_models import db, EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentEmailError(Exception):
+    """Delivery failed in a way retrying will not fix (e.g. rejected address)."""
+
+
+# -----------------------------
+# Transports
+# -----------------------------
+class EmailTransport:
+    def __init__(self, config):
+        self.config = config
+
+    def send(self, to_email, subject, text_content):
+        raise NotImplementedError
+
+
+class BrevoTransport(EmailTransport):
+    """Brevo transactional email API through one shared, pooled ApiClient."""
+
+    def __init__(self, config):
+        super().__init__(config)
+        import sib_api_v3_sdk
+        self._sdk = sib_api_v3_sdk
+        configuration = sib_api_v3_sdk.Configuration()
+        configuration.api_key['api-key'] = os.getenv("BREVO_API_KEY")
+        # urllib3 keeps up to connection_pool_maxsize keep-alive connections
+        configuration.connection_pool_maxsize = max(config["EMAIL_SENDER_THREADS"], 1)
+        self._api = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
+        self._sender = os.getenv("BREVO_SENDER_EMAIL")
+
+    def send(self, to_email, subject, text_content):
+        from sib_api_v3_sdk.rest import ApiException
+        message = self._sdk.SendSmtpEmail(
+            to=[{"email": to_email}],
+            sender={"email": self._sender},
+            subject=subject,
+            text_content=text_content
+        )
+        try:
+            self._api.send_transac_email(message, _request_timeout=self.config["EMAIL_REQUEST_TIMEOUT"])
+        except ApiException as e:
+            # 4xx other than rate limiting will fail the same way next time
+            if e.status and 400 <= e.status < 500 and e.status != 429:
+                raise PermanentEmailError(f"Brevo rejected the message: {e.status} {e.reason}") from e
+            raise
+
+
+class LogTransport(EmailTransport):
+    def send(self, to_email, subject, text_content):
+        logger.info(f"[email] to={to_email} subject={subject!r}\n{text_content}")
+
+
+class StubTransport(EmailTransport):
+    """Records messages instead of sending them (see StubTransport.sent)."""
+    sent = []
+
+    def send(self, to_email, subject, text_content):
+        StubTransport.sent.append({"to": to_email, "subject": subject, "text": text_content})
+
+
+EMAIL_TRANSPORTS = {
+    "brevo": BrevoTransport,
+    "log": LogTransport,
+    "stub": StubTransport,
+}
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport(config):
+    """The process-wide transport instance (created on first use)."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            name = config["EMAIL_TRANSPORT"]
+            if ":" in name:
+                module, cls = name.split(":", 1)
+                transport_cls = getattr(importlib.import_module(module), cls)
+            else:
+                transport_cls = EMAIL_TRANSPORTS[name]
+            _transport = transport_cls(config)
+        return _transport
+
+
+# -----------------------------
+# Templates (bodies built at send time)
+# -----------------------------
+EMAIL_TEMPLATES = {}
+
+
+def email_template(name):
+    """Register f(to_email) -> text body, called in the sender for each attempt."""
+    def decorator(f):
+        EMAIL_TEMPLATES[name] = f
+        return f
+    return decorator
+
+
+# -----------------------------
+# Queue operations
+# -----------------------------
+_wakeup = threading.Event()
+
+
+def enqueue_email(to_email, subject, text_content=None, template=None):
+    """
+    Queue a message for delivery and return its id. Pass either the body or
+    the name of an @email_template that builds it when the message is sent.
+    """
+    if (text_content is None) == (template is None):
+        raise ValueError("Pass exactly one of text_content and template")
+    if template is not None and template not in EMAIL_TEMPLATES:
+        raise KeyError(template)
+    # Own short transaction: never commits whatever the request session holds
+    with db.engine.begin() as conn:
+        message_id = conn.execute(
+            EmailOutbox.__table__.insert().returning(EmailOutbox.__table__.c.id),
+            {"to_email": to_email, "subject": subject, "text_content": text_content, "template": template}
+        ).scalar()
+    # Senders in this process start at once instead of waiting for the next poll
+    _wakeup.set()
+    return message_id
+
+
+def claim_due_messages(batch_size):
+    rows = db.session.execute(text("""
+        UPDATE email_outbox
+        SET status = 'sending',
+            attempts = attempts + 1,
+            claimed_at = NOW() AT TIME ZONE 'utc'
+        WHERE id IN (
+            SELECT id FROM email_outbox
+            WHERE status = 'queued' AND next_attempt_at <= NOW() AT TIME ZONE 'utc'
+            ORDER BY next_attempt_at
+            LIMIT :batch
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, to_email, subject, text_content, template, attempts
+    """), {"batch": batch_size}).mappings().all()
+    db.session.commit()
+    return [dict(r) for r in rows]
+
+
+def _backoff(config, attempts):
+    base = config["EMAIL_RETRY_BASE_SECONDS"] * (2 ** (attempts - 1))
+    return min(base, config["EMAIL_RETRY_MAX_SECONDS"]) * random.uniform(0.8, 1.2)
+
+
+def deliver(message, config):
+    """Send one claimed message and record the outcome."""
+    try:
+        text_content = message["text_content"]
+        if message["template"]:
+            render = EMAIL_TEMPLATES.get(message["template"])
+            if render is None:
+                raise PermanentEmailError(f"Unknown email template: {message['template']}")
+            text_content = render(message["to_email"])
+        get_transport(config).send(message["to_email"], message["subject"], text_content)
+    except Exception as e:
+        permanent = isinstance(e, PermanentEmailError) or message["attempts"] >= config["EMAIL_MAX_ATTEMPTS"]
+        logger.warning(f"Email {message['id']} attempt {message['attempts']} failed: {e}")
+        fields = {"last_error": str(e)[:500]}
+        if permanent:
+            fields.update(status="failed", text_content=None)
+        else:
+            fields.update(
+                status="queued",
+                next_attempt_at=datetime.utcnow() + timedelta(seconds=_backoff(config, message["attempts"]))
+            )
+        db.session.query(EmailOutbox).filter_by(id=message["id"]).update(fields)
+        db.session.commit()
+        return False
+
+    db.session.query(EmailOutbox).filter_by(id=message["id"]).update(
+        {"status": "sent", "sent_at": datetime.utcnow(), "text_content": None}
+    )
+    db.session.commit()
+    return True
+
+
+# Slack on top of the slowest possible batch before a claim counts as lost
+_SEND_TIMEOUT_MARGIN = 60
+
+
+def _send_timeout(config):
+    """
+    Seconds after which a message still 'sending' is presumed lost. Never less
+    than a whole claimed batch of requests that each run to their timeout, or
+    a slow but successful send would be requeued and delivered again.
+    """
+    batch_seconds = config["EMAIL_SEND_BATCH"] * config["EMAIL_REQUEST_TIMEOUT"]
+    return max(config["EMAIL_SEND_TIMEOUT"], batch_seconds + _SEND_TIMEOUT_MARGIN)
+
+
+def sweep_outbox(config):
+    """
+    Retry messages stuck in 'sending' (dead sender), failing those that have
+    used up EMAIL_MAX_ATTEMPTS, and drop old finished ones.
+    """
+    params = {"timeout": _send_timeout(config), "max_attempts": config["EMAIL_MAX_ATTEMPTS"]}
+    db.session.execute(text("""
+        UPDATE email_outbox
+        SET status = 'failed', text_content = NULL,
+            last_error = 'No outcome recorded before the send timeout'
+        WHERE status = 'sending'
+          AND attempts >= :max_attempts
+          AND claimed_at < NOW() AT TIME ZONE 'utc' - make_interval(secs => :timeout)
+    """), params)
+    db.session.execute(text("""
+        UPDATE email_outbox
+        SET status = 'queued', next_attempt_at = NOW() AT TIME ZONE 'utc'
+        WHERE status = 'sending'
+          AND attempts < :max_attempts
+          AND claimed_at < NOW() AT TIME ZONE 'utc' - make_interval(secs => :timeout)
+    """), params)
+    db.session.execute(text("""
+        DELETE FROM email_outbox
+        WHERE status IN ('sent', 'failed')
+          AND created_at < NOW() AT TIME ZONE 'utc' - make_interval(secs => :retention)
+    """), {"retention": config["EMAIL_OUTBOX_RETENTION"]})
+    db.session.commit()
+
+
+def outbox_stats(window_seconds=3600):
+    """Queue depth plus delivery latency over the last window_seconds."""
+    row = db.session.execute(text("""
+        SELECT
+            count(*) FILTER (WHERE status = 'queued') AS queued,
+            count(*) FILTER (WHERE status = 'sending') AS sending,
+            count(*) FILTER (WHERE status = 'failed') AS failed,
+            count(*) FILTER (WHERE status = 'sent' AND sent_at >= cutoff) AS sent_recent,
+            EXTRACT(EPOCH FROM (NOW() AT TIME ZONE 'utc'
+                - min(created_at) FILTER (WHERE status IN ('queued', 'sending')))) AS oldest_pending_seconds,
+            EXTRACT(EPOCH FROM avg(sent_at - created_at) FILTER (WHERE sent_at >= cutoff)) AS latency_avg_seconds,
+            EXTRACT(EPOCH FROM percentile_cont(0.95) WITHIN GROUP (ORDER BY sent_at - created_at)
+                FILTER (WHERE sent_at >= cutoff)) AS latency_p95_seconds,
+            avg(attempts) FILTER (WHERE status = 'sent' AND sent_at >= cutoff) AS attempts_avg
+        FROM email_outbox,
+             LATERAL (SELECT NOW() AT TIME ZONE 'utc' - make_interval(secs => :window) AS cutoff) c
+    """), {"window": window_seconds}).mappings().one()
+    stats = {k: (float(v) if v is not None and k.endswith(("seconds", "avg")) else v) for k, v in row.items()}
+    stats["window_seconds"] = window_seconds
+    return stats
+
+
+# -----------------------------
+# Sender
+# -----------------------------
+def run_sender(app, stop_event):
+    """Deliver due messages until stop_event is set."""
+    config = app.config
+    sweep_every = timedelta(seconds=config["EMAIL_SWEEP_INTERVAL"])
+    last_sweep = datetime.min
+
+    while not stop_event.is_set():
+        # Cleared before draining, so a message queued meanwhile is not missed
+        _wakeup.clear()
+        messages = []
+        with app.app_context():
+            try:
+                if datetime.utcnow() - last_sweep >= sweep_every:
+                    sweep_outbox(config)
+                    last_sweep = datetime.utcnow()
+                messages = claim_due_messages(config["EMAIL_SEND_BATCH"])
+                for message in messages:
+                    deliver(message, config)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Email sender error: {e}")
+            finally:
+                db.session.remove()
+        if not messages:
+            _wakeup.wait(config["EMAIL_POLL_INTERVAL"])
+
+
+_sender_stop = None
+
+
+def start_email_senders(app):
+    """Start this process's background sender threads (once)."""
+    global _sender_stop
+    threads = app.config["EMAIL_SENDER_THREADS"]
+    if _sender_stop is not None or threads <= 0:
+        return _sender_stop
+    _sender_stop = threading.Event()
+    for i in range(threads):
+        threading.Thread(
+            target=run_sender,
+            args=(app, _sender_stop),
+            name=f"email-sender-{i}",
+            daemon=True
+        ).start()
+    return _sender_stop
+
+
+def register_cli(app):
+    """`flask email-sender` runs a standalone sender (set EMAIL_SENDER_THREADS=0 on web nodes)."""
+    import click
+
+    @app.cli.command("email-sender")
+    def email_sender_command():
+        click.echo("Email sender started. Ctrl+C to stop.")
+        stop = threading.Event()
+        try:
+            run_sender(app, stop)
+        except KeyboardInterrupt:
+            stop.set()
@@ -0,0 +1,174 @@
+"""
+Employee 360: Postgres employee rows joined with their Mongo personnel record.
+
+The two stores key the same person differently: Postgres by integer emp_id,
+Mongo employees_info by string employee_id (MONGO_EMPLOYEE_ID_FORMAT, "E%03d"
+by default, so emp_id 7 is "E007"). A page of profiles is built with exactly
+one SQL query (keyset-paginated on emp_id) and one Mongo find with $in on the
+page's employee_ids, then merged in memory. Finished pages are cached in the
+shared result cache under EMPLOYEE_360_CACHE_NAMESPACE, which the employee
+and personnel write paths invalidate.
+
+Which columns and document fields are loaded is set by EMPLOYEE_360_SQL_FIELDS
+and EMPLOYEE_360_MONGO_FIELDS; a request may narrow them, never widen them.
+"""
+import re
+import json
+import hashlib
+from datetime import date
+from decimal import Decimal
+from flask import current_app
+from models.postgres_models import Employee, ProfessionalInfo
+from models.mongo_models import get_personnel_collection
+from utils.cache import cached_result, EMPLOYEE_360_CACHE_NAMESPACE
+from utils.pagination import keyset_paginate
+
+# Columns a projection may name (emp_id is always loaded)
+SQL_COLUMNS = {
+    column.key: column
+    for column in (
+        Employee.first_name, Employee.last_name, Employee.dob, Employee.gender,
+        Employee.email, Employee.phone, Employee.hire_date,
+        ProfessionalInfo.designation, ProfessionalInfo.department,
+        ProfessionalInfo.current_salary, ProfessionalInfo.previous_salary,
+        ProfessionalInfo.last_increment, ProfessionalInfo.skills,
+        ProfessionalInfo.performance_rating,
+    )
+}
+
+_MONGO_FIELD = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+class ProjectionError(ValueError):
+    """A requested field is unknown or not part of the configured projection."""
+
+
+# -----------------------------
+# Keys and projections
+# -----------------------------
+def mongo_employee_id(emp_id):
+    """Postgres emp_id -> Mongo employee_id (7 -> "E007")."""
+    return current_app.config["MONGO_EMPLOYEE_ID_FORMAT"] % emp_id
+
+
+def _split(fields):
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    return [f.strip() for f in fields or [] if f and f.strip()]
+
+
+def sql_projection(requested=None):
+    """Column names to load: the configured ones, or the requested subset of them."""
+    configured = _split(current_app.config["EMPLOYEE_360_SQL_FIELDS"])
+    unknown = [f for f in configured if f not in SQL_COLUMNS]
+    if unknown:
+        raise ProjectionError(f"EMPLOYEE_360_SQL_FIELDS has unknown columns: {', '.join(unknown)}")
+    requested = _split(requested)
+    if not requested:
+        return configured
+    refused = [f for f in requested if f not in configured]
+    if refused:
+        raise ProjectionError(f"Fields not available: {', '.join(refused)}")
+    return requested
+
+
+def mongo_projection(requested=None):
+    """Document paths to load: the configured ones, or requested paths within them."""
+    configured = _split(current_app.config["EMPLOYEE_360_MONGO_FIELDS"])
+    requested = _split(requested)
+    if not requested:
+        return configured
+
+    def allowed(path):
+        return _MONGO_FIELD.match(path) and any(
+            path == c or path.startswith(c + ".") for c in configured
+        )
+
+    refused = [f for f in requested if not allowed(f)]
+    if refused:
+        raise ProjectionError(f"Personnel fields not available: {', '.join(refused)}")
+    return requested
+
+
+def field_value(document, path):
+    """Read a dotted path ("residence.city") from a nested dict; None if absent."""
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _plain(value):
+    # Cached pages are served as JSON too; keep them to JSON-friendly types
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+# -----------------------------
+# Batched join
+# -----------------------------
+def attach_personnel(profiles, mongo_fields):
+    """
+    Add each profile's Mongo personnel document (or None) under "personnel",
+    with a single $in query for the whole batch.
+    """
+    by_mongo_id = {mongo_employee_id(p["emp_id"]): p for p in profiles}
+    for profile in profiles:
+        profile["employee_id"] = mongo_employee_id(profile["emp_id"])
+        profile["personnel"] = None
+    if not by_mongo_id or not mongo_fields:
+        return profiles
+
+    projection = {"_id": 0, "employee_id": 1, **{f: 1 for f in mongo_fields}}
+    cursor = get_personnel_collection().find(
+        {"employee_id": {"$in": list(by_mongo_id)}}, projection
+    )
+    for doc in cursor:
+        profile = by_mongo_id.get(doc.pop("employee_id", None))
+        if profile is not None:
+            profile["personnel"] = doc
+    return profiles
+
+
+def employee_360_page(query, filters, per_page, after=None, before=None, sql_fields=None, mongo_fields=None):
+    """
+    One page of combined profiles, ordered by emp_id.
+
+    `query` is an Employee query already joined to professional_info and
+    filtered; `filters` only has to identify it for the cache key. Returns a
+    dict with items, next_cursor, prev_cursor and per_page.
+    """
+    sql_fields = sql_fields or sql_projection()
+    mongo_fields = mongo_fields if mongo_fields is not None else mongo_projection()
+    key = hashlib.sha1(json.dumps(
+        [filters, per_page, after, before, sql_fields, mongo_fields], sort_keys=True, default=str
+    ).encode()).hexdigest()
+
+    def load():
+        page = keyset_paginate(
+            query.with_entities(Employee.emp_id, *(SQL_COLUMNS[f] for f in sql_fields)),
+            sort_column=Employee.emp_id,
+            sort_attr="emp_id",
+            key_column=Employee.emp_id,
+            key_attr="emp_id",
+            per_page=per_page,
+            after=after,
+            before=before
+        )
+        profiles = [{k: _plain(v) for k, v in row._mapping.items()} for row in page.items]
+        return {
+            "items": attach_personnel(profiles, mongo_fields),
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+            "per_page": per_page,
+            "sql_fields": sql_fields,
+            "mongo_fields": mongo_fields,
+        }
+
+    return cached_result(EMPLOYEE_360_CACHE_NAMESPACE, key, load,
+                         timeout=current_app.config["EMPLOYEE_360_CACHE_TTL"])
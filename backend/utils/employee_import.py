@@ -0,0 +1,360 @@
+"""
+Bulk import of employees (+ professional info) from CSV via COPY.
+
+One CSV carries both tables: the employee columns, optionally followed by the
+professional_info columns. Rows are validated in Python, valid ones are
+streamed into a temporary staging table with COPY, and two set-based upserts
+move them into employee and professional_info. professional_info uses an
+ON CONFLICT (emp_id) DO UPDATE like the upsert_professional_info() SQL
+function, so triggers (salary_log) fire exactly as for a one-by-one upsert.
+
+A row for an existing emp_id is a partial update: blank cells keep the
+stored value instead of erasing it (hire_date defaults to today only for
+new employees).
+"""
+import io
+import csv
+import time
+import logging
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import text
+from models.postgres_models import db
+from utils.cache import invalidate, ANALYTICS_CACHE_NAMESPACE, EMPLOYEE_360_CACHE_NAMESPACE
+
+logger = logging.getLogger(__name__)
+
+EMPLOYEE_FIELDS = ["emp_id", "first_name", "last_name", "dob", "gender", "email", "phone", "hire_date"]
+PROFESSIONAL_FIELDS = [
+    "designation", "department", "current_salary", "previous_salary",
+    "last_increment", "skills", "performance_rating"
+]
+STAGING_FIELDS = ["line_no"] + EMPLOYEE_FIELDS + PROFESSIONAL_FIELDS + ["has_professional"]
+
+GENDERS = ("Male", "Female", "Other")
+
+# Stop collecting row errors past this many (the import still reports the count)
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFailed(Exception):
+    """The file could not be imported at all (bad header, or errors in strict mode)."""
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+# -----------------------------
+# Validation
+# -----------------------------
+def _text(value, field, max_len, errors, required=False):
+    value = (value or "").strip()
+    if not value:
+        if required:
+            errors.append(f"{field} is required")
+        return None
+    if len(value) > max_len:
+        errors.append(f"{field} is longer than {max_len} characters")
+    return value
+
+
+def _date(value, field, errors):
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        # fromisoformat is ~10x faster than strptime; the length check keeps it to YYYY-MM-DD
+        if len(value) != 10:
+            raise ValueError(value)
+        return date.fromisoformat(value)
+    except ValueError:
+        errors.append(f"{field} must be YYYY-MM-DD")
+        return None
+
+
+def _numeric(value, field, errors, max_abs=Decimal("99999999.99")):
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        errors.append(f"{field} must be a number")
+        return None
+    if abs(number) > max_abs:
+        errors.append(f"{field} is out of range")
+    return number
+
+
+def validate_row(raw):
+    """Return (row dict, list of error messages) for one CSV record."""
+    errors = []
+    row = {}
+
+    emp_id = (raw.get("emp_id") or "").strip()
+    row["emp_id"] = None
+    if emp_id:
+        if emp_id.isdigit() and 0 < int(emp_id) < 2 ** 31:
+            row["emp_id"] = int(emp_id)
+        else:
+            errors.append("emp_id must be a positive integer")
+
+    row["first_name"] = _text(raw.get("first_name"), "first_name", 50, errors, required=True)
+    row["last_name"] = _text(raw.get("last_name"), "last_name", 50, errors, required=True)
+    row["dob"] = _date(raw.get("dob"), "dob", errors)
+    row["gender"] = _text(raw.get("gender"), "gender", 10, errors)
+    if row["gender"]:
+        row["gender"] = row["gender"].capitalize()
+        if row["gender"] not in GENDERS:
+            errors.append(f"gender must be one of {', '.join(GENDERS)}")
+    row["email"] = _text(raw.get("email"), "email", 100, errors)
+    if row["email"] and "@" not in row["email"]:
+        errors.append("email is not a valid address")
+    row["phone"] = _text(raw.get("phone"), "phone", 20, errors)
+    row["hire_date"] = _date(raw.get("hire_date"), "hire_date", errors)
+
+    row["designation"] = _text(raw.get("designation"), "designation", 100, errors)
+    row["department"] = _text(raw.get("department"), "department", 100, errors)
+    for field in ("current_salary", "previous_salary", "last_increment"):
+        row[field] = _numeric(raw.get(field), field, errors)
+    # Same convention as the professional form: comma separated (";" also accepted)
+    skills = (raw.get("skills") or "").replace(";", ",")
+    row["skills"] = [s.strip() for s in skills.split(",") if s.strip()] or None
+    rating = (raw.get("performance_rating") or "").strip()
+    row["performance_rating"] = None
+    if rating:
+        try:
+            row["performance_rating"] = float(rating)
+        except ValueError:
+            errors.append("performance_rating must be a number")
+
+    row["has_professional"] = any(
+        (raw.get(f) or "").strip() for f in PROFESSIONAL_FIELDS
+    )
+    return row, errors
+
+
+def _pg_array(values):
+    if values is None:
+        return None
+    escaped = ('"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _staging_record(line_no, row):
+    record = [line_no]
+    for field in EMPLOYEE_FIELDS + PROFESSIONAL_FIELDS:
+        value = row[field]
+        if field == "skills":
+            value = _pg_array(value)
+        record.append("" if value is None else value)
+    record.append("t" if row["has_professional"] else "f")
+    return record
+
+
+def parse_csv(stream):
+    """
+    Validate a CSV text stream. Returns (COPY buffer, valid row count, errors,
+    invalid row count); errors lists {"line", "emp_id", "errors"} for up to
+    MAX_REPORTED_ERRORS rows.
+    """
+    reader = csv.DictReader(stream)
+    missing = [f for f in ("first_name", "last_name") if f not in (reader.fieldnames or [])]
+    if missing:
+        raise ImportFailed(f"CSV header is missing required column(s): {', '.join(missing)}")
+    unknown = [f for f in reader.fieldnames if f not in EMPLOYEE_FIELDS + PROFESSIONAL_FIELDS]
+    if unknown:
+        raise ImportFailed(f"CSV header has unknown column(s): {', '.join(unknown)}")
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    seen_ids = {}
+    errors = []
+    error_count = 0
+    valid = 0
+    for raw in reader:
+        line_no = reader.line_num
+        row, row_errors = validate_row(raw)
+        if row["emp_id"] is not None:
+            if row["emp_id"] in seen_ids:
+                row_errors.append(f"duplicate emp_id (also on line {seen_ids[row['emp_id']]})")
+            else:
+                seen_ids[row["emp_id"]] = line_no
+        if row_errors:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line_no, "emp_id": raw.get("emp_id") or None, "errors": row_errors})
+            continue
+        writer.writerow(_staging_record(line_no, row))
+        valid += 1
+    buf.seek(0)
+    return buf, valid, errors, error_count
+
+
+# -----------------------------
+# Load
+# -----------------------------
+_STAGING_DDL = """
+    CREATE TEMP TABLE employee_import_staging (
+        line_no INT,
+        emp_id INT,
+        first_name VARCHAR(50),
+        last_name VARCHAR(50),
+        dob DATE,
+        gender VARCHAR(10),
+        email VARCHAR(100),
+        phone VARCHAR(20),
+        hire_date DATE,
+        designation VARCHAR(100),
+        department VARCHAR(100),
+        current_salary NUMERIC(10,2),
+        previous_salary NUMERIC(10,2),
+        last_increment NUMERIC(10,2),
+        skills TEXT[],
+        performance_rating FLOAT,
+        has_professional BOOLEAN
+    ) ON COMMIT DROP
+"""
+
+# Rows without an emp_id get one from the employee serial up front, so the
+# professional_info half of the row can be linked in the same set-based pass.
+_ASSIGN_IDS = """
+    UPDATE employee_import_staging
+    SET emp_id = nextval(pg_get_serial_sequence('employee', 'emp_id'))
+    WHERE emp_id IS NULL
+"""
+
+# Blank hire_date means today for new employees only; existing ones keep theirs
+_DEFAULT_HIRE_DATES = """
+    UPDATE employee_import_staging s
+    SET hire_date = CURRENT_DATE
+    WHERE s.hire_date IS NULL
+      AND NOT EXISTS (SELECT 1 FROM employee e WHERE e.emp_id = s.emp_id)
+"""
+
+# Blank (NULL) cells keep what is stored
+_UPSERT_EMPLOYEES = """
+    WITH upserted AS (
+        INSERT INTO employee (emp_id, first_name, last_name, dob, gender, email, phone, hire_date)
+        SELECT emp_id, first_name, last_name, dob, gender, email, phone, hire_date
+        FROM employee_import_staging
+        ORDER BY line_no
+        ON CONFLICT (emp_id) DO UPDATE
+        SET first_name = COALESCE(EXCLUDED.first_name, employee.first_name),
+            last_name = COALESCE(EXCLUDED.last_name, employee.last_name),
+            dob = COALESCE(EXCLUDED.dob, employee.dob),
+            gender = COALESCE(EXCLUDED.gender, employee.gender),
+            email = COALESCE(EXCLUDED.email, employee.email),
+            phone = COALESCE(EXCLUDED.phone, employee.phone),
+            hire_date = COALESCE(EXCLUDED.hire_date, employee.hire_date)
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted) AS inserted,
+           count(*) FILTER (WHERE NOT inserted) AS updated
+    FROM upserted
+"""
+
+# Conflict handling as in upsert_professional_info() (professional_info.sql),
+# except that blank (NULL) cells keep what is stored
+_UPSERT_PROFESSIONAL = """
+    INSERT INTO professional_info (emp_id, department, designation, current_salary, previous_salary, last_increment, skills, performance_rating)
+    SELECT emp_id, department, designation, current_salary, previous_salary, last_increment, skills, performance_rating
+    FROM employee_import_staging
+    WHERE has_professional
+    ORDER BY line_no
+    ON CONFLICT (emp_id) DO UPDATE
+    SET department = COALESCE(EXCLUDED.department, professional_info.department),
+        designation = COALESCE(EXCLUDED.designation, professional_info.designation),
+        current_salary = COALESCE(EXCLUDED.current_salary, professional_info.current_salary),
+        previous_salary = COALESCE(EXCLUDED.previous_salary, professional_info.previous_salary),
+        last_increment = COALESCE(EXCLUDED.last_increment, professional_info.last_increment),
+        skills = COALESCE(EXCLUDED.skills, professional_info.skills),
+        performance_rating = COALESCE(EXCLUDED.performance_rating, professional_info.performance_rating)
+"""
+
+# Explicit emp_ids may run ahead of the serial; keep later inserts from colliding
+_SYNC_SEQUENCE = """
+    SELECT setval(
+        pg_get_serial_sequence('employee', 'emp_id'),
+        GREATEST(
+            (SELECT COALESCE(MAX(emp_id), 1) FROM employee),
+            COALESCE(pg_sequence_last_value(pg_get_serial_sequence('employee', 'emp_id')::regclass), 1)
+        )
+    )
+"""
+
+
+def import_employees(stream, dry_run=False, strict=False):
+    """
+    Import a CSV text stream. Invalid rows are skipped and reported; with
+    strict=True any invalid row aborts the whole import. dry_run validates
+    only. Returns a summary dict.
+    """
+    started = time.perf_counter()
+    buf, valid, errors, error_count = parse_csv(stream)
+    result = {
+        "rows": valid + error_count,
+        "valid": valid,
+        "invalid": error_count,
+        "errors": errors,
+        "inserted": 0,
+        "updated": 0,
+        "professional_upserted": 0,
+        "dry_run": dry_run,
+    }
+    if error_count and strict:
+        raise ImportFailed(f"{error_count} invalid row(s); nothing imported (strict mode)", result)
+    if dry_run or not valid:
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    try:
+        db.session.execute(text(_STAGING_DDL))
+        # COPY goes through the session's own DBAPI connection (same transaction)
+        dbapi_conn = db.session.connection().connection.driver_connection
+        with dbapi_conn.cursor() as cur:
+            cur.copy_expert(
+                f"COPY employee_import_staging ({', '.join(STAGING_FIELDS)}) FROM STDIN WITH (FORMAT csv)",
+                buf
+            )
+        db.session.execute(text(_ASSIGN_IDS))
+        db.session.execute(text(_DEFAULT_HIRE_DATES))
+        counts = db.session.execute(text(_UPSERT_EMPLOYEES)).mappings().one()
+        result["inserted"] = counts["inserted"]
+        result["updated"] = counts["updated"]
+        result["professional_upserted"] = db.session.execute(text(_UPSERT_PROFESSIONAL)).rowcount
+        db.session.execute(text(_SYNC_SEQUENCE))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    invalidate(ANALYTICS_CACHE_NAMESPACE)
+    invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(
+        f"Imported {valid} employee rows in {result['seconds']}s "
+        f"({result['inserted']} new, {result['updated']} updated, {error_count} invalid)"
+    )
+    return result
+
+
+def register_cli(app):
+    """`flask import-employees FILE [--dry-run] [--strict]`."""
+    import json
+    import click
+
+    @app.cli.command("import-employees")
+    @click.argument("csv_file", type=click.File("r", encoding="utf-8-sig"))
+    @click.option("--dry-run", is_flag=True, help="Validate only, do not write.")
+    @click.option("--strict", is_flag=True, help="Abort if any row is invalid.")
+    def import_employees_command(csv_file, dry_run, strict):
+        try:
+            result = import_employees(csv_file, dry_run=dry_run, strict=strict)
+        except ImportFailed as e:
+            click.echo(str(e), err=True)
+            if e.result:
+                click.echo(json.dumps(e.result["errors"], indent=2), err=True)
+            raise SystemExit(1)
+        click.echo(json.dumps(result, indent=2))
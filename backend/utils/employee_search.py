@@ -0,0 +1,31 @@
+from sqlalchemy import func, cast, literal_column
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+
+# -----------------------------
+# Indexed employee search
+# -----------------------------
+# The searchable text of an employee row. This must stay textually in sync with
+# the expression of idx_employee_search_trgm in db_init/employee_search.sql so
+# Postgres can answer LIKE '%q%' from the pg_trgm GIN index.
+SEARCH_DOCUMENT = (
+    "lower(employee.first_name || ' ' || employee.last_name || ' ' || "
+    "coalesce(employee.email, '') || ' ' || coalesce(employee.phone, ''))"
+)
+
+
+def _like_pattern(search_query):
+    escaped = search_query.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_filter(search_query):
+    """Substring match over name, email and phone (served by the trigram index)."""
+    return literal_column(SEARCH_DOCUMENT).like(_like_pattern(search_query))
+
+
+def search_rank(search_query):
+    """
+    Relevance of a row for `search_query` (pg_trgm word similarity, 0..1).
+    Cast to float8 so the value survives a round trip through a keyset cursor.
+    """
+    return cast(func.word_similarity(search_query.lower(), literal_column(SEARCH_DOCUMENT)), DOUBLE_PRECISION)
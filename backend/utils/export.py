@@ -0,0 +1,105 @@
+"""
+Streaming CSV / NDJSON exports.
+
+Rows are pulled lazily from a server-side cursor (Postgres) or a batched
+Mongo cursor and written to the response as they arrive, so memory stays flat
+whatever the row count and the first bytes go out before the query finishes.
+"""
+import io
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask import Response, stream_with_context
+
+EXPORT_MIMETYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Rows are buffered into chunks of about this size before being written out
+CHUNK_BYTES = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return str(value)  # ObjectId and anything else
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _lookup(row, field):
+    """Read a (possibly dotted, for Mongo sub-documents) field from a mapping."""
+    value = row
+    for part in field.split("."):
+        if not hasattr(value, "get"):
+            return None
+        value = value.get(part)
+        if value is None:
+            return None
+    return value
+
+
+def iter_csv(fields, open_rows):
+    """Yield CSV text: the header at once, then rows in ~CHUNK_BYTES chunks."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(fields)
+    yield buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+
+    for row in open_rows():
+        writer.writerow([_csv_value(_lookup(row, f)) for f in fields])
+        if buf.tell() >= CHUNK_BYTES:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def iter_ndjson(fields, open_rows):
+    """Yield one JSON object per line (all of `fields`, or the whole row if None)."""
+    chunk = []
+    size = 0
+    for row in open_rows():
+        if fields is None:
+            doc = dict(row)
+        else:
+            doc = {f: _lookup(row, f) for f in fields}
+        line = json.dumps(doc, default=_json_default) + "\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield "".join(chunk)
+
+
+def export_response(fmt, fields, open_rows, filename):
+    """
+    Stream rows as CSV or NDJSON. `open_rows` is called lazily, once the
+    response has started, and must return an iterable of mappings.
+    """
+    if fmt == "csv":
+        body = iter_csv(fields, open_rows)
+    else:
+        body = iter_ndjson(fields, open_rows)
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}.{fmt}"}
+    )
@@ -0,0 +1,199 @@
+"""
+Live analytics dashboards over Server-Sent Events.
+
+A LiveFeed belongs to one dashboard (Postgres analytics, Mongo personnel
+analytics) and is shared by every viewer connected to this worker. Its
+thread reloads the stats when woken (change feed, personnel writes) or every
+interval, fingerprints each section and re-renders only the sections whose
+data changed. Viewers' streams just wait for the feed's version to move and
+send those HTML fragments, so N viewers cost one computation, and through
+the shared result cache one computation per change across all workers.
+
+Every open stream holds a sync gunicorn worker, so streams are capped
+host-wide at LIVE_ANALYTICS_MAX_STREAMS (one flock'ed slot file each) and
+end after LIVE_ANALYTICS_STREAM_SECONDS. The browser reconnects with
+Last-Event-ID and only gets what it missed. A refused viewer gets a "busy"
+event and retries later; the page stays usable, just not live.
+"""
+import os
+import json
+import time
+import fcntl
+import hashlib
+import logging
+import secrets
+import threading
+from flask import Response, current_app
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Don't let nginx buffer the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+class LiveFeed:
+    """
+    load() returns {section: data} (called in an app context);
+    render(section, data) returns that section's HTML fragment.
+    interval_key names the config setting for the reload interval.
+    """
+
+    def __init__(self, name, load, render, interval_key):
+        self.name = name
+        self._load = load
+        self._render = render
+        self._interval_key = interval_key
+        # Distinguishes this worker's versions from another's on reconnect
+        self.token = secrets.token_hex(4)
+        self.version = 0
+        self._sections = {}  # section -> {"digest", "html", "version"}
+        self._subscribers = 0
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._thread = None
+
+    # -------- viewers --------
+    def subscribe(self, app):
+        with self._cond:
+            self._subscribers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, args=(app,), name=f"live-{self.name}", daemon=True
+                )
+                self._thread.start()
+        self._wake.set()
+
+    def unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+            if not self._subscribers:
+                # Unwatched sections go stale; the next viewer waits for a fresh load
+                self._sections = {}
+
+    def notify_changed(self):
+        """The underlying data may have changed: reload now (if anyone is watching)."""
+        self._wake.set()
+
+    def resume_version(self, last_event_id):
+        """Version a reconnecting viewer already has, or None if it needs everything."""
+        token, _, version = (last_event_id or "").partition(":")
+        if token != self.token or not version.isdigit():
+            return None
+        version = int(version)
+        return version if version <= self.version else None
+
+    def event_id(self, version):
+        return f"{self.token}:{version}"
+
+    def changes_since(self, version):
+        """(current version, {section: html} changed after `version`; all if None)."""
+        with self._cond:
+            sections = {
+                name: s["html"] for name, s in self._sections.items()
+                if version is None or s["version"] > version
+            }
+            return self.version, sections
+
+    def wait(self, version, timeout):
+        """Block until the feed moves past `version`; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.version != version, timeout)
+
+    # -------- computation --------
+    def _publish(self, data):
+        changed = {}
+        for section, value in data.items():
+            digest = hashlib.sha1(repr(value).encode()).hexdigest()
+            current = self._sections.get(section)
+            if current is None or current["digest"] != digest:
+                changed[section] = (digest, self._render(section, value))
+        if not changed:
+            return
+        with self._cond:
+            self.version += 1
+            for section, (digest, html) in changed.items():
+                self._sections[section] = {"digest": digest, "html": html, "version": self.version}
+            self._cond.notify_all()
+
+    def _run(self, app):
+        interval = app.config[self._interval_key]
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            if not self._subscribers:
+                continue
+            try:
+                with app.app_context():
+                    self._publish(self._load())
+            except Exception as e:
+                logger.error(f"Live {self.name} update failed: {e}")
+
+
+# -----------------------------
+# Stream slots (host-wide cap)
+# -----------------------------
+def _acquire_slot(config):
+    directory = config["LIVE_ANALYTICS_SLOT_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    for i in range(config["LIVE_ANALYTICS_MAX_STREAMS"]):
+        f = open(os.path.join(directory, f"slot-{i}.lock"), "w")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return f
+        except OSError:
+            f.close()
+    return None
+
+
+def _event(event, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id else []
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+# -----------------------------
+# SSE response
+# -----------------------------
+def event_stream(feed, last_event_id=None):
+    """
+    text/event-stream response for one viewer of `feed`: a "sections" event
+    ({"sections": {name: html}}) whenever sections change, comments as
+    keep-alives, and a "busy" event instead when no slot is free.
+    """
+    config = current_app.config
+    slot = _acquire_slot(config)
+    if slot is None:
+        body = f"retry: {config['LIVE_ANALYTICS_BUSY_RETRY_MS']}\n" + _event("busy", {})
+        return Response(body, mimetype="text/event-stream", headers=SSE_HEADERS)
+
+    app = current_app._get_current_object()
+    heartbeat = config["LIVE_ANALYTICS_HEARTBEAT"]
+    lifetime = config["LIVE_ANALYTICS_STREAM_SECONDS"]
+    retry_ms = config["LIVE_ANALYTICS_RETRY_MS"]
+
+    def generate():
+        feed.subscribe(app)
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            version = feed.resume_version(last_event_id)
+            deadline = time.monotonic() + lifetime
+            while True:
+                current, sections = feed.changes_since(version)
+                if sections:
+                    yield _event("sections", {"sections": sections}, feed.event_id(current))
+                    version = current
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                if not feed.wait(current, min(heartbeat, remaining)):
+                    yield ": keep-alive\n\n"
+        finally:
+            feed.unsubscribe()
+
+    response = Response(generate(), mimetype="text/event-stream", headers=SSE_HEADERS)
+    # Also runs when the stream is closed before it started
+    response.call_on_close(slot.close)
+    return response
@@ -0,0 +1,151 @@
+"""
+Prometheus metrics, served at GET /metrics.
+
+  http_request_duration_seconds{blueprint,endpoint,method,status}
+  http_requests_in_progress{blueprint}
+  db_call_duration_seconds{database="postgres",operation}   SQL statements
+  db_call_duration_seconds{database="mongo",operation}      Mongo commands
+  pdf_render_duration_seconds{outcome}                       wkhtmltopdf runs
+  pdf_output_bytes
+
+Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(set in gunicorn.conf.py, which also clears it at start-up and drops dead
+workers' gauges), and /metrics aggregates all of them, whichever worker
+answers. Without that variable (flask run) the process-local registry is used.
+"""
+import os
+import time
+from flask import g, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from pymongo import monitoring
+from prometheus_client import (
+    CollectorRegistry, Histogram, Gauge, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+
+_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if _MULTIPROC_DIR:
+    os.makedirs(_MULTIPROC_DIR, exist_ok=True)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by blueprint and endpoint",
+    ["blueprint", "endpoint", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled, by blueprint",
+    ["blueprint"], multiprocess_mode="livesum"
+)
+DB_CALL_LATENCY = Histogram(
+    "db_call_duration_seconds", "Postgres statement / Mongo command duration",
+    ["database", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+PDF_RENDER_LATENCY = Histogram(
+    "pdf_render_duration_seconds", "wkhtmltopdf render time",
+    ["outcome"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, 300)
+)
+PDF_OUTPUT_BYTES = Histogram(
+    "pdf_output_bytes", "Size of PDFs produced by wkhtmltopdf",
+    buckets=(16e3, 64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6)
+)
+
+
+def observe_pdf_render(seconds, pdf=None):
+    """Record one wkhtmltopdf run; pdf is None when it failed."""
+    PDF_RENDER_LATENCY.labels("ok" if pdf is not None else "error").observe(seconds)
+    if pdf is not None:
+        PDF_OUTPUT_BYTES.observe(len(pdf))
+
+
+# -----------------------------
+# Postgres statements
+# -----------------------------
+def _sql_operation(statement):
+    # First keyword (SELECT, INSERT, ...); WITH queries are reported as WITH
+    word = statement.lstrip().split(None, 1)[0] if statement.strip() else ""
+    return word.upper()[:16] or "UNKNOWN"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("metrics_start_time")
+    if start_times:
+        DB_CALL_LATENCY.labels("postgres", _sql_operation(statement)).observe(
+            time.perf_counter() - start_times.pop()
+        )
+
+
+# -----------------------------
+# Mongo commands
+# -----------------------------
+class MongoCommandMetrics(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        DB_CALL_LATENCY.labels("mongo", event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        DB_CALL_LATENCY.labels("mongo", event.command_name).observe(event.duration_micros / 1e6)
+
+
+def mongo_listeners(app):
+    """Listeners to pass to the MongoClient (none when metrics are off)."""
+    return [MongoCommandMetrics()] if app.config["METRICS_ENABLED"] else []
+
+
+# -----------------------------
+# App wiring
+# -----------------------------
+_listeners_installed = False
+
+
+def metrics_response():
+    if _MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Install request hooks, SQL listeners and the /metrics route."""
+    global _listeners_installed
+    if not app.config["METRICS_ENABLED"]:
+        return
+
+    if not _listeners_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _listeners_installed = True
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_blueprint = request.blueprint or "app"
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_PROGRESS.labels(g.metrics_blueprint).inc()
+
+    @app.after_request
+    def _record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return
+        blueprint = g.pop("metrics_blueprint")
+        REQUESTS_IN_PROGRESS.labels(blueprint).dec()
+        status = g.pop("metrics_status", 500 if exc else 200)
+        REQUEST_LATENCY.labels(
+            blueprint, request.endpoint or "unmatched", request.method, str(status)
+        ).observe(time.perf_counter() - start)
+
+    app.add_url_rule("/metrics", "metrics", metrics_response)
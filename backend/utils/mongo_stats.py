@@ -0,0 +1,99 @@
+"""
+Personnel analytics computed in two aggregation round trips.
+
+The count breakdowns (blood group, city, state, gender) come from a single
+$facet over `employees_info`: each facet is a small grouped list, so the one
+document $facet returns stays far below the 16 MB BSON limit at any
+collection size. The per-employee qualification list grows with the
+collection, so it is streamed through its own cursor instead: from the
+`qualifications` collection, or from the fields embedded in `employees_info`
+only when that collection is empty or can't be read. The result is shaped
+exactly like the old per-query implementation so templates are unchanged.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+_QUALIFICATION_PIPELINE = [
+    {"$project": {
+        "_id": "$employee_id",
+        "name": "$name",
+        "qualifications": "$qualifications",
+        "experiences": "$experiences",
+        "count": {"$size": {"$ifNull": ["$qualifications", []]}}
+    }},
+    {"$sort": {"count": -1}}
+]
+
+
+def _count_by(field):
+    return [
+        {"$group": {"_id": field, "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}}
+    ]
+
+
+def build_stats_pipeline():
+    """Aggregation pipeline (run on employees_info) producing one facet document of counts."""
+    return [
+        {"$project": {
+            "blood_group": 1,
+            "gender": 1,
+            "residence.city": 1,
+            "residence.state": 1
+        }},
+        {"$facet": {
+            "blood_data": _count_by("$blood_group"),
+            "city_data": _count_by("$residence.city"),
+            "state_data": _count_by("$residence.state"),
+            "gender": [
+                {"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "male": {"$sum": {"$cond": [{"$eq": ["$gender", "Male"]}, 1, 0]}},
+                    "female": {"$sum": {"$cond": [{"$eq": ["$gender", "Female"]}, 1, 0]}}
+                }}
+            ]
+        }}
+    ]
+
+
+def collect_qualifications(db):
+    """Per-employee qualifications, preferring the dedicated collection over embedded fields."""
+    try:
+        rows = list(db.qualifications.aggregate(_QUALIFICATION_PIPELINE, allowDiskUse=True))
+    except Exception as e:
+        # As before: a broken qualifications collection falls back to employees_info
+        logger.warning(f"qualifications aggregate failed, using employees_info: {e}")
+        rows = []
+    if not rows:
+        rows = list(db.employees_info.aggregate(_QUALIFICATION_PIPELINE, allowDiskUse=True))
+    return rows
+
+
+def shape_stats(facet, qualification_data):
+    """Turn the facet document and qualification list into the dict the mongo_stats templates expect."""
+    gender = facet["gender"][0] if facet.get("gender") else {}
+    total_count = gender.get("total", 0)
+    male_count = gender.get("male", 0)
+    female_count = gender.get("female", 0)
+
+    return {
+        "blood_data": facet.get("blood_data", []),
+        "qualification_data": qualification_data,
+        "city_data": facet.get("city_data", []),
+        "state_data": facet.get("state_data", []),
+        "gender_stats": {
+            "male": male_count,
+            "female": female_count,
+            "male_percent": round((male_count / total_count * 100), 2) if total_count else 0,
+            "female_percent": round((female_count / total_count * 100), 2) if total_count else 0,
+            "total": total_count
+        }
+    }
+
+
+def collect_mongo_stats(db):
+    """Compute all personnel analytics: one $facet for the counts, one cursor for qualifications."""
+    facets = list(db.employees_info.aggregate(build_stats_pipeline(), allowDiskUse=True))
+    return shape_stats(facets[0] if facets else {}, collect_qualifications(db))
@@ -0,0 +1,223 @@
+"""
+OTP storage shared by every gunicorn worker.
+
+Backends (OTP_STORE):
+  "postgres" - the otp_codes table (db_init/otp_codes.sql), default
+  "sqlite"   - a local SQLite file (OTP_SQLITE_PATH), for single-host setups
+
+Both keep one row per email with a hashed code, an expiry time and a failed
+attempt counter. Every write first sweeps a bounded batch of expired rows
+through the expires_at index. Every TRIM_EVERY writes (per process) the
+table is also trimmed towards OTP_MAX_ENTRIES, oldest codes first and at
+most TRIM_BATCH rows, so the store stays small without a background job and
+without counting the table on every write.
+"""
+import hmac
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import text
+
+# Expired rows removed per write; keeps each sweep O(1)
+SWEEP_BATCH = 100
+# Size check every TRIM_EVERY writes, removing at most TRIM_BATCH rows; the
+# batch exceeds the rows added in between, so the store converges to the cap
+TRIM_EVERY = 100
+TRIM_BATCH = 2 * TRIM_EVERY
+
+
+def _hash(email, otp):
+    return hashlib.sha256(f"{email.lower()}:{otp}".encode("utf-8")).hexdigest()
+
+
+class OtpStore:
+    """Common verification logic; backends implement _put / _check."""
+
+    def __init__(self, ttl_seconds, max_entries, max_attempts):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_attempts = max_attempts
+        self.trim_every = TRIM_EVERY
+        self._puts = 0
+        self._puts_lock = threading.Lock()
+
+    def put(self, email, otp):
+        self._put(email.lower(), _hash(email, otp), self._trim_due())
+
+    def _trim_due(self):
+        with self._puts_lock:
+            self._puts += 1
+            return self._puts % self.trim_every == 0
+
+    def verify(self, email, otp_input):
+        """Return (ok, message). A matching code is consumed."""
+        return self._check(email.lower(), _hash(email, otp_input))
+
+    def _decide(self, record, otp_hash):
+        """(ok, message, action) for a locked record; action is 'delete', 'fail' or None."""
+        if record is None:
+            return False, "No OTP found or expired.", None
+        stored_hash, expired, attempts = record
+        if expired:
+            return False, "OTP expired.", "delete"
+        if attempts >= self.max_attempts:
+            return False, "Too many attempts. Please request a new OTP.", "delete"
+        if not hmac.compare_digest(stored_hash, otp_hash):
+            if attempts + 1 >= self.max_attempts:
+                return False, "Too many attempts. Please request a new OTP.", "delete"
+            return False, "Invalid OTP.", "fail"
+        return True, "OTP verified.", "delete"
+
+
+class PostgresOtpStore(OtpStore):
+    def __init__(self, engine, **kwargs):
+        super().__init__(**kwargs)
+        self.engine = engine
+
+    def _put(self, email, otp_hash, trim):
+        now = datetime.utcnow()
+        # Own short transaction: never commits whatever the request session holds
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                DELETE FROM otp_codes WHERE email IN (
+                    SELECT email FROM otp_codes WHERE expires_at < :now LIMIT :batch
+                )
+            """), {"now": now, "batch": SWEEP_BATCH})
+            conn.execute(text("""
+                INSERT INTO otp_codes (email, otp_hash, expires_at, attempts, created_at)
+                VALUES (:email, :otp_hash, :expires_at, 0, :now)
+                ON CONFLICT (email) DO UPDATE
+                SET otp_hash = EXCLUDED.otp_hash,
+                    expires_at = EXCLUDED.expires_at,
+                    attempts = 0,
+                    created_at = EXCLUDED.created_at
+            """), {
+                "email": email, "otp_hash": otp_hash, "now": now,
+                "expires_at": now + timedelta(seconds=self.ttl_seconds)
+            })
+            if trim:
+                conn.execute(text("""
+                    DELETE FROM otp_codes WHERE ctid IN (
+                        SELECT ctid FROM otp_codes ORDER BY expires_at
+                        LIMIT LEAST(GREATEST((SELECT count(*) FROM otp_codes) - :max_entries, 0), :batch)
+                    )
+                """), {"max_entries": self.max_entries, "batch": TRIM_BATCH})
+
+    def _check(self, email, otp_hash):
+        with self.engine.begin() as conn:
+            row = conn.execute(text("""
+                SELECT otp_hash, expires_at < :now AS expired, attempts
+                FROM otp_codes WHERE email = :email
+                FOR UPDATE
+            """), {"email": email, "now": datetime.utcnow()}).first()
+            ok, message, action = self._decide(tuple(row) if row else None, otp_hash)
+            if action == "delete":
+                conn.execute(text("DELETE FROM otp_codes WHERE email = :email"), {"email": email})
+            elif action == "fail":
+                conn.execute(text("UPDATE otp_codes SET attempts = attempts + 1 WHERE email = :email"), {"email": email})
+        return ok, message
+
+
+class SqliteOtpStore(OtpStore):
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS otp_codes (
+            email TEXT PRIMARY KEY,
+            otp_hash TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_otp_codes_expires ON otp_codes(expires_at);
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _put(self, email, otp_hash, trim):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                DELETE FROM otp_codes WHERE email IN (
+                    SELECT email FROM otp_codes WHERE expires_at < :now LIMIT :batch
+                )
+            """, {"now": now, "batch": SWEEP_BATCH})
+            conn.execute("""
+                INSERT INTO otp_codes (email, otp_hash, expires_at, attempts, created_at)
+                VALUES (:email, :otp_hash, :expires_at, 0, :now)
+                ON CONFLICT (email) DO UPDATE
+                SET otp_hash = excluded.otp_hash,
+                    expires_at = excluded.expires_at,
+                    attempts = 0,
+                    created_at = excluded.created_at
+            """, {"email": email, "otp_hash": otp_hash, "now": now, "expires_at": now + self.ttl_seconds})
+            if trim:
+                conn.execute("""
+                    DELETE FROM otp_codes WHERE email IN (
+                        SELECT email FROM otp_codes ORDER BY expires_at
+                        LIMIT MIN(MAX((SELECT count(*) FROM otp_codes) - :max_entries, 0), :batch)
+                    )
+                """, {"max_entries": self.max_entries, "batch": TRIM_BATCH})
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _check(self, email, otp_hash):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT otp_hash, expires_at < :now, attempts FROM otp_codes WHERE email = :email",
+                {"email": email, "now": time.time()}
+            ).fetchone()
+            ok, message, action = self._decide(row, otp_hash)
+            if action == "delete":
+                conn.execute("DELETE FROM otp_codes WHERE email = :email", {"email": email})
+            elif action == "fail":
+                conn.execute("UPDATE otp_codes SET attempts = attempts + 1 WHERE email = :email", {"email": email})
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return ok, message
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_otp_store():
+    """The configured store for the current app (created once per process)."""
+    app = current_app._get_current_object()
+    with _stores_lock:
+        store = _stores.get(id(app))
+        if store is None:
+            config = app.config
+            kwargs = {
+                "ttl_seconds": config["OTP_EXPIRY_MINUTES"] * 60,
+                "max_entries": config["OTP_MAX_ENTRIES"],
+                "max_attempts": config["OTP_MAX_ATTEMPTS"],
+            }
+            if config["OTP_STORE"] == "sqlite":
+                store = SqliteOtpStore(config["OTP_SQLITE_PATH"], **kwargs)
+            else:
+                from models.postgres_models import db
+                store = PostgresOtpStore(db.engine, **kwargs)
+            _stores[id(app)] = store
+    return store
@@ -0,0 +1,148 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import tuple_
+
+# -----------------------------
+# Keyset (seek) pagination helpers
+# -----------------------------
+# Pages are addressed by the (sort value, primary key) of the last row seen
+# instead of an OFFSET, so every page is an index range scan no matter how
+# deep the user has paged.
+
+
+def encode_cursor(values):
+    """Encode a tuple of key values into an opaque, URL-safe cursor."""
+    raw = json.dumps([v if isinstance(v, (int, float, str)) or v is None else str(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _cursor_value(value, column):
+    """Check a decoded value against `column`'s type; raises ValueError if it doesn't fit."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if value is None:
+        return None
+    if python_type is int:
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"expected an integer, got {value!r}")
+    elif python_type in (float, Decimal):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"expected a number, got {value!r}")
+    elif python_type is str:
+        if not isinstance(value, str):
+            raise ValueError(f"expected a string, got {value!r}")
+    elif issubclass(python_type, date):
+        # encode_cursor() wrote it with str(); a bad date would fail in the database
+        if not isinstance(value, str):
+            raise ValueError(f"expected a date, got {value!r}")
+        return python_type.fromisoformat(value)
+    return value
+
+
+def decode_cursor(cursor, columns=None):
+    """
+    Decode a cursor produced by encode_cursor(). Returns None if invalid.
+    With `columns` (the column expressions the values belong to), a cursor
+    whose values don't fit their column types is invalid too, e.g. one made
+    for a different sort order.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != 2:
+        return None
+    if columns is not None:
+        try:
+            values = [_cursor_value(v, c) for v, c in zip(values, columns)]
+        except ValueError:
+            return None
+    return tuple(values)
+
+
+def clamp_page_size(requested, default, maximum):
+    """Return a page size within [1, maximum], falling back to default."""
+    if not requested or requested < 1:
+        return default
+    return min(requested, maximum)
+
+
+class KeysetPage:
+    """One page of rows plus the cursors needed to move to its neighbours."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, per_page=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.per_page = per_page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def keyset_paginate(query, sort_column, sort_attr, key_column, key_attr,
+                    per_page, after=None, before=None, descending=False):
+    """
+    Apply seek pagination to a SQLAlchemy query.
+
+    `sort_column`/`key_column` are the column expressions to order by (the key
+    column must be unique, e.g. the primary key, to break ties) and
+    `sort_attr`/`key_attr` are the attribute names (or callables taking the
+    row) used to read the cursor values back off each returned row. Pass
+    `after` to move forward from a cursor or `before` to move backward; an
+    invalid cursor, or one that doesn't fit the columns, gives the first page.
+    """
+    after_values = decode_cursor(after, (sort_column, key_column))
+    before_values = decode_cursor(before, (sort_column, key_column))
+    backwards = before_values is not None
+    cursor_values = before_values if backwards else after_values
+
+    # Walking backwards is a forward walk in the opposite direction, reversed.
+    reverse_order = descending != backwards
+    key = tuple_(sort_column, key_column)
+    if cursor_values is not None:
+        query = query.filter(key < cursor_values if reverse_order else key > cursor_values)
+
+    if reverse_order:
+        query = query.order_by(sort_column.desc(), key_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), key_column.asc())
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def value(row, attr):
+        return attr(row) if callable(attr) else getattr(row, attr)
+
+    def cursor_for(row):
+        return encode_cursor((value(row, sort_attr), value(row, key_attr)))
+
+    if not rows:
+        return KeysetPage([], per_page=per_page)
+
+    if backwards:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor_values is not None
+
+    return KeysetPage(
+        rows,
+        next_cursor=cursor_for(rows[-1]) if has_next else None,
+        prev_cursor=cursor_for(rows[0]) if has_prev else None,
+        per_page=per_page
+    )
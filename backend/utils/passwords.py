@@ -0,0 +1,205 @@
+"""
+Password hashing on a bounded process pool.
+
+werkzeug's scrypt/pbkdf2 hashes are deliberately CPU-expensive. At most
+PASSWORD_HASH_MAX_PENDING hashes run at once on the whole host: each needs
+one of that many slot files (in PASSWORD_HASH_SLOT_DIR), held with flock, so
+the cap is shared by every gunicorn worker process. Callers that cannot get
+a slot within PASSWORD_HASH_WAIT seconds get HashingBusy, so a login storm
+is shed (503) instead of oversubscribing the CPU and tying up every worker.
+
+A hash runs inline in the worker by default (PASSWORD_HASH_WORKERS=0): a
+sync worker handles one request at a time, so a pool would only add IPC.
+With gthread/gevent workers, PASSWORD_HASH_WORKERS > 0 hands hashes to that
+many child processes per web process, off the GIL.
+
+PASSWORD_HASH_METHOD / PASSWORD_SALT_LENGTH set algorithm and cost using
+werkzeug's method syntax ("scrypt:32768:8:1", "pbkdf2:sha256:600000").
+verify_password reports a replacement hash when the stored one was made with
+other parameters, so callers can upgrade it after a successful login.
+
+The pool forks lazily from the worker (again after a fork, e.g. under
+gunicorn --preload); children only run werkzeug's hash functions.
+"""
+import os
+import time
+import fcntl
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+class HashingBusy(Exception):
+    """No hashing slot became free in time; ask the client to retry."""
+
+
+# -----------------------------
+# Work done in the pool
+# -----------------------------
+_method_prefixes = {}
+
+
+def _method_prefix(method):
+    """werkzeug's canonical "method:params" for a configured method ("scrypt" -> "scrypt:32768:8:1")."""
+    prefix = _method_prefixes.get(method)
+    if prefix is None:
+        prefix = generate_password_hash("", method, salt_length=1).split("$", 1)[0]
+        _method_prefixes[method] = prefix
+    return prefix
+
+
+def _needs_rehash(stored, method, salt_length):
+    parts = stored.split("$")
+    return len(parts) != 3 or parts[0] != _method_prefix(method) or len(parts[1]) != salt_length
+
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method, salt_length)
+
+
+def _check(stored, password, method, salt_length):
+    """(ok, new_hash): new_hash is set when the password matched but stored is outdated."""
+    if not check_password_hash(stored, password):
+        return False, None
+    if not _needs_rehash(stored, method, salt_length):
+        return True, None
+    return True, generate_password_hash(password, method, salt_length)
+
+
+# -----------------------------
+# Host-wide slots
+# -----------------------------
+# How often a caller waiting for a slot looks again
+_SLOT_POLL_SECONDS = 0.02
+
+
+class HashSlots:
+    """At most `count` holders at once across all processes: one flock'ed file per slot."""
+
+    def __init__(self, directory, count, wait_seconds):
+        self.directory = directory
+        self.count = count
+        self.wait_seconds = wait_seconds
+
+    def _try_acquire(self):
+        for i in range(self.count):
+            f = open(os.path.join(self.directory, f"slot-{i}.lock"), "w")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return f
+            except OSError:
+                f.close()
+        return None
+
+    def acquire(self):
+        """An open slot file (close it to release), or None after wait_seconds."""
+        os.makedirs(self.directory, exist_ok=True)
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            slot = self._try_acquire()
+            if slot is not None or time.monotonic() >= deadline:
+                return slot
+            time.sleep(_SLOT_POLL_SECONDS)
+
+
+# -----------------------------
+# Hasher
+# -----------------------------
+class PasswordHasher:
+    def __init__(self, method, salt_length, workers, max_pending, wait_seconds, slot_dir):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self._slots = HashSlots(slot_dir, max(max_pending, 1), wait_seconds)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("fork")
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _reset_pool(self, broken):
+        with self._lock:
+            if self._pool is broken:
+                self._pool = None
+        broken.shutdown(wait=False)
+
+    def _run(self, fn, *args):
+        slot = self._slots.acquire()
+        if slot is None:
+            raise HashingBusy("Password hashing is at capacity")
+        try:
+            if self.workers <= 0:
+                return fn(*args)
+            pool = self._get_pool()
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool:
+                # A child died (OOM kill etc.); start a fresh pool and retry once
+                logger.warning("Password hashing pool broke; recreating it")
+                self._reset_pool(pool)
+                return self._get_pool().submit(fn, *args).result()
+        finally:
+            slot.close()
+
+    def close(self):
+        """Stop this process's pool (a new one starts on the next hash)."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method, self.salt_length)
+
+    def verify(self, stored, password):
+        return self._run(_check, stored, password, self.method, self.salt_length)
+
+
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+def get_password_hasher():
+    """The configured hasher for the current app (created once per process)."""
+    app = current_app._get_current_object()
+    with _hashers_lock:
+        hasher = _hashers.get(id(app))
+        if hasher is None:
+            config = app.config
+            hasher = PasswordHasher(
+                method=config["PASSWORD_HASH_METHOD"],
+                salt_length=config["PASSWORD_SALT_LENGTH"],
+                workers=config["PASSWORD_HASH_WORKERS"],
+                max_pending=config["PASSWORD_HASH_MAX_PENDING"],
+                wait_seconds=config["PASSWORD_HASH_WAIT"],
+                slot_dir=config["PASSWORD_HASH_SLOT_DIR"]
+            )
+            _hashers[id(app)] = hasher
+    return hasher
+
+
+def hash_password(password):
+    """Hash a new password with the configured method."""
+    return get_password_hasher().hash(password)
+
+
+def verify_password(stored, password):
+    """
+    Check a password against its stored hash. Returns (ok, new_hash); new_hash
+    is not None when the stored hash should be replaced by it.
+    """
+    return get_password_hasher().verify(stored, password)
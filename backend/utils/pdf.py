@@ -0,0 +1,50 @@
+import time
+import shutil
+from flask import make_response, send_file
+from utils.metrics import observe_pdf_render
+
+# Fallback location used by the wkhtmltox .deb installed in the Dockerfile
+ALT_WKHTMLTOPDF_PATH = "/usr/local/bin/wkhtmltopdf"
+
+
+class PdfRenderError(Exception):
+    """wkhtmltopdf failed to render a document."""
+
+
+class WkhtmltopdfMissing(PdfRenderError):
+    """The wkhtmltopdf binary is not installed."""
+
+
+def wkhtmltopdf_path():
+    """Locate the wkhtmltopdf binary, or return None."""
+    return shutil.which("wkhtmltopdf") or shutil.which(ALT_WKHTMLTOPDF_PATH)
+
+
+def render_pdf(html, options=None):
+    """Render an HTML string to PDF bytes with wkhtmltopdf."""
+    path = wkhtmltopdf_path()
+    if not path:
+        raise WkhtmltopdfMissing("wkhtmltopdf not found in container")
+    import pdfkit  # loaded on first render, not at app start-up
+    config = pdfkit.configuration(wkhtmltopdf=path)
+    start = time.perf_counter()
+    try:
+        pdf = pdfkit.from_string(html, False, configuration=config, options=options)
+    except Exception as e:
+        observe_pdf_render(time.perf_counter() - start)
+        raise PdfRenderError(str(e)) from e
+    observe_pdf_render(time.perf_counter() - start, pdf)
+    return pdf
+
+
+def pdf_response(pdf, filename):
+    """Wrap PDF bytes in a download response."""
+    response = make_response(pdf)
+    response.headers["Content-Type"] = "application/pdf"
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+def pdf_file_response(f, filename):
+    """Stream an open PDF file (e.g. from the render cache) as a download."""
+    return send_file(f, mimetype="application/pdf", as_attachment=True, download_name=filename)
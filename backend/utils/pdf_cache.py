@@ -0,0 +1,190 @@
+"""
+Content-addressed cache of rendered PDF reports.
+
+A report is keyed by a SHA-256 of its template (name and source), the inputs
+it was rendered from (company name, details, search...) and a data version
+that changes whenever the underlying data does. Repeat downloads of the same
+report over unchanged data are served straight from disk instead of
+re-running the queries and wkhtmltopdf.
+
+Entries are plain files in PDF_CACHE_DIR, shared by every worker on the host.
+A hit bumps the file's mtime, and writes evict the least recently used files
+until the directory is back under PDF_CACHE_MAX_BYTES.
+"""
+import io
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from flask import current_app
+from utils.cache import count_event, read_counter, cache_stats
+
+logger = logging.getLogger(__name__)
+
+# Counter namespace for hits/misses/evictions (shared via utils.cache)
+PDF_CACHE_NAMESPACE = "pdf"
+
+_SUFFIX = ".pdf"
+
+
+# -----------------------------
+# Keys
+# -----------------------------
+def _template_source(template):
+    env = current_app.jinja_env
+    source, _filename, _uptodate = env.loader.get_source(env, template)
+    return source
+
+
+def report_key(template, inputs, data_version, options=None):
+    """SHA-256 over the template, its inputs, the data version and pdfkit options."""
+    payload = json.dumps(
+        {
+            "template": template,
+            "source": hashlib.sha256(_template_source(template).encode("utf-8")).hexdigest(),
+            "inputs": inputs,
+            "data_version": data_version,
+            "options": options,
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# -----------------------------
+# Disk store
+# -----------------------------
+class PdfCache:
+    """Size-bounded LRU of PDF files in a directory."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def open(self, key):
+        """Return an open file for `key`, or None. Marks the entry as recently used."""
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted between open() and utime(); the open handle still works
+        return f
+
+    def store(self, key, pdf):
+        """Atomically write `pdf` under `key`, then evict down to max_bytes."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp, self._path(key))
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(_SUFFIX):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = self._entries()
+        total = sum(size for _mtime, size, _path in entries)
+        evicted = 0
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                evicted += 1
+            except FileNotFoundError:
+                pass  # another worker evicted it first
+            total -= size
+        for _ in range(evicted):
+            count_event(PDF_CACHE_NAMESPACE, "evictions")
+        return evicted
+
+    def usage(self):
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _mtime, size, _path in entries),
+            "max_bytes": self.max_bytes,
+            "directory": self.directory,
+        }
+
+
+def _store():
+    config = current_app.config
+    return PdfCache(config["PDF_CACHE_DIR"], config["PDF_CACHE_MAX_BYTES"])
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+def cached_report(template, inputs, data_version, render, options=None):
+    """
+    Return an open binary file containing the PDF for this report.
+
+    On a hit the file comes from disk and `render` is never called; on a miss
+    `render()` produces the PDF bytes and the result is stored. Errors from
+    `render` (utils.pdf.PdfRenderError) propagate unchanged.
+    """
+    if not current_app.config["PDF_CACHE_ENABLED"]:
+        return _in_memory(render())
+
+    store = _store()
+    key = report_key(template, inputs, data_version, options)
+    f = store.open(key)
+    if f is not None:
+        count_event(PDF_CACHE_NAMESPACE, "hits")
+        return f
+
+    count_event(PDF_CACHE_NAMESPACE, "misses")
+    pdf = render()
+    try:
+        store.store(key, pdf)
+    except OSError as e:  # a full or read-only disk must not fail the download
+        logger.warning(f"Could not cache PDF {key}: {e}")
+    return _in_memory(pdf)
+
+
+def _in_memory(pdf):
+    return io.BytesIO(pdf)
+
+
+def pdf_cache_stats():
+    """Hit/miss/eviction counters plus current disk usage."""
+    stats = cache_stats(PDF_CACHE_NAMESPACE)
+    stats.pop("invalidations", None)
+    stats.pop("invalidated_at", None)
+    stats["evictions"] = read_counter(PDF_CACHE_NAMESPACE, "evictions")
+    stats.update(_store().usage())
+    stats["enabled"] = current_app.config["PDF_CACHE_ENABLED"]
+    return stats
+
@@ -0,0 +1,100 @@
+"""
+Large-report mode for the row-based PDF reports (employee / personnel).
+
+wkhtmltopdf lays out a whole document in one process, so a report with tens
+of thousands of rows is slow and memory hungry. Above PDF_CHUNK_THRESHOLD rows
+the rows are split into chunks of PDF_CHUNK_ROWS (a few pages each), every
+chunk is rendered by its own wkhtmltopdf process, PDF_CHUNK_WORKERS at a time,
+and the chunk PDFs are merged in order with "Page N of M" stamped on every
+page so numbering runs continuously across chunks.
+"""
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, render_template
+from utils.pdf import render_pdf
+
+logger = logging.getLogger(__name__)
+
+PAGE_NUMBER_FONT_SIZE = 8
+PAGE_NUMBER_BOTTOM = 14  # points from the bottom edge (inside the default margin)
+
+
+def render_rows_pdf(template, rows_name, rows, context, options=None):
+    """
+    Render `template` with `rows` bound to `rows_name` (plus `context`) to PDF
+    bytes, switching to parallel chunked rendering for large row counts.
+    """
+    config = current_app.config
+    if len(rows) <= config["PDF_CHUNK_THRESHOLD"]:
+        return render_pdf(render_template(template, **{rows_name: rows}, **context), options)
+    return render_chunked(
+        template, rows_name, rows, context, options,
+        chunk_rows=config["PDF_CHUNK_ROWS"],
+        workers=config["PDF_CHUNK_WORKERS"]
+    )
+
+
+def render_chunked(template, rows_name, rows, context, options=None, chunk_rows=500, workers=4):
+    """Render `rows` in chunks on parallel wkhtmltopdf processes and merge them."""
+    # Templates show their header only on the first chunk (chunk_index == 0),
+    # their closing footer only on the last, and number rows from row_offset.
+    chunks = []
+    for start in range(0, len(rows), chunk_rows):
+        chunks.append(render_template(
+            template,
+            **{rows_name: rows[start:start + chunk_rows]},
+            chunk_index=len(chunks),
+            chunk_last=start + chunk_rows >= len(rows),
+            row_offset=start,
+            **context
+        ))
+    logger.info(f"Rendering {template} in {len(chunks)} chunks of {chunk_rows} rows ({workers} workers)")
+
+    # Each render is a separate wkhtmltopdf process; the threads only wait on them
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pdfs = list(pool.map(lambda html: render_pdf(html, options), chunks))
+    return merge_pdfs(pdfs, number_pages=True)
+
+
+# -----------------------------
+# Merging
+# -----------------------------
+def merge_pdfs(pdfs, number_pages=False):
+    """Concatenate PDF documents (bytes) in order, optionally stamping page numbers."""
+    from pypdf import PdfReader, PdfWriter
+    writer = PdfWriter()
+    for pdf in pdfs:
+        writer.append(PdfReader(io.BytesIO(pdf)))
+    if number_pages:
+        _stamp_page_numbers(writer)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def _stamp_page_numbers(writer):
+    from pypdf import PageObject
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+    total = len(writer.pages)
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    for number, page in enumerate(writer.pages, start=1):
+        width = float(page.mediabox.width)
+        label = f"Page {number} of {total}"
+        # Helvetica averages ~0.5em per character, close enough to centre the label
+        x = (width - len(label) * PAGE_NUMBER_FONT_SIZE * 0.5) / 2
+
+        overlay = PageObject.create_blank_page(width=width, height=float(page.mediabox.height))
+        overlay[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/PgNo"): font})
+        })
+        stream = DecodedStreamObject()
+        stream.set_data(
+            f"BT /PgNo {PAGE_NUMBER_FONT_SIZE} Tf 0.45 g {x:.1f} {PAGE_NUMBER_BOTTOM} Td ({label}) Tj ET".encode()
+        )
+        overlay.replace_contents(stream)
+        page.merge_page(overlay)
@@ -0,0 +1,329 @@
+"""
+Batched, resumable bulk loader for personnel documents (employees_info).
+
+Reads a JSON array or NDJSON stream one document at a time, shapes and
+validates each document the way mongo_routes.add_personnel builds one from
+the form, and writes batches as unordered bulk upserts keyed on employee_id
+(so re-running a load, or a duplicate inside it, updates instead of failing).
+
+After every batch a checkpoint (documents consumed so far) is stored in the
+loader_checkpoints collection under the load's id; running the same load
+again skips what was already written and continues from there.
+
+Only depends on pymongo so db_init/init_mongo.py can use it without Flask;
+callers inside the app invalidate the personnel caches after a load.
+"""
+import json
+import hashlib
+import logging
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_COLLECTION = "loader_checkpoints"
+DEFAULT_BATCH_SIZE = 1000
+
+# Same limit as the personnel form (dep_name_1 .. dep_name_5)
+MAX_DEPENDENTS = 5
+
+# Stop collecting per-document errors past this many (counts stay exact)
+MAX_REPORTED_ERRORS = 1000
+
+_READ_SIZE = 64 * 1024
+
+
+# -----------------------------
+# Streaming parse
+# -----------------------------
+def iter_documents(stream):
+    """
+    Yield documents from a text stream holding either a JSON array of objects
+    or NDJSON (one object per line), without reading the whole file.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+    in_array = None
+
+    while True:
+        # Skip whitespace and array punctuation between documents
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            buf, pos = stream.read(_READ_SIZE), 0
+            eof = not buf
+        if pos >= len(buf):
+            return
+        if in_array is None:
+            in_array = buf[pos] == "["
+            if in_array:
+                pos += 1
+                continue
+        if in_array and buf[pos] == "]":
+            return
+
+        # Decode one object, reading more until it is complete
+        while True:
+            try:
+                doc, end = decoder.raw_decode(buf, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = stream.read(_READ_SIZE)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+        pos = end
+        yield doc
+
+
+# -----------------------------
+# Shaping / validation
+# -----------------------------
+def _str(value):
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _int(value, field, errors, default=None):
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        errors.append(f"{field} must be an integer")
+        return default
+
+
+def _sub(doc, key):
+    value = doc.get(key)
+    return value if isinstance(value, dict) else {}
+
+
+def shape_personnel(raw):
+    """
+    Return (document, errors) with `raw` shaped like add_personnel's document:
+    fixed sub-documents, capitalised gender, integer dependent counts/ages and
+    only complete dependents. Other top-level fields are kept as they are.
+    """
+    errors = []
+    if not isinstance(raw, dict):
+        return None, ["document is not an object"]
+
+    employee_id = _str(raw.get("employee_id"))
+    if not employee_id:
+        errors.append("employee_id is required")
+
+    residence = _sub(raw, "residence")
+    contact = _sub(raw, "contact")
+    emergency = _sub(raw, "emergency_contact")
+    family = _sub(raw, "family")
+
+    dependents = []
+    raw_dependents = family.get("dependents") or []
+    if not isinstance(raw_dependents, list):
+        errors.append("family.dependents must be a list")
+        raw_dependents = []
+    if len(raw_dependents) > MAX_DEPENDENTS:
+        errors.append(f"family.dependents has more than {MAX_DEPENDENTS} entries")
+    for i, dep in enumerate(raw_dependents[:MAX_DEPENDENTS], start=1):
+        if not isinstance(dep, dict):
+            errors.append(f"family.dependents[{i}] must be an object")
+            continue
+        name, relation = _str(dep.get("name")), _str(dep.get("relation"))
+        if not (name and relation and dep.get("age") not in (None, "")):
+            # The form silently drops incomplete dependent rows; so do we
+            continue
+        age = _int(dep.get("age"), f"family.dependents[{i}].age", errors)
+        if age is not None and age < 0:
+            errors.append(f"family.dependents[{i}].age must not be negative")
+        dependents.append({"name": name, "relation": relation, "age": age})
+
+    no_of_dependents = _int(family.get("no_of_dependents"), "family.no_of_dependents", errors, default=0)
+    if no_of_dependents is not None and no_of_dependents < 0:
+        errors.append("family.no_of_dependents must not be negative")
+
+    doc = {k: v for k, v in raw.items() if k != "_id"}
+    doc.update({
+        "employee_id": employee_id,
+        "name": _str(raw.get("name")),
+        "aadhaar": _str(raw.get("aadhaar")),
+        "pan": _str(raw.get("pan")),
+        "dob": _str(raw.get("dob")),
+        "gender": (_str(raw.get("gender")) or "").capitalize(),
+        "blood_group": _str(raw.get("blood_group")),
+        "residence": {
+            "address": _str(residence.get("address")),
+            "city": _str(residence.get("city")),
+            "state": _str(residence.get("state")),
+            "zip": _str(residence.get("zip"))
+        },
+        "contact": {
+            "phone": _str(contact.get("phone")),
+            "email": _str(contact.get("email"))
+        },
+        "emergency_contact": {
+            "name": _str(emergency.get("name")),
+            "phone": _str(emergency.get("phone"))
+        },
+        "family": {
+            "marital_status": _str(family.get("marital_status")),
+            "no_of_dependents": no_of_dependents,
+            "dependents": dependents
+        }
+    })
+    return doc, errors
+
+
+# -----------------------------
+# Load
+# -----------------------------
+def load_id_for(fileobj):
+    """Checkpoint key for a seekable file: SHA-256 of its content."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(1024 * 1024), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+class PersonnelLoad:
+    """Running totals for one load, persisted as its checkpoint."""
+
+    def __init__(self, load_id, checkpoint=None):
+        checkpoint = checkpoint or {}
+        self.load_id = load_id
+        self.consumed = checkpoint.get("consumed", 0)
+        self.upserted = checkpoint.get("upserted", 0)
+        self.modified = checkpoint.get("modified", 0)
+        self.matched = checkpoint.get("matched", 0)
+        self.invalid = checkpoint.get("invalid", 0)
+        self.failed = checkpoint.get("failed", 0)
+        self.resumed_from = self.consumed
+        self.errors = []
+
+    def add_error(self, index, employee_id, errors):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"index": index, "employee_id": employee_id, "errors": errors})
+
+    def checkpoint(self, status):
+        return {
+            "status": status,
+            "consumed": self.consumed,
+            "upserted": self.upserted,
+            "modified": self.modified,
+            "matched": self.matched,
+            "invalid": self.invalid,
+            "failed": self.failed,
+            "updated_at": datetime.utcnow(),
+        }
+
+    def summary(self, status):
+        summary = self.checkpoint(status)
+        del summary["updated_at"]
+        summary.update(load_id=self.load_id, resumed_from=self.resumed_from, errors=self.errors)
+        return summary
+
+
+def _write_batch(collection, batch, load):
+    """Unordered bulk upsert of [(index, doc)]; per-document failures are recorded."""
+    requests = [
+        UpdateOne({"employee_id": doc["employee_id"]}, {"$set": doc}, upsert=True)
+        for _index, doc in batch
+    ]
+    try:
+        result = collection.bulk_write(requests, ordered=False).bulk_api_result
+    except BulkWriteError as e:
+        result = e.details
+        for err in result.get("writeErrors", []):
+            index, doc = batch[err["index"]]
+            load.failed += 1
+            load.add_error(index, doc["employee_id"], [err.get("errmsg", "write failed")])
+    load.upserted += result.get("nUpserted", 0)
+    load.modified += result.get("nModified", 0)
+    load.matched += result.get("nMatched", 0)
+
+
+def load_personnel(db, stream, load_id, batch_size=DEFAULT_BATCH_SIZE, restart=False):
+    """
+    Load personnel documents from a text stream into db.employees_info.
+    Returns a summary dict; resumes from the checkpoint stored for load_id
+    unless restart=True.
+    """
+    checkpoints = db[CHECKPOINT_COLLECTION]
+    checkpoint = None if restart else checkpoints.find_one({"_id": load_id})
+    if checkpoint and checkpoint.get("status") == "done":
+        load = PersonnelLoad(load_id, checkpoint)
+        return load.summary("already_loaded")
+
+    load = PersonnelLoad(load_id, checkpoint)
+    collection = db.employees_info
+    batch = []
+    seen_in_batch = set()
+
+    def flush():
+        if batch:
+            _write_batch(collection, batch, load)
+            batch.clear()
+            seen_in_batch.clear()
+        checkpoints.replace_one({"_id": load_id}, load.checkpoint("running"), upsert=True)
+
+    for index, raw in enumerate(iter_documents(stream)):
+        if index < load.resumed_from:
+            continue
+        doc, errors = shape_personnel(raw)
+        if errors:
+            load.invalid += 1
+            load.add_error(index, raw.get("employee_id") if isinstance(raw, dict) else None, errors)
+        else:
+            # Two upserts of the same employee_id in one unordered batch could
+            # both insert; write what we have first so the second one updates.
+            if doc["employee_id"] in seen_in_batch:
+                flush()
+            batch.append((index, doc))
+            seen_in_batch.add(doc["employee_id"])
+        load.consumed = index + 1
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    checkpoints.update_one({"_id": load_id}, {"$set": {"status": "done"}})
+    logger.info(
+        f"Personnel load {load_id[:12]}: {load.consumed} documents "
+        f"({load.upserted} new, {load.modified} updated, {load.invalid} invalid, {load.failed} failed)"
+    )
+    return load.summary("done")
+
+
+def register_cli(app):
+    """`flask load-personnel FILE [--batch-size N] [--restart]`."""
+    import click
+
+    @app.cli.command("load-personnel")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--batch-size", type=int, default=None, help="Documents per bulk write.")
+    @click.option("--restart", is_flag=True, help="Ignore any checkpoint and load from the start.")
+    def load_personnel_command(path, batch_size, restart):
+        from utils.cache import invalidate, EMPLOYEE_360_CACHE_NAMESPACE, MONGO_ANALYTICS_CACHE_NAMESPACE
+
+        with open(path, "rb") as f:
+            load_id = load_id_for(f)
+        with open(path, encoding="utf-8-sig") as stream:
+            try:
+                result = load_personnel(
+                    app.config["MONGO"].db, stream, load_id,
+                    batch_size=batch_size or app.config["PERSONNEL_LOAD_BATCH_SIZE"],
+                    restart=restart
+                )
+            finally:
+                # Batches written before a failure are visible too
+                invalidate(EMPLOYEE_360_CACHE_NAMESPACE)
+                invalidate(MONGO_ANALYTICS_CACHE_NAMESPACE)
+        click.echo(json.dumps(result, indent=2, default=str))
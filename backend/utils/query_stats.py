@@ -0,0 +1,190 @@
+import re
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from collections import Counter
+from functools import wraps
+from flask import g, request, current_app, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_listeners_installed = False
+
+# Worker threads counting into a request's QueryStats (see counting_into)
+_thread_stats = threading.local()
+
+# -----------------------------
+# Statement shape normalisation
+# -----------------------------
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_BIND_PARAM = re.compile(r"%\(\w+\)s")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """Reduce a SQL statement to its shape so repeats with different values match."""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _BIND_PARAM.sub("?", shape)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+# -----------------------------
+# Per-request counters
+# -----------------------------
+class QueryStats:
+    """Statements executed while handling a single request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()
+        # Helper threads of the request may record concurrently
+        self._lock = threading.Lock()
+
+    def record(self, statement, elapsed):
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.total_time += elapsed
+            self.shapes[shape] += 1
+
+    def n_plus_one_suspects(self, threshold):
+        """Statement shapes repeated at least `threshold` times in this request."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+def current_query_stats():
+    """
+    Return the QueryStats for the active request (or the one this thread was
+    lent with counting_into), or None outside a request.
+    """
+    stats = getattr(_thread_stats, "stats", None)
+    if stats is not None:
+        return stats
+    if not has_request_context():
+        return None
+    return g.get("query_stats")
+
+
+@contextmanager
+def counting_into(stats):
+    """
+    Count this thread's statements into `stats`, a request's QueryStats
+    captured with current_query_stats() before handing work to a pool thread.
+    A None `stats` (no request) counts nothing.
+    """
+    previous = getattr(_thread_stats, "stats", None)
+    _thread_stats.stats = stats
+    try:
+        yield
+    finally:
+        _thread_stats.stats = previous
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    stats = current_query_stats()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+# -----------------------------
+# Query budgets
+# -----------------------------
+def query_budget(max_queries):
+    """
+    Declare the maximum number of SQL statements a view may issue.
+    Place directly under the @route decorator.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            return f(*args, **kwargs)
+        decorated_function.query_budget = max_queries
+        return decorated_function
+    return decorator
+
+
+def _budget_for_endpoint(endpoint):
+    view = current_app.view_functions.get(endpoint) if endpoint else None
+    return getattr(view, "query_budget", None)
+
+
+def assert_query_budget(client, method, path, budget=None, **kwargs):
+    """
+    Test helper: issue a request through a Flask test client and assert it stayed
+    within the query budget declared on its view (or the explicit `budget`).
+    Returns the response so callers can make further assertions.
+    """
+    response = client.open(path, method=method, **kwargs)
+    count = int(response.headers.get("X-DB-Query-Count", 0))
+    if budget is None:
+        budget = response.headers.get("X-DB-Query-Budget")
+        assert budget is not None, f"{method} {path} has no declared query budget"
+        budget = int(budget)
+    assert count <= budget, (
+        f"{method} {path} issued {count} queries, budget is {budget}; "
+        f"N+1 suspects: {response.headers.get('X-DB-NPlus1-Suspects', 'none')}"
+    )
+    return response
+
+
+# -----------------------------
+# App wiring
+# -----------------------------
+def init_query_stats(app):
+    """Install engine listeners and per-request hooks on the Flask app."""
+    global _listeners_installed
+    if not app.config.get("QUERY_STATS_ENABLED", True):
+        return
+
+    if not _listeners_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _listeners_installed = True
+
+    threshold = app.config.get("QUERY_NPLUS1_THRESHOLD", 3)
+
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats = QueryStats()
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = current_query_stats()
+        if stats is None:
+            return response
+
+        suspects = stats.n_plus_one_suspects(threshold)
+        budget = _budget_for_endpoint(request.endpoint)
+
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-ms"] = f"{stats.total_time * 1000:.2f}"
+        if budget is not None:
+            response.headers["X-DB-Query-Budget"] = str(budget)
+        if suspects:
+            response.headers["X-DB-NPlus1-Suspects"] = str(len(suspects))
+
+        summary = f"{request.method} {request.path} -> {stats.count} queries in {stats.total_time * 1000:.2f} ms"
+        if suspects:
+            for shape, n in suspects:
+                logger.warning(f"Possible N+1 on {request.endpoint}: {n}x {shape[:200]}")
+        if budget is not None and stats.count > budget:
+            logger.warning(f"Query budget exceeded: {summary} (budget {budget})")
+        else:
+            logger.info(summary)
+        return response
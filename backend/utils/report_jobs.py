@@ -0,0 +1,199 @@
+import os
+import socket
+import threading
+import logging
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from models.postgres_models import db, ReportJob
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_advisory_xact_lock: serialises job claims so the
+# "running" count check and the claim happen atomically across workers.
+CLAIM_LOCK_KEY = 728402
+
+# -----------------------------
+# Report builders
+# -----------------------------
+# kind -> function(params) returning (open PDF file, filename). Builders go
+# through utils.pdf_cache, so a queued job for an unchanged report is served
+# from the render cache too. Route modules register their builders with
+# @report_builder so the same code renders a report inline or from the queue.
+REPORT_BUILDERS = {}
+
+
+def report_builder(kind):
+    def decorator(f):
+        REPORT_BUILDERS[kind] = f
+        return f
+    return decorator
+
+
+class QueueFull(Exception):
+    """Too many report jobs are already waiting."""
+
+
+# -----------------------------
+# Queue operations
+# -----------------------------
+def enqueue_report(kind, params, config):
+    """Queue a report job and return its id. Raises QueueFull under backpressure."""
+    if kind not in REPORT_BUILDERS:
+        raise KeyError(kind)
+    queued = db.session.execute(
+        text("SELECT count(*) FROM report_jobs WHERE status = 'queued'")
+    ).scalar()
+    if queued >= config["REPORT_MAX_QUEUED"]:
+        raise QueueFull(f"{queued} report jobs already queued")
+
+    job = ReportJob(id=uuid.uuid4().hex, kind=kind, params=params, status="queued")
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def get_job(job_id):
+    return db.session.get(ReportJob, job_id)
+
+
+def _worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def claim_next_job(max_running):
+    """Atomically move the oldest queued job to running, respecting the global cap."""
+    db.session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CLAIM_LOCK_KEY})
+    row = db.session.execute(text("""
+        UPDATE report_jobs
+        SET status = 'running',
+            started_at = NOW() AT TIME ZONE 'utc',
+            attempts = attempts + 1,
+            worker = :worker
+        WHERE id = (
+            SELECT id FROM report_jobs
+            WHERE status = 'queued'
+            ORDER BY created_at
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        AND (SELECT count(*) FROM report_jobs WHERE status = 'running') < :max_running
+        RETURNING id, kind, params
+    """), {"worker": _worker_name(), "max_running": max_running}).mappings().first()
+    db.session.commit()
+    return dict(row) if row else None
+
+
+def _finish_job(job_id, ttl_seconds, **fields):
+    now = datetime.utcnow()
+    db.session.query(ReportJob).filter_by(id=job_id).update(
+        dict(fields, finished_at=now, expires_at=now + timedelta(seconds=ttl_seconds))
+    )
+    db.session.commit()
+
+
+def run_job(job, config):
+    """Render one claimed job and store the result (or the error)."""
+    builder = REPORT_BUILDERS.get(job["kind"])
+    try:
+        if builder is None:
+            raise KeyError(f"Unknown report kind: {job['kind']}")
+        f, filename = builder(job["params"] or {})
+        with f:
+            pdf = f.read()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Report job {job['id']} ({job['kind']}) failed: {e}")
+        _finish_job(job["id"], config["REPORT_RESULT_TTL"], status="failed", error=str(e))
+        return False
+
+    _finish_job(
+        job["id"], config["REPORT_RESULT_TTL"],
+        status="done", result=pdf, result_size=len(pdf), filename=filename
+    )
+    return True
+
+
+def sweep_jobs(config):
+    """Requeue jobs orphaned by a dead worker and delete expired results."""
+    db.session.execute(text("""
+        UPDATE report_jobs
+        SET status = CASE WHEN attempts < :max_attempts THEN 'queued' ELSE 'failed' END,
+            error = CASE WHEN attempts < :max_attempts THEN error ELSE 'Timed out' END,
+            expires_at = NOW() AT TIME ZONE 'utc' + make_interval(secs => :ttl)
+        WHERE status = 'running'
+          AND started_at < NOW() AT TIME ZONE 'utc' - make_interval(secs => :timeout)
+    """), {
+        "max_attempts": config["REPORT_MAX_ATTEMPTS"],
+        "ttl": config["REPORT_RESULT_TTL"],
+        "timeout": config["REPORT_JOB_TIMEOUT"]
+    })
+    deleted = db.session.execute(text("""
+        DELETE FROM report_jobs
+        WHERE status IN ('done', 'failed') AND expires_at < NOW() AT TIME ZONE 'utc'
+    """)).rowcount
+    db.session.commit()
+    return deleted
+
+
+# -----------------------------
+# Worker
+# -----------------------------
+def run_worker(app, stop_event):
+    """Claim and render jobs until stop_event is set."""
+    config = app.config
+    idle_wait = config["REPORT_POLL_INTERVAL"]
+    sweep_every = timedelta(seconds=config["REPORT_SWEEP_INTERVAL"])
+    last_sweep = datetime.min
+
+    while not stop_event.is_set():
+        job = None
+        with app.app_context():
+            try:
+                if datetime.utcnow() - last_sweep >= sweep_every:
+                    sweep_jobs(config)
+                    last_sweep = datetime.utcnow()
+                job = claim_next_job(config["REPORT_MAX_CONCURRENT"])
+                if job:
+                    run_job(job, config)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Report worker error: {e}")
+            finally:
+                db.session.remove()
+        if not job:
+            stop_event.wait(idle_wait)
+
+
+_worker_stop = None
+
+
+def start_report_workers(app):
+    """Start this process's embedded report worker threads (once)."""
+    global _worker_stop
+    threads = app.config["REPORT_WORKER_THREADS"]
+    if _worker_stop is not None or threads <= 0:
+        return _worker_stop
+    _worker_stop = threading.Event()
+    for i in range(threads):
+        threading.Thread(
+            target=run_worker,
+            args=(app, _worker_stop),
+            name=f"report-worker-{i}",
+            daemon=True
+        ).start()
+    return _worker_stop
+
+
+def register_cli(app):
+    """`flask report-worker` runs a standalone worker (set REPORT_WORKER_THREADS=0 on web nodes)."""
+    import click
+
+    @app.cli.command("report-worker")
+    def report_worker_command():
+        click.echo("Report worker started. Ctrl+C to stop.")
+        stop = threading.Event()
+        try:
+            run_worker(app, stop)
+        except KeyboardInterrupt:
+            stop.set()
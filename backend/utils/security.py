@@ -1,14 +1,17 @@
 import os
 import secrets
-from datetime import datetime, timedelta
 from dotenv import load_dotenv
-import sib_api_v3_sdk
-from sib_api_v3_sdk.rest import ApiException
+from utils.otp_store import get_otp_store
+from utils.email_outbox import enqueue_email, email_template
 
 load_dotenv()
 
-# OTP in-memory store: {email: {"otp": str, "expires_at": datetime}}
-otp_cache = {}
+# OTPs live in a store shared by all workers (Postgres table or SQLite file),
+# see utils/otp_store.py. OTP emails go through the outbox in
+# utils/email_outbox.py, so requests never wait on the email provider; the
+# code itself is generated when the email is sent and only its hash is stored.
+
+OTP_SUBJECT = "Your Password Reset OTP"
 
 def generate_otp(length=6):
     """Generate a secure numeric OTP."""
@@ -16,46 +19,19 @@ def generate_otp(length=6):
 
 def store_otp(email, otp):
     """Store OTP with expiry."""
-    expiry_time = datetime.utcnow() + timedelta(minutes=int(os.getenv("OTP_EXPIRY_MINUTES", 5)))
-    otp_cache[email] = {"otp": otp, "expires_at": expiry_time}
+    get_otp_store().put(email, otp)
 
 def verify_stored_otp(email, otp_input):
     """Verify OTP and remove it if valid."""
-    if email not in otp_cache:
-        return False, "No OTP found or expired."
-
-    record = otp_cache[email]
-    if datetime.utcnow() > record["expires_at"]:
-        del otp_cache[email]
-        return False, "OTP expired."
-
-    if record["otp"] != otp_input:
-        return False, "Invalid OTP."
+    return get_otp_store().verify(email, otp_input)
 
-    del otp_cache[email]
-    return True, "OTP verified."
-
-def initiate_email_otp_flow(email):
-    """Generate OTP, store it, and send via Brevo email."""
+@email_template("password_reset_otp")
+def otp_email_body(email):
+    """A fresh OTP for each send attempt; the latest one emailed is the valid one."""
     otp = generate_otp()
     store_otp(email, otp)
+    return f"Your OTP is: {otp}\nIt expires in {os.getenv('OTP_EXPIRY_MINUTES', 5)} minutes."
 
-    configuration = sib_api_v3_sdk.Configuration()
-    configuration.api_key['api-key'] = os.getenv("BREVO_API_KEY")
-
-    sender_email = os.getenv("BREVO_SENDER_EMAIL")
-    subject = "Your Password Reset OTP"
-    content = f"Your OTP is: {otp}\nIt expires in {os.getenv('OTP_EXPIRY_MINUTES', 5)} minutes."
-
-    api_instance = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
-    send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
-        to=[{"email": email}],
-        sender={"email": sender_email},
-        subject=subject,
-        text_content=content
-    )
-
-    try:
-        api_instance.send_transac_email(send_smtp_email)
-    except ApiException as e:
-        raise Exception(f"Failed to send OTP email: {e}")
+def initiate_email_otp_flow(email):
+    """Queue the OTP email; the code is generated and stored when it is sent."""
+    enqueue_email(email, OTP_SUBJECT, template="password_reset_otp")
@@ -1,7 +1,99 @@
-from flask import session
+import threading
+from cachetools import TTLCache
+from flask import session, g, current_app
 from models.user import User
 from models.postgres_models import db
 
+# -----------------------------
+# User record cache
+# -----------------------------
+# Two levels: g holds the users already looked up in this request, and each
+# worker keeps a TTLCache of recent users (USER_CACHE_TTL seconds,
+# USER_CACHE_SIZE entries). Cached users are plain copies, not attached to
+# the session: use them for reads only and load with User.query.get before
+# writing, then call forget_user(). Password hashes are never cached.
+# Other workers drop their copy when the change feed reports the write
+# (utils/change_feed.py), or at the latest when it expires.
+_USER_FIELDS = [c.key for c in User.__table__.columns if c.key != "password_hash"]
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+_user_cache_stats = {"request_hits": 0, "worker_hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _worker_cache():
+    global _user_cache
+    if _user_cache is None:
+        config = current_app.config
+        _user_cache = TTLCache(maxsize=config["USER_CACHE_SIZE"], ttl=config["USER_CACHE_TTL"])
+    return _user_cache
+
+
+def _copy(snapshot):
+    return User(**snapshot)
+
+
+def remember_user(user):
+    """Cache `user` as it is now and return a detached copy of it."""
+    snapshot = {field: getattr(user, field) for field in _USER_FIELDS}
+    with _user_cache_lock:
+        _worker_cache()[user.id] = snapshot
+    copy = _copy(snapshot)
+    g.setdefault("cached_users", {})[user.id] = copy
+    return copy
+
+
+def get_user(user_id):
+    """Read-only User for user_id, from the request or worker cache when possible."""
+    request_cache = g.setdefault("cached_users", {})
+    if user_id in request_cache:
+        _user_cache_stats["request_hits"] += 1
+        return request_cache[user_id]
+
+    with _user_cache_lock:
+        snapshot = _worker_cache().get(user_id)
+    if snapshot is not None:
+        _user_cache_stats["worker_hits"] += 1
+        request_cache[user_id] = _copy(snapshot)
+        return request_cache[user_id]
+
+    _user_cache_stats["misses"] += 1
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    return remember_user(user)
+
+
+def forget_user(user_id):
+    """Drop user_id from this worker's caches after it was changed or deleted."""
+    with _user_cache_lock:
+        _worker_cache().pop(user_id, None)
+    g.get("cached_users", {}).pop(user_id, None)
+    _user_cache_stats["invalidations"] += 1
+
+
+def forget_users(user_ids=None):
+    """Drop user_ids (all users if None) from this worker's cache; no request needed."""
+    with _user_cache_lock:
+        cache = _worker_cache()
+        if user_ids is None:
+            cache.clear()
+        else:
+            for user_id in user_ids:
+                cache.pop(user_id, None)
+    _user_cache_stats["invalidations"] += 1
+
+
+def user_cache_stats():
+    """This worker's user cache counters and hit rate."""
+    stats = dict(_user_cache_stats)
+    lookups = stats["request_hits"] + stats["worker_hits"] + stats["misses"]
+    stats["lookups"] = lookups
+    stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else None
+    with _user_cache_lock:
+        stats["size"] = len(_worker_cache())
+    return stats
+
 # -----------------------------
 # Get Current Logged-in User
 # -----------------------------
@@ -9,7 +101,7 @@ def current_user():
     user_id = session.get("user_id")
     if not user_id:
         return None
-    return User.query.get(user_id)
+    return get_user(user_id)
 
 # -----------------------------
 # Clear Session on Logout
@@ -0,0 +1,13 @@
+"""
+Benchmark suite for the HR backend (run from the repo root).
+
+    python -m benchmarks.datagen --scale 100k      # deterministic synthetic data
+    python -m benchmarks.micro --out before.json   # in-process microbenchmarks
+    python -m benchmarks.load --url http://localhost:5000 --out load.json
+    python -m benchmarks.compare before.json after.json
+
+All of them talk to the local Postgres / Mongo containers from
+docker-compose.yml; results are JSON files tagged with the git commit so runs
+from different commits can be compared. The bench_*.py scripts are standalone
+comparisons of one change each.
+"""
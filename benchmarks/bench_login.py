@@ -0,0 +1,214 @@
+"""
+Benchmark: password-check throughput under concurrent logins.
+
+Usage (from the repo root):
+    python benchmarks/bench_login.py --logins 200 --concurrency 16
+    python benchmarks/bench_login.py --sync-workers 4 --seconds 20
+    python benchmarks/bench_login.py --url http://localhost:5000 \
+        --user alice --password secret --logins 200 --concurrency 16
+
+Without --url no database or server is needed: it runs the password check
+that /auth/signin performs, from --concurrency threads, inline (the old
+check_password_hash call in the request) and through utils.passwords'
+hasher, and reports logins/s, latency percentiles and how many attempts were
+shed as busy.
+
+--sync-workers N models the deployed gunicorn sync workers instead: N
+processes, each handling one sign-in at a time, back to back, for --seconds.
+It compares the unbounded inline check, a per-process pool (each worker with
+its own children and no shared cap) and inline checks under the host-wide
+slots (--max-pending of them). Besides successful logins/s and latency it
+reports how long a worker stays busy per attempt, shed ones included: that
+is the capacity a login storm takes from every other request. One run on a
+1-CPU host (--sync-workers 4 --seconds 15 --workers 2 --max-pending 1
+--wait 0.25):
+
+    inline, unbounded        7.5 logins/s  p50 543 ms  p95  598 ms  shed   0  busy/attempt 543 ms
+    pool x2/process          7.2 logins/s  p50 523 ms  p95 1044 ms  shed   0  busy/attempt 563 ms
+    inline, host slots x1    7.1 logins/s  p50 143 ms  p95  159 ms  shed 170  busy/attempt 219 ms
+
+Hashing is CPU-bound, so successful logins/s is set by the cores given to
+it. What the shared slots change is that each admitted login runs at full
+speed (4x lower latency), and that the excess is turned away quickly, so
+workers stay free for other requests. A per-process pool adds nothing
+under sync workers.
+
+With --url it posts real sign-ins to a running server instead (expect 302 on
+success, 503 when hashing is at capacity).
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from utils.passwords import HashingBusy, PasswordHasher  # noqa: E402
+
+
+def run(label, attempt, logins, concurrency):
+    def timed(_):
+        start = time.perf_counter()
+        ok = attempt()
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(timed, range(logins)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(t for ok, t in results if ok)
+    shed = sum(1 for ok, _ in results if not ok)
+    if latencies:
+        p50 = statistics.median(latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    else:
+        p50 = p95 = float("nan")
+    print(f"{label:<14} {len(latencies) / elapsed:8.1f} logins/s  "
+          f"p50 {p50 * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms  shed {shed}")
+
+
+def local_attempts(args):
+    stored = generate_password_hash(args.password, args.method, args.salt_length)
+    hasher = PasswordHasher(args.method, args.salt_length, args.workers,
+                            args.max_pending, args.wait, tempfile.mkdtemp(prefix="bench_login_"))
+
+    def inline():
+        return check_password_hash(stored, args.password)
+
+    def pooled():
+        try:
+            return hasher.verify(stored, args.password)[0]
+        except HashingBusy:
+            return False
+
+    hasher.verify(stored, args.password)  # start the pool outside the timing
+    return [("inline", inline), (f"hasher x{args.workers}", pooled)]
+
+
+# -----------------------------
+# Sync workers
+# -----------------------------
+def _sync_worker(make_attempt, seconds, start_at, results):
+    attempt, close = make_attempt()
+    while time.time() < start_at:
+        time.sleep(0.001)
+    records = []
+    while time.time() < start_at + seconds:
+        began = time.perf_counter()
+        ok = attempt()
+        records.append((ok, time.perf_counter() - began))
+    close()
+    results.put(records)
+
+
+def run_sync(label, make_attempt, workers, seconds):
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    start_at = time.time() + 0.5
+    procs = [ctx.Process(target=_sync_worker, args=(make_attempt, seconds, start_at, results))
+             for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    records = [r for _ in procs for r in results.get()]
+    for proc in procs:
+        proc.join()
+
+    ok = sorted(t for success, t in records if success)
+    shed = [t for success, t in records if not success]
+    busy_per_attempt = sum(t for _, t in records) / len(records)
+    p50 = statistics.median(ok) if ok else float("nan")
+    p95 = ok[min(len(ok) - 1, int(len(ok) * 0.95))] if ok else float("nan")
+    print(f"{label:<22} {len(ok) / seconds:8.1f} logins/s  p50 {p50 * 1000:7.1f} ms  "
+          f"p95 {p95 * 1000:7.1f} ms  shed {len(shed)}  worker busy/attempt {busy_per_attempt * 1000:7.1f} ms")
+
+
+def sync_configs(args):
+    stored = generate_password_hash(args.password, args.method, args.salt_length)
+    slot_dir = tempfile.mkdtemp(prefix="bench_login_")
+    unbounded = args.sync_workers * max(args.workers, 1)
+
+    def inline():
+        return (lambda: check_password_hash(stored, args.password)), (lambda: None)
+
+    def hashed(workers, max_pending, directory):
+        def make():
+            # One hasher per worker process, as each gunicorn worker builds its own
+            hasher = PasswordHasher(args.method, args.salt_length, workers, max_pending, args.wait,
+                                    directory or tempfile.mkdtemp(prefix="bench_login_"))
+
+            def attempt():
+                try:
+                    return hasher.verify(stored, args.password)[0]
+                except HashingBusy:
+                    return False
+            return attempt, hasher.close
+        return make
+
+    return [
+        ("inline, unbounded", inline),
+        (f"pool x{args.workers}/process", hashed(args.workers, unbounded, None)),
+        (f"inline, host slots x{args.max_pending}", hashed(0, args.max_pending, slot_dir)),
+    ]
+
+
+def http_attempt(args):
+    url = args.url.rstrip("/") + "/auth/signin"
+    body = urllib.parse.urlencode({"username_or_email": args.user, "password": args.password}).encode()
+
+    class NoRedirect(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, *a, **kw):
+            return None
+
+    opener = urllib.request.build_opener(NoRedirect)
+
+    def attempt():
+        try:
+            opener.open(url, data=body, timeout=60)
+        except urllib.error.HTTPError as e:
+            return e.code == 302
+        return False
+
+    return [("http", attempt)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--method", default="scrypt:32768:8:1")
+    parser.add_argument("--salt-length", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=8)
+    parser.add_argument("--wait", type=float, default=0.5)
+    parser.add_argument("--sync-workers", type=int, default=0, metavar="N",
+                        help="Model N gunicorn sync workers instead of threads")
+    parser.add_argument("--seconds", type=float, default=20, help="Duration of each --sync-workers run")
+    parser.add_argument("--url", help="Benchmark a running server instead")
+    parser.add_argument("--user", default="bench")
+    parser.add_argument("--password", default="correct horse battery staple")
+    args = parser.parse_args()
+
+    if args.sync_workers:
+        print(f"{args.sync_workers} sync workers, {args.seconds:g}s per run, method {args.method}, "
+              f"{os.cpu_count()} CPUs")
+        for label, make_attempt in sync_configs(args):
+            run_sync(label, make_attempt, args.sync_workers, args.seconds)
+        return
+
+    attempts = http_attempt(args) if args.url else local_attempts(args)
+    print(f"{args.logins} logins, {args.concurrency} concurrent, method {args.method}")
+    for label, attempt in attempts:
+        run(label, attempt, args.logins, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
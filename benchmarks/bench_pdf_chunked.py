@@ -0,0 +1,116 @@
+"""
+Benchmark: large employee/personnel PDF reports, single-shot vs chunked.
+
+Usage (from the repo root; needs wkhtmltopdf, no database):
+    python benchmarks/bench_pdf_chunked.py --rows 20000 --chunk-rows 500 --workers 4
+
+Renders the same synthetic rows through the current single-shot path
+(one pdfkit.from_string call on the whole document) and through
+utils.pdf_chunked.render_chunked, and reports wall-clock time, page count,
+output size and the peak RSS of the wkhtmltopdf child processes. The RSS
+figure is a high-water mark for the whole run, so compare memory with
+--mode single and --mode chunked in separate runs.
+"""
+import argparse
+import io
+import os
+import resource
+import sys
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from flask import Flask, render_template
+from pypdf import PdfReader
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from utils.pdf import render_pdf  # noqa: E402
+from utils.pdf_chunked import render_chunked  # noqa: E402
+
+TEMPLATES = os.path.join(os.path.dirname(__file__), "..", "backend", "templates")
+
+
+def employee_rows(n):
+    return [
+        SimpleNamespace(
+            emp_id=i,
+            full_name=f"First{i} Last{i}",
+            dob=date(1980, 1, 1) + timedelta(days=i % 9000),
+            gender=("Male", "Female")[i % 2],
+            email=f"user{i}@example.com",
+            phone=f"98{i:08d}",
+            hire_date=date(2010, 1, 1) + timedelta(days=i % 4000),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def personnel_rows(n):
+    return [
+        {
+            "employee_id": f"E{i:05d}",
+            "name": f"Person {i}",
+            "aadhaar": f"{i:012d}",
+            "pan": f"ABCDE{i % 10000:04d}F",
+            "dob": "1990-01-01",
+            "contact": {"email": f"p{i}@example.com", "phone": f"97{i:08d}"},
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+REPORTS = {
+    "employee": ("employee_report.html", "employees", employee_rows),
+    "personnel": ("personnel_report.html", "personnel", personnel_rows),
+}
+
+
+def child_peak_rss_mb():
+    # ru_maxrss is the largest single child process seen so far (KiB on Linux)
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+
+def describe(label, pdf, elapsed):
+    pages = len(PdfReader(io.BytesIO(pdf)).pages)
+    print(f"{label:<12} {elapsed:8.2f}s  {pages:6d} pages  {len(pdf) / 1e6:7.2f} MB  "
+          f"child peak RSS {child_peak_rss_mb():7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--report", choices=sorted(REPORTS), default="employee")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--chunk-rows", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--mode", choices=["both", "single", "chunked"], default="both")
+    args = parser.parse_args()
+
+    template, rows_name, make_rows = REPORTS[args.report]
+    rows = make_rows(args.rows)
+    context = {
+        "company_name": "Benchmark Corp",
+        "company_details": "",
+        "generated_on": date.today().isoformat(),
+        "generated_time": "00:00:00",
+    }
+
+    app = Flask(__name__, template_folder=TEMPLATES)
+    with app.test_request_context():
+        print(f"{args.report} report, {args.rows} rows")
+
+        if args.mode in ("both", "single"):
+            start = time.perf_counter()
+            html = render_template(template, **{rows_name: rows}, **context)
+            pdf = render_pdf(html)
+            describe("single-shot", pdf, time.perf_counter() - start)
+
+        if args.mode == "single":
+            return
+        start = time.perf_counter()
+        pdf = render_chunked(template, rows_name, rows, context,
+                             chunk_rows=args.chunk_rows, workers=args.workers)
+        describe(f"chunked x{args.workers}", pdf, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare two benchmark result files (micro or load) from different commits.
+
+    python -m benchmarks.compare results/base.json results/new.json [--metric median_ms] [--threshold 0.10]
+
+Prints the change of --metric for every benchmark present in both files and
+exits with status 1 when any got slower by more than --threshold (a
+fraction), so it can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="median_ms")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    base, new = load(args.base), load(args.new)
+    if base["kind"] != new["kind"]:
+        raise SystemExit(f"Cannot compare a {base['kind']} run with a {new['kind']} run")
+    print(f"base {base['meta'].get('commit', '?')[:10]}  ->  new {new['meta'].get('commit', '?')[:10]}  "
+          f"({args.metric}, threshold {args.threshold:.0%})")
+    for key in ("dataset", "concurrency"):
+        if base["meta"].get(key) != new["meta"].get(key):
+            print(f"warning: {key} differs: {base['meta'].get(key)} vs {new['meta'].get(key)}")
+
+    regressions = []
+    for name in sorted(set(base["results"]) & set(new["results"])):
+        before = base["results"][name].get(args.metric)
+        after = new["results"][name].get(args.metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"{name:<36} {before:>10.2f} -> {after:>10.2f}  {change:+7.1%}{flag}")
+
+    for name in sorted(set(base["results"]) ^ set(new["results"])):
+        print(f"{name:<36} only in {'base' if name in base['results'] else 'new'}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
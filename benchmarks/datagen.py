@@ -0,0 +1,224 @@
+"""
+Deterministic synthetic data at a chosen scale.
+
+    python -m benchmarks.datagen --scale 100k [--seed 42] [--only postgres|mongo]
+
+Replaces the contents of employee, professional_info and salary_log
+(Postgres, loaded with COPY) and employees_info and qualifications (Mongo,
+unordered insert_many batches). Employee i is generated from (seed, i) alone,
+so the same seed and scale always give identical data, and Postgres emp_id i
+and Mongo employee_id "E%03d" % i describe the same person.
+
+Afterwards the tables are ANALYZEd, the materialized analytics are refreshed
+and the Mongo indexes re-created, so benchmarks start from a steady state.
+"""
+import argparse
+import io
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import POSTGRES_URI, MONGO_URI, MONGO_DBNAME, parse_scale, use_backend
+
+FIRST_NAMES = [
+    "Aarav", "Ananya", "Arjun", "Diya", "Ishaan", "Isha", "Kabir", "Kavya", "Meera", "Neha",
+    "Nikhil", "Pooja", "Rahul", "Riya", "Rohit", "Saanvi", "Siddharth", "Sneha", "Vihaan", "Zara",
+]
+LAST_NAMES = [
+    "Agarwal", "Bose", "Chopra", "Das", "Gupta", "Iyer", "Joshi", "Kapoor", "Khan", "Kumar",
+    "Mehta", "Menon", "Nair", "Patel", "Rao", "Reddy", "Sharma", "Singh", "Verma", "Yadav",
+]
+DEPARTMENTS = {
+    "Engineering": (["Software Engineer", "Senior Engineer", "Team Lead", "Architect"], ["Python", "SQL", "System Design", "Docker", "Go"]),
+    "Finance": (["Analyst", "Senior Analyst", "Controller"], ["Excel", "Risk Analysis", "Forecasting", "SAP"]),
+    "HR": (["Recruiter", "HR Generalist", "HR Manager"], ["Recruitment", "Compliance", "Payroll"]),
+    "Sales": (["Sales Executive", "Account Manager", "Sales Director"], ["Negotiation", "CRM", "Forecasting"]),
+    "Operations": (["Coordinator", "Operations Manager"], ["Logistics", "Six Sigma", "Excel"]),
+    "Marketing": (["Content Writer", "Marketing Manager"], ["SEO", "Copywriting", "Analytics"]),
+}
+CITIES = [
+    ("Mumbai", "Maharashtra"), ("Pune", "Maharashtra"), ("New Delhi", "Delhi"), ("Bengaluru", "Karnataka"),
+    ("Chennai", "Tamil Nadu"), ("Hyderabad", "Telangana"), ("Kolkata", "West Bengal"), ("Jaipur", "Rajasthan"),
+]
+BLOOD_GROUPS = ["O+", "A+", "B+", "AB+", "O-", "A-", "B-", "AB-"]
+DEGREES = ["B.Tech", "B.Com", "BBA", "B.Sc", "M.Tech", "MBA", "M.Com", "CA", "PhD"]
+
+COPY_BATCH = 50000
+MONGO_BATCH = 5000
+
+
+# -----------------------------
+# Records
+# -----------------------------
+def person(seed, i):
+    """Everything about employee i; depends only on (seed, i)."""
+    rng = random.Random(f"{seed}:{i}")
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    department = rng.choice(list(DEPARTMENTS))
+    designations, skills = DEPARTMENTS[department]
+    salary = rng.randrange(30000, 250000, 500)
+    increment = rng.randrange(0, 20000, 500)
+    city, state = rng.choice(CITIES)
+    return {
+        "i": i,
+        "first_name": first,
+        "last_name": last,
+        "dob": date(1960, 1, 1) + timedelta(days=rng.randrange(0, 15000)),
+        "gender": rng.choice(["Male", "Female"]),
+        "email": f"{first}.{last}.{i}@example.com".lower(),
+        "phone": f"9{rng.randrange(10 ** 8, 10 ** 9)}",
+        "hire_date": date(2000, 1, 1) + timedelta(days=rng.randrange(0, 9000)),
+        "department": department,
+        "designation": rng.choice(designations),
+        "current_salary": salary,
+        "previous_salary": max(salary - increment, 0),
+        "last_increment": increment,
+        "skills": rng.sample(skills, rng.randint(1, min(3, len(skills)))),
+        "performance_rating": rng.randint(1, 5),
+        "raises": rng.randint(0, 3),
+        "city": city,
+        "state": state,
+        "blood_group": rng.choice(BLOOD_GROUPS),
+        "married": rng.random() < 0.6,
+        "dependents": rng.randint(0, 4),
+        "has_qualifications": rng.random() < 0.5,
+        "degrees": rng.sample(DEGREES, rng.randint(1, 3)),
+        "years": rng.randint(0, 25),
+    }
+
+
+def employee_id(i):
+    return "E%03d" % i
+
+
+def personnel_doc(p):
+    full_name = f"{p['first_name']} {p['last_name']}"
+    dependents = [
+        {"name": f"Dependent {k} {p['last_name']}", "relation": "Child", "age": 2 + 3 * k}
+        for k in range(1, p["dependents"] + 1)
+    ]
+    return {
+        "employee_id": employee_id(p["i"]),
+        "name": full_name,
+        "aadhaar": f"{p['i']:012d}",
+        "pan": f"ABCDE{p['i'] % 10000:04d}F",
+        "dob": p["dob"].isoformat(),
+        "gender": p["gender"],
+        "blood_group": p["blood_group"],
+        "residence": {"address": f"{p['i']} Main Road", "city": p["city"], "state": p["state"], "zip": f"{400000 + p['i'] % 99999}"},
+        "contact": {"phone": p["phone"], "email": p["email"]},
+        "emergency_contact": {"name": f"Contact of {full_name}", "phone": f"8{p['phone'][1:]}"},
+        "family": {
+            "marital_status": "Married" if p["married"] else "Single",
+            "no_of_dependents": len(dependents),
+            "dependents": dependents,
+        },
+    }
+
+
+def qualification_doc(p):
+    return {
+        "employee_id": employee_id(p["i"]),
+        "name": f"{p['first_name']} {p['last_name']}",
+        "qualifications": p["degrees"],
+        "experiences": [f"{p['years']} years in {p['department']}"],
+    }
+
+
+# -----------------------------
+# Postgres
+# -----------------------------
+def _copy(cursor, table, columns, lines):
+    buf = io.StringIO("".join(lines))
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+
+
+def _pg_array(values):
+    return "{" + ",".join('"%s"' % v for v in values) + "}"
+
+
+def load_postgres(uri, seed, scale):
+    import psycopg2
+
+    conn = psycopg2.connect(uri)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("TRUNCATE salary_log, professional_info, employee RESTART IDENTITY CASCADE")
+            for start in range(1, scale + 1, COPY_BATCH):
+                people = [person(seed, i) for i in range(start, min(start + COPY_BATCH, scale + 1))]
+                _copy(cur, "employee",
+                      ["emp_id", "first_name", "last_name", "dob", "gender", "email", "phone", "hire_date"],
+                      [f"{p['i']}\t{p['first_name']}\t{p['last_name']}\t{p['dob']}\t{p['gender']}\t"
+                       f"{p['email']}\t{p['phone']}\t{p['hire_date']}\n" for p in people])
+                _copy(cur, "professional_info",
+                      ["emp_id", "department", "designation", "current_salary", "previous_salary",
+                       "last_increment", "skills", "performance_rating"],
+                      [f"{p['i']}\t{p['department']}\t{p['designation']}\t{p['current_salary']}\t"
+                       f"{p['previous_salary']}\t{p['last_increment']}\t{_pg_array(p['skills'])}\t"
+                       f"{p['performance_rating']}\n" for p in people])
+                _copy(cur, "salary_log",
+                      ["emp_id", "old_salary", "new_salary", "updated_at"],
+                      [f"{p['i']}\t{p['current_salary'] - (k + 1) * 1000}\t{p['current_salary'] - k * 1000}\t"
+                       f"{p['hire_date'] + timedelta(days=365 * (k + 1))} 09:00:00\n"
+                       for p in people for k in range(p["raises"])])
+                print(f"  postgres: {min(start + COPY_BATCH - 1, scale)}/{scale}", file=sys.stderr)
+            cur.execute("SELECT setval(pg_get_serial_sequence('employee', 'emp_id'), GREATEST(%s, 1))", (scale,))
+            cur.execute("SELECT setval(pg_get_serial_sequence('salary_log', 'log_id'), "
+                        "GREATEST((SELECT max(log_id) FROM salary_log), 1))")
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE employee, professional_info, salary_log")
+            cur.execute("SELECT to_regproc('refresh_analytics_matviews') IS NOT NULL")
+            if cur.fetchone()[0]:
+                cur.execute("SELECT refresh_analytics_matviews()")
+    finally:
+        conn.close()
+
+
+# -----------------------------
+# Mongo
+# -----------------------------
+def load_mongo(uri, dbname, seed, scale):
+    from pymongo import MongoClient
+    use_backend()
+    from models.mongo_models import ensure_indexes
+
+    db = MongoClient(uri)[dbname]
+    db.employees_info.drop()
+    db.qualifications.drop()
+    for start in range(1, scale + 1, MONGO_BATCH):
+        people = [person(seed, i) for i in range(start, min(start + MONGO_BATCH, scale + 1))]
+        db.employees_info.insert_many([personnel_doc(p) for p in people], ordered=False)
+        qualified = [qualification_doc(p) for p in people if p["has_qualifications"]]
+        if qualified:
+            db.qualifications.insert_many(qualified, ordered=False)
+        if start % (MONGO_BATCH * 10) == 1:
+            print(f"  mongo: {min(start + MONGO_BATCH - 1, scale)}/{scale}", file=sys.stderr)
+    ensure_indexes(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", default="1k", help="employees to generate: 1k, 100k, 1m, ...")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", choices=["postgres", "mongo"])
+    parser.add_argument("--postgres-uri", default=POSTGRES_URI)
+    parser.add_argument("--mongo-uri", default=MONGO_URI)
+    parser.add_argument("--mongo-db", default=MONGO_DBNAME)
+    args = parser.parse_args()
+
+    scale = parse_scale(args.scale)
+    if args.only != "mongo":
+        start = time.perf_counter()
+        load_postgres(args.postgres_uri, args.seed, scale)
+        print(f"Postgres: {scale} employees in {time.perf_counter() - start:.1f}s")
+    if args.only != "postgres":
+        start = time.perf_counter()
+        load_mongo(args.mongo_uri, args.mongo_db, args.seed, scale)
+        print(f"Mongo: {scale} personnel documents in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
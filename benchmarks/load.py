@@ -0,0 +1,135 @@
+"""
+HTTP load driver for a running server (flask run or gunicorn).
+
+    python -m benchmarks.load --url http://localhost:5000 --duration 30 --concurrency 16 \
+        [--mix employee_list=5,employee_search=3,personnel_list=1,analytics=1] \
+        [--user bench --password secret] --out results/load.json
+
+Each of --concurrency threads keeps its own session (signed in first when
+--user is given) and issues requests drawn from the weighted --mix until
+--duration seconds have passed. Reports throughput, per-scenario latency
+percentiles, status codes and transport errors. The random choice of
+scenarios is seeded per thread, so runs are repeatable.
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+import requests
+
+from benchmarks.common import summarize, write_results
+
+SCENARIOS = {
+    "employee_list": "/employees/",
+    "employee_list_department": "/employees/?department=Engineering",
+    "employee_search": "/employees/search?q=sharma",
+    "personnel_list": "/personnel/",
+    "analytics": "/analytics/",
+    "mongo_analytics": "/mongo-analytics/",
+    "employee_export": "/employees/export/ndjson",
+    "home": "/",
+}
+DEFAULT_MIX = "employee_list=5,employee_search=3,personnel_list=1,analytics=1,mongo_analytics=1"
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+
+    def record(self, scenario, seconds, status=None, error=None):
+        with self.lock:
+            if error:
+                self.errors[f"{scenario}: {error}"] += 1
+                return
+            self.latencies[scenario].append(seconds)
+            self.statuses[scenario][status] += 1
+
+
+def worker(index, args, mix, deadline, recorder):
+    rng = random.Random(f"{args.seed}:{index}")
+    names, weights = list(mix), list(mix.values())
+    session = requests.Session()
+    if args.user:
+        session.post(f"{args.url}/auth/signin", allow_redirects=False, timeout=args.timeout,
+                     data={"username_or_email": args.user, "password": args.password})
+
+    while time.monotonic() < deadline:
+        scenario = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            # Read the whole body so streaming responses are timed to the end
+            response = session.get(args.url + SCENARIOS[scenario], allow_redirects=False, timeout=args.timeout)
+            _ = response.content
+        except requests.RequestException as e:
+            recorder.record(scenario, 0, error=type(e).__name__)
+            continue
+        recorder.record(scenario, time.perf_counter() - start, status=response.status_code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--user")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="-", help="JSON results file ('-' for stdout)")
+    args = parser.parse_args()
+    args.url = args.url.rstrip("/")
+    mix = parse_mix(args.mix)
+
+    recorder = Recorder()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(i, args, mix, deadline, recorder), daemon=True)
+        for i in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for scenario, samples in sorted(recorder.latencies.items()):
+        summary = summarize(samples)
+        summary["rps"] = round(len(samples) / elapsed, 2)
+        summary["statuses"] = {str(k): v for k, v in recorder.statuses[scenario].items()}
+        results[scenario] = summary
+    total = sum(len(s) for s in recorder.latencies.values())
+    results["_total"] = {
+        "requests": total,
+        "rps": round(total / elapsed, 2),
+        "errors": dict(recorder.errors),
+        **{k: v for k, v in summarize([t for s in recorder.latencies.values() for t in s]).items() if k != "runs"},
+    }
+
+    for name, summary in results.items():
+        print(f"{name:<26} rps={summary.get('rps')}  p50={summary.get('median_ms')}ms  "
+              f"p95={summary.get('p95_ms')}ms", file=sys.stderr)
+    write_results(args.out, "load", results, url=args.url, duration=args.duration,
+                  concurrency=args.concurrency, mix=mix)
+
+
+if __name__ == "__main__":
+    main()
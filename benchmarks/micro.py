@@ -0,0 +1,158 @@
+"""
+In-process microbenchmarks against the local databases.
+
+    python -m benchmarks.micro --runs 20 --out results/micro.json [--only NAME ...]
+
+Imports the Flask app with background workers switched off and times:
+  collect_stats[_sequential]  analytics_routes._collect_stats (no result cache)
+  collect_mongo_stats         mongo_analytics_routes._collect_mongo_stats
+  route:*                     list / search pages through the test client,
+                              with the SQL statement count of each response
+  pdf_employee_report         employee_report.html for --pdf-rows employees
+                              (skipped when wkhtmltopdf is not installed)
+
+Seed the databases first (python -m benchmarks.datagen --scale 100k); the
+row counts found are stored with the results.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+from benchmarks.common import POSTGRES_URI, MONGO_URI, MONGO_DBNAME, summarize, timed, use_backend, write_results
+
+ROUTES = {
+    "route:employee_list": "/employees/",
+    "route:employee_list_department": "/employees/?department=Engineering",
+    "route:employee_list_sorted": "/employees/?sort=last_name&dir=desc",
+    "route:employee_search": "/employees/search?q=sharma",
+    "route:employee_search_prefix": "/employees/search?q=ana",
+    "route:personnel_list": "/personnel/",
+    "route:analytics_page": "/analytics/",
+    "route:mongo_analytics_page": "/mongo-analytics/",
+}
+
+
+def load_app():
+    """Import backend/app.py configured for benchmarking (no background threads)."""
+    defaults = {
+        "SQLALCHEMY_DATABASE_URI": POSTGRES_URI,
+        "MONGO_URI": MONGO_URI.replace("/?", f"/{MONGO_DBNAME}?", 1),
+        "REPORT_WORKER_THREADS": "0",
+        "EMAIL_SENDER_THREADS": "0",
+        "CHANGE_FEED_ENABLED": "false",
+        "PASSWORD_HASH_WORKERS": "0",
+        "ANALYTICS_REFRESH_INTERVAL": "86400",
+        "PDF_CACHE_ENABLED": "false",
+        "METRICS_ENABLED": "false",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    use_backend()
+    import app as app_module
+    return app_module.app
+
+
+def dataset_size(app):
+    from sqlalchemy import text
+    from models.postgres_models import db
+    with app.app_context():
+        counts = {
+            table: db.session.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            for table in ("employee", "professional_info", "salary_log")
+        }
+        mongo = app.config["MONGO"].db
+        for collection in ("employees_info", "qualifications"):
+            counts[collection] = mongo[collection].estimated_document_count()
+    return counts
+
+
+def bench_collect_stats(app, runs):
+    from routes.analytics_routes import _collect_stats
+    results = {}
+    for name, mode in (("collect_stats", "concurrent"), ("collect_stats_sequential", "sequential")):
+        app.config["ANALYTICS_QUERY_MODE"] = mode
+        with app.app_context():
+            results[name] = summarize(timed(_collect_stats, runs))
+    return results
+
+
+def bench_collect_mongo_stats(app, runs):
+    from routes.mongo_analytics_routes import _collect_mongo_stats
+    with app.app_context():
+        return {"collect_mongo_stats": summarize(timed(_collect_mongo_stats, runs))}
+
+
+def bench_routes(app, runs, only):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = 1
+        session["role"] = "editor"
+
+    results = {}
+    for name, path in ROUTES.items():
+        if only and name not in only:
+            continue
+        last = {}
+
+        def request():
+            response = client.get(path)
+            last["status"] = response.status_code
+            last["queries"] = response.headers.get("X-DB-Query-Count")
+            response.close()
+
+        summary = summarize(timed(request, runs))
+        summary.update(path=path, status=last.get("status"), queries=last.get("queries"))
+        results[name] = summary
+    return results
+
+
+def bench_pdf(app, runs, rows):
+    from utils.pdf import wkhtmltopdf_path
+    from utils.pdf_chunked import render_rows_pdf
+    from models.postgres_models import Employee
+
+    if not wkhtmltopdf_path():
+        return {"pdf_employee_report": {"skipped": "wkhtmltopdf not installed"}}
+    with app.test_request_context():
+        employees = Employee.query.order_by(Employee.emp_id).limit(rows).all()
+        context = {"company_name": "Benchmark Corp", "company_details": "",
+                   "generated_on": date.today().isoformat(), "generated_time": "00:00:00"}
+        sizes = []
+
+        def render():
+            sizes.append(len(render_rows_pdf("employee_report.html", "employees", employees, context)))
+
+        summary = summarize(timed(render, runs, warmup=0))
+    summary.update(rows=len(employees), pdf_bytes=sizes[-1] if sizes else None)
+    return {"pdf_employee_report": summary}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--pdf-runs", type=int, default=3)
+    parser.add_argument("--pdf-rows", type=int, default=1000)
+    parser.add_argument("--only", nargs="*", help="benchmark names to run (default: all)")
+    parser.add_argument("--out", default="-", help="JSON results file ('-' for stdout)")
+    args = parser.parse_args()
+    only = set(args.only or [])
+
+    app = load_app()
+    results = {}
+    if not only or only & {"collect_stats", "collect_stats_sequential"}:
+        results.update(bench_collect_stats(app, args.runs))
+    if not only or "collect_mongo_stats" in only:
+        results.update(bench_collect_mongo_stats(app, args.runs))
+    if not only or any(name.startswith("route:") for name in only):
+        results.update(bench_routes(app, args.runs, only))
+    if not only or "pdf_employee_report" in only:
+        results.update(bench_pdf(app, args.pdf_runs, args.pdf_rows))
+
+    for name, summary in results.items():
+        print(f"{name:<36} " + "  ".join(f"{k}={v}" for k, v in summary.items() if k != "path"), file=sys.stderr)
+    write_results(args.out, "micro", results, dataset=dataset_size(app), runs=args.runs)
+
+
+if __name__ == "__main__":
+    main()
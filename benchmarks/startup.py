@@ -0,0 +1,160 @@
+"""
+Start-up cost of the backend: cold import, app build and first request.
+
+    python -m benchmarks.startup --runs 5 --out results/startup.json [--importtime 15] \
+        [--gunicorn --workers 4]
+
+Every run is a fresh interpreter (nothing cached in sys.modules), timing:
+  import_app          `import app` (module imports + create_app())
+  first_request       the first GET /auth/ through the test client
+  boot_to_response    process spawn to that response, interpreter start included
+  gunicorn[_preload]  with --gunicorn: launch to the first 200 from a real
+                      server, with and without preload_app
+
+Also records which optional heavy modules (pdfkit, pytz, pypdf, the Brevo SDK)
+were already imported once the app was built; they should be loaded only by
+the code paths that need them. --importtime N prints the N slowest imports
+(python -X importtime, cumulative).
+
+The databases need not be running: building the app and the first request
+touch neither.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.common import BACKEND, POSTGRES_URI, MONGO_URI, MONGO_DBNAME, summarize, write_results
+
+HEAVY_MODULES = ["pdfkit", "pytz", "pypdf", "sib_api_v3_sdk"]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app as app_module
+built = time.perf_counter()
+response = app_module.app.test_client().get("/auth/")
+done = time.perf_counter()
+print(json.dumps({
+    "import_app": built - start,
+    "first_request": done - built,
+    "status": response.status_code,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def child_env(**extra):
+    env = dict(os.environ)
+    defaults = {
+        "SQLALCHEMY_DATABASE_URI": POSTGRES_URI,
+        "MONGO_URI": MONGO_URI.replace("/?", f"/{MONGO_DBNAME}?", 1),
+        "REPORT_WORKER_THREADS": "0",
+        "EMAIL_SENDER_THREADS": "0",
+        "CHANGE_FEED_ENABLED": "false",
+        "PASSWORD_HASH_WORKERS": "0",
+        "METRICS_ENABLED": "false",
+    }
+    for key, value in defaults.items():
+        env.setdefault(key, value)
+    env.update(extra)
+    return env
+
+
+def cold_boot():
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", CHILD], cwd=BACKEND, env=child_env(),
+                          capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode:
+        raise SystemExit(f"App failed to start:\n{proc.stderr}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["boot_to_response"] = elapsed
+    return result
+
+
+def slowest_imports(limit):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=BACKEND,
+                          env=child_env(), capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for us, name in rows[:limit]]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def gunicorn_boot(workers, preload, timeout):
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/auth/"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "--bind", f"127.0.0.1:{port}", "--workers", str(workers)],
+        cwd=BACKEND, env=child_env(GUNICORN_PRELOAD="true" if preload else "false"),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise SystemExit("gunicorn exited during start-up; run it by hand to see why")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                time.sleep(0.02)
+        raise SystemExit(f"No response from gunicorn within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N")
+    parser.add_argument("--gunicorn", action="store_true")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--out", default="-", help="JSON results file ('-' for stdout)")
+    args = parser.parse_args()
+
+    boots = [cold_boot() for _ in range(args.runs)]
+    results = {
+        name: summarize([boot[name] for boot in boots])
+        for name in ("import_app", "first_request", "boot_to_response")
+    }
+    results["first_request"]["status"] = boots[-1]["status"]
+    results["import_app"]["heavy_modules_loaded"] = boots[-1]["loaded"]
+    if args.gunicorn:
+        for name, preload in (("gunicorn", False), ("gunicorn_preload", True)):
+            summary = summarize([gunicorn_boot(args.workers, preload, args.timeout) for _ in range(args.runs)])
+            summary["workers"] = args.workers
+            results[name] = summary
+
+    for name, summary in results.items():
+        print(f"{name:<20} " + "  ".join(f"{k}={v}" for k, v in summary.items()), file=sys.stderr)
+    meta = {"runs": args.runs}
+    if args.importtime:
+        meta["slowest_imports"] = slowest_imports(args.importtime)
+        for row in meta["slowest_imports"]:
+            print(f"  {row['cumulative_ms']:>8} ms  {row['module']}", file=sys.stderr)
+    write_results(args.out, "startup", results, **meta)
+
+
+if __name__ == "__main__":
+    main()
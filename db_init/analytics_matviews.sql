@@ -0,0 +1,132 @@
+-- =============================
+-- analytics_matviews.sql
+-- Materialized copies of the analytics views, refreshed CONCURRENTLY
+-- Run after professional_info.sql (see Makefile: init-db)
+-- =============================
+
+-- 🗂️ Refresh bookkeeping (single row, written only by the refresh)
+CREATE TABLE IF NOT EXISTS analytics_refresh_state (
+    id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    refreshed_at TIMESTAMPTZ,
+    applied_changes BIGINT NOT NULL DEFAULT 0
+);
+-- Databases created before the change log kept the dirty markers here
+ALTER TABLE analytics_refresh_state
+    ADD COLUMN IF NOT EXISTS applied_changes BIGINT NOT NULL DEFAULT 0,
+    DROP COLUMN IF EXISTS dirty_since,
+    DROP COLUMN IF EXISTS changed_at;
+INSERT INTO analytics_refresh_state (id, refreshed_at) VALUES (1, NOW())
+ON CONFLICT (id) DO NOTHING;
+
+-- 🧾 Writes not yet reflected in the materialized views (append-only).
+-- Writers only insert, so they never wait on each other here; the refresh
+-- deletes the rows it has applied. Pending = what is left in the table.
+CREATE TABLE IF NOT EXISTS analytics_changes (
+    id BIGSERIAL PRIMARY KEY,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+
+-- 🔁 Trigger Function: Record a write to the analytics source tables
+-- Statement-level, so a bulk write is recorded once, not per row.
+-- Covers the salary changes/deletes recorded by trg_salary_update and
+-- trg_log_delete as well as inserts and non-salary edits.
+CREATE OR REPLACE FUNCTION mark_analytics_dirty() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO analytics_changes DEFAULT VALUES;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_analytics_dirty ON professional_info;
+CREATE TRIGGER trg_analytics_dirty
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON professional_info
+FOR EACH STATEMENT
+EXECUTE FUNCTION mark_analytics_dirty();
+
+DROP TRIGGER IF EXISTS trg_analytics_dirty ON employee;
+CREATE TRIGGER trg_analytics_dirty
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON employee
+FOR EACH STATEMENT
+EXECUTE FUNCTION mark_analytics_dirty();
+
+-- 📊 Materialized View: Top earners per department
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_top_earners_per_department AS
+SELECT * FROM top_earners_per_department;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_top_earners_emp ON mv_top_earners_per_department(emp_id);
+
+-- 📊 Materialized View: Low performers
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_low_performers AS
+SELECT * FROM low_performers;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_low_performers_emp ON mv_low_performers(emp_id);
+
+-- 📊 Materialized View: Promotion candidates
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_promotion_candidates AS
+SELECT * FROM promotion_candidates;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_promotion_candidates_emp ON mv_promotion_candidates(emp_id);
+
+-- 📊 Materialized View: Experienced employees
+-- Depends on AGE(hire_date), so it also needs a periodic refresh
+-- (ANALYTICS_REFRESH_MAX_AGE) even without writes.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_experienced_employees AS
+SELECT * FROM experienced_employees;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_experienced_employees_emp ON mv_experienced_employees(emp_id);
+
+-- 🎯 Materialized View: Salary grades
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_salary_grades AS
+SELECT emp_id, department, current_salary,
+    CASE
+        WHEN current_salary > 70000 THEN 'High'
+        WHEN current_salary BETWEEN 50000 AND 70000 THEN 'Medium'
+        ELSE 'Low'
+    END AS grade
+FROM professional_info;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_salary_grades_emp ON mv_salary_grades(emp_id);
+
+-- 🏆 Materialized View: Salary rank
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_salary_ranks AS
+SELECT emp_id, current_salary,
+       RANK() OVER (ORDER BY current_salary DESC) AS salary_rank
+FROM professional_info;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_salary_ranks_emp ON mv_salary_ranks(emp_id);
+
+-- 📈 Materialized View: Running salary SUM & AVG
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_running_salary AS
+SELECT emp_id, current_salary,
+       SUM(current_salary) OVER (ORDER BY emp_id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS running_sum,
+       AVG(current_salary) OVER (ORDER BY emp_id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS running_avg
+FROM professional_info;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_running_salary_emp ON mv_running_salary(emp_id);
+
+-- 🔧 Function: Refresh all analytics materialized views
+-- Readers are never blocked (CONCURRENTLY). Only the changes committed
+-- before it starts are consumed; later ones stay in analytics_changes so
+-- the next cycle picks them up.
+CREATE OR REPLACE FUNCTION refresh_analytics_matviews() RETURNS TIMESTAMPTZ AS $$
+DECLARE
+    started TIMESTAMPTZ := clock_timestamp();
+    applied BIGINT;
+BEGIN
+    WITH consumed AS (DELETE FROM analytics_changes RETURNING 1)
+    SELECT count(*) INTO applied FROM consumed;
+
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_top_earners_per_department;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_low_performers;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_promotion_candidates;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_experienced_employees;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_salary_grades;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_salary_ranks;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_running_salary;
+
+    UPDATE analytics_refresh_state
+    SET refreshed_at = started,
+        applied_changes = applied_changes + applied
+    WHERE id = 1;
+
+    -- Tell change feed listeners (backend/utils/change_feed.py) the views moved on
+    PERFORM pg_notify('hr_changes', json_build_object(
+        'table', 'analytics_matviews', 'op', 'REFRESH', 'ids', NULL
+    )::text);
+
+    RETURN started;
+END;
+$$ LANGUAGE plpgsql;
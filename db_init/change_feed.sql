@@ -0,0 +1,68 @@
+-- =============================
+-- change_feed.sql
+-- NOTIFY hr_changes after writes to employee, professional_info and accounts,
+-- consumed by the per-worker listener in backend/utils/change_feed.py.
+-- Run after accounts.sql and professional_info.sql (see Makefile: init-db)
+-- =============================
+
+-- 🔔 Trigger Function: one notification per statement
+-- Payload: {"table": ..., "op": "INSERT|UPDATE|DELETE|TRUNCATE", "ids": [...]}
+-- with the distinct keys (column TG_ARGV[0]) of the rows the statement
+-- touched. "ids" is null for TRUNCATE and when there are more than 500 of
+-- them (payloads are capped at 8000 bytes); listeners then treat the whole
+-- table as changed. Notifications are delivered on commit only, so a
+-- rolled-back write is never announced.
+CREATE OR REPLACE FUNCTION notify_change() RETURNS TRIGGER AS $$
+DECLARE
+    n BIGINT;
+    ids BIGINT[];
+BEGIN
+    IF TG_OP <> 'TRUNCATE' THEN
+        EXECUTE format(
+            'SELECT count(*), array_agg(DISTINCT %I) FROM %I',
+            TG_ARGV[0], CASE WHEN TG_OP = 'DELETE' THEN 'old_rows' ELSE 'new_rows' END
+        ) INTO n, ids;
+        IF n = 0 THEN
+            RETURN NULL;
+        END IF;
+        IF cardinality(ids) > 500 THEN
+            ids := NULL;
+        END IF;
+    END IF;
+
+    PERFORM pg_notify('hr_changes', json_build_object(
+        'table', TG_TABLE_NAME,
+        'op', TG_OP,
+        'ids', ids
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 🔁 Create Triggers (statement-level; transition tables allow one event per trigger)
+DO $$
+DECLARE
+    t RECORD;
+BEGIN
+    FOR t IN SELECT * FROM (VALUES ('employee', 'emp_id'), ('professional_info', 'emp_id'), ('accounts', 'id')) AS v(tbl, key) LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_change_feed_insert ON %I', t.tbl);
+        EXECUTE format('CREATE TRIGGER trg_change_feed_insert AFTER INSERT ON %I
+                        REFERENCING NEW TABLE AS new_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION notify_change(%L)', t.tbl, t.key);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_change_feed_update ON %I', t.tbl);
+        EXECUTE format('CREATE TRIGGER trg_change_feed_update AFTER UPDATE ON %I
+                        REFERENCING NEW TABLE AS new_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION notify_change(%L)', t.tbl, t.key);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_change_feed_delete ON %I', t.tbl);
+        EXECUTE format('CREATE TRIGGER trg_change_feed_delete AFTER DELETE ON %I
+                        REFERENCING OLD TABLE AS old_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION notify_change(%L)', t.tbl, t.key);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_change_feed_truncate ON %I', t.tbl);
+        EXECUTE format('CREATE TRIGGER trg_change_feed_truncate AFTER TRUNCATE ON %I
+                        FOR EACH STATEMENT EXECUTE FUNCTION notify_change(%L)', t.tbl, t.key);
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,25 @@
+-- =============================
+-- email_outbox.sql
+-- Outgoing email queue drained by background senders (backend/utils/email_outbox.py)
+-- =============================
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id SERIAL PRIMARY KEY,
+    to_email VARCHAR(100) NOT NULL,
+    subject VARCHAR(200) NOT NULL,
+    text_content TEXT,
+    template VARCHAR(50),  -- body built at send time (OTP mails), never stored
+    status VARCHAR(10) NOT NULL DEFAULT 'queued',
+    attempts INT NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'utc'),
+    next_attempt_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'utc'),
+    claimed_at TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+ALTER TABLE email_outbox ADD COLUMN IF NOT EXISTS template VARCHAR(50);
+
+-- 📈 Indexes: claim due messages, sweep old ones
+CREATE INDEX IF NOT EXISTS idx_email_outbox_status_next ON email_outbox(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_email_outbox_created ON email_outbox(created_at);
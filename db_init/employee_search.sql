@@ -0,0 +1,14 @@
+-- =============================
+-- employee_search.sql
+-- Trigram index for server-side employee search
+-- Run after init_employee.sql (see Makefile: init-db)
+-- =============================
+
+-- 🔎 pg_trgm: LIKE '%q%' and similarity ranking from a GIN index
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 📈 Index: searchable text of an employee (name, email, phone)
+-- Keep the expression identical to SEARCH_DOCUMENT in backend/utils/employee_search.py
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_employee_search_trgm
+ON employee
+USING GIN (lower(first_name || ' ' || last_name || ' ' || coalesce(email, '') || ' ' || coalesce(phone, '')) gin_trgm_ops);
@@ -0,0 +1,15 @@
+-- =============================
+-- otp_codes.sql
+-- Password-reset OTPs shared by all app workers (backend/utils/otp_store.py)
+-- =============================
+
+CREATE TABLE IF NOT EXISTS otp_codes (
+    email VARCHAR(100) PRIMARY KEY,
+    otp_hash VARCHAR(64) NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'utc')
+);
+
+-- 📈 Index: expired codes are swept in small batches on every write
+CREATE INDEX IF NOT EXISTS idx_otp_codes_expires ON otp_codes(expires_at);
@@ -0,0 +1,25 @@
+-- =============================
+-- report_jobs.sql
+-- Queue table for background PDF reports (backend/utils/report_jobs.py)
+-- =============================
+
+CREATE TABLE IF NOT EXISTS report_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    kind VARCHAR(30) NOT NULL,
+    params JSON,
+    status VARCHAR(10) NOT NULL DEFAULT 'queued',
+    error TEXT,
+    filename VARCHAR(200),
+    result BYTEA,
+    result_size INT,
+    attempts INT NOT NULL DEFAULT 0,
+    worker VARCHAR(100),
+    created_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'utc'),
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    expires_at TIMESTAMP
+);
+
+-- 📈 Indexes: claim the oldest queued job, sweep expired results
+CREATE INDEX IF NOT EXISTS idx_report_jobs_status_created ON report_jobs(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_report_jobs_expires ON report_jobs(expires_at);
@@ -1,3 +1,19 @@
+DROP MATERIALIZED VIEW IF EXISTS
+    mv_top_earners_per_department,
+    mv_low_performers,
+    mv_promotion_candidates,
+    mv_experienced_employees,
+    mv_salary_grades,
+    mv_salary_ranks,
+    mv_running_salary
+CASCADE;
+
+DROP TABLE IF EXISTS analytics_refresh_state;
+DROP TABLE IF EXISTS analytics_changes;
+DROP TABLE IF EXISTS report_jobs;
+DROP TABLE IF EXISTS otp_codes;
+DROP TABLE IF EXISTS email_outbox;
+
 DROP VIEW IF EXISTS 
     experienced_employees, 
     low_performers, 